@@ -0,0 +1,196 @@
+import random
+
+COLLECTION_SCHEMA = 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json'
+HTTP_METHODS = ('get', 'post', 'put', 'patch', 'delete')
+
+# Words used for path segments, parameters and schema properties
+RESOURCES = [
+    'accounts', 'bookmarks', 'invoices', 'orders', 'payments', 'products', 'projects', 'reports',
+    'sessions', 'shipments', 'subscriptions', 'tags', 'teams', 'tickets', 'users', 'webhooks',
+]
+FIELDS = [
+    'id', 'name', 'title', 'status', 'created_at', 'updated_at', 'owner_id', 'description',
+    'amount', 'currency', 'email', 'url', 'limit', 'skip', 'sort', 'filter', 'region', 'version',
+]
+FIELD_TYPES = [('string', None), ('integer', 'int32'), ('integer', 'int64'), ('string', 'date-time'), ('boolean', None), ('number', 'double')]
+
+# A typical hand-written Postman test script, repeated to make events heavy
+TEST_SCRIPT = [
+    'pm.test("Status code is 200", function () {',
+    '    pm.response.to.have.status(200);',
+    '});',
+    'pm.test("Response has the expected shape", function () {',
+    '    const body = pm.response.json();',
+    '    pm.expect(body).to.be.an("object");',
+    '    pm.expect(body).to.have.property("id");',
+    '});',
+    'pm.environment.set("last_id", pm.response.json().id);',
+]
+
+
+class Generator:
+    """
+    Generates deterministic OpenAPI specs and Postman collections for benchmarks.
+
+    The same seed and endpoint count always produce the same documents, so
+    results from different commits are comparable.
+
+    Args:
+        endpoint_count (int): The number of operations to generate.
+        seed (int): The random seed.
+        max_depth (int): The deepest folder nesting of the generated paths.
+        script_lines (int): The number of test script lines on each request with events.
+    """
+
+    def __init__(self, endpoint_count, seed=0, max_depth=6, script_lines=30):
+        self.endpoint_count = endpoint_count
+        self.seed = seed
+        self.max_depth = max_depth
+        self.script_lines = script_lines
+        self.operations = self._operations()
+
+    def _operations(self):
+        rng = random.Random(self.seed)
+        operations = []
+        seen = set()
+        while len(operations) < self.endpoint_count:
+            depth = rng.randint(1, self.max_depth)
+            segments = []
+            for level in range(depth):
+                segment = rng.choice(RESOURCES)
+                if level % 2:
+                    segment = f"{{{segment[:-1]}_id}}"
+                segments.append(segment)
+            # A numbered root keeps large trees wide instead of colliding on a few paths
+            path = f"/v{rng.randint(1, max(self.endpoint_count // 200, 1))}/" + '/'.join(segments)
+            method = rng.choice(HTTP_METHODS)
+            if (method, path) in seen:
+                continue
+            seen.add((method, path))
+            query = rng.sample(FIELDS, rng.randint(0, 6))
+            properties = {field: rng.choice(FIELD_TYPES) for field in rng.sample(FIELDS, rng.randint(3, 12))}
+            operations.append({'method': method, 'path': path, 'query': query, 'properties': properties})
+        return operations
+
+    def spec(self):
+        """
+        Returns an OpenAPI 3 document with a schema per operation.
+        """
+        paths = {}
+        schemas = {}
+        for index, operation in enumerate(self.operations):
+            schema_name = f"Model{index}"
+            schemas[schema_name] = {
+                'type': 'object',
+                'properties': {field: _schema(field_type) for field, field_type in operation['properties'].items()},
+            }
+            parameters = [
+                {'name': segment[1:-1], 'in': 'path', 'required': True, 'schema': {'type': 'string'}}
+                for segment in operation['path'].split('/') if segment.startswith('{')
+            ]
+            parameters += [{'name': field, 'in': 'query', 'schema': {'type': 'integer'}} for field in operation['query']]
+            entry = {
+                'summary': f"{operation['method'].upper()} {operation['path']}",
+                'operationId': f"operation_{index}",
+                'parameters': parameters,
+                'responses': {'200': {'description': 'OK', 'content': {'application/json': {'schema': {'$ref': f"#/components/schemas/{schema_name}"}}}}},
+            }
+            if operation['method'] in ('post', 'put', 'patch'):
+                entry['requestBody'] = {'content': {'application/json': {'schema': {'$ref': f"#/components/schemas/{schema_name}"}}}}
+            paths.setdefault(operation['path'], {})[operation['method']] = entry
+        return {
+            'openapi': '3.0.0',
+            'info': {'title': f"Benchmark API {self.endpoint_count}", 'version': '1.0.0'},
+            'servers': [{'url': 'https://api.example.com'}],
+            'paths': paths,
+            'components': {'schemas': schemas},
+        }
+
+    def collection(self, with_events=True, changed_ratio=0.0, event_ratio=0.8):
+        """
+        Returns a Postman collection with one folder per path segment.
+
+        Args:
+            with_events (bool): Whether requests carry test scripts, as in a collection QA has worked on.
+            changed_ratio (float): The share of operations whose URL differs, as after a spec change.
+            event_ratio (float): The share of requests that carry test scripts when with_events is set.
+
+        Returns:
+            dict: The Postman collection JSON.
+        """
+        rng = random.Random(self.seed + 1)
+        root = {'item': []}
+        folders = {}
+        for index, operation in enumerate(self.operations):
+            path = operation['path']
+            if rng.random() < changed_ratio:
+                path = f"{path}/changed"
+            segments = path.strip('/').split('/')
+            parent = root
+            for depth in range(1, len(segments)):
+                key = tuple(segments[:depth])
+                if key not in folders:
+                    folders[key] = {'name': segments[depth - 1], 'item': []}
+                    parent['item'].append(folders[key])
+                parent = folders[key]
+            item = _request_item(index, operation, path)
+            if with_events and rng.random() < event_ratio:
+                item['event'] = _events(index, self.script_lines)
+            parent['item'].append(item)
+        return {
+            'collection': {
+                'info': {'name': f"Benchmark API {self.endpoint_count}", 'schema': COLLECTION_SCHEMA},
+                'item': root['item'],
+                'variable': [{'key': 'baseUrl', 'value': 'https://api.example.com', 'type': 'string'}],
+            }
+        }
+
+
+def _schema(field_type):
+    schema_type, schema_format = field_type
+    schema = {'type': schema_type}
+    if schema_format:
+        schema['format'] = schema_format
+    return schema
+
+
+def _placeholder(field_type):
+    schema_type, schema_format = field_type
+    return f"<{schema_format or schema_type}>"
+
+
+def _request_item(index, operation, path):
+    postman_path = [f":{segment[1:-1]}" if segment.startswith('{') else segment for segment in path.strip('/').split('/')]
+    query = [{'key': field, 'value': '<integer>'} for field in operation['query']]
+    raw = '{{baseUrl}}/' + '/'.join(postman_path)
+    if query:
+        raw += '?' + '&'.join(f"{param['key']}={param['value']}" for param in query)
+    request = {
+        'method': operation['method'].upper(),
+        'header': [{'key': 'Accept', 'value': 'application/json'}],
+        'url': {
+            'raw': raw,
+            'host': ['{{baseUrl}}'],
+            'path': postman_path,
+            'query': query,
+            'variable': [{'key': segment[1:], 'value': '<string>'} for segment in postman_path if segment.startswith(':')],
+        },
+    }
+    if operation['method'] in ('post', 'put', 'patch'):
+        body = ', '.join(f'"{field}": "{_placeholder(field_type)}"' for field, field_type in operation['properties'].items())
+        request['header'].append({'key': 'Content-Type', 'value': 'application/json'})
+        request['body'] = {'mode': 'raw', 'raw': '{' + body + '}', 'options': {'raw': {'language': 'json'}}}
+    return {
+        'id': f"request-{index}",
+        'name': f"{operation['method'].upper()} {path}",
+        'request': request,
+        'response': [],
+    }
+
+
+def _events(index, script_lines):
+    lines = [TEST_SCRIPT[line % len(TEST_SCRIPT)] for line in range(script_lines)]
+    return [
+        {'listen': 'prerequest', 'script': {'id': f"pre-{index}", 'type': 'text/javascript', 'exec': ['pm.variables.set("ts", Date.now());']}},
+        {'listen': 'test', 'script': {'id': f"test-{index}", 'type': 'text/javascript', 'exec': lines}},
+    ]
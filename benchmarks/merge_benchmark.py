@@ -0,0 +1,232 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.generate import Generator
+from postman_sync import codec
+from postman_sync.endpoint_transfer import extract_endpoints, update_endpoints, diff_collections
+from postman_sync.main_script import hash_json
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.2
+
+# Share of operations whose URL changes between the old and new collection
+CHANGED_RATIO = 0.05
+
+
+def run_stages(generator, work_dir):
+    """
+    Returns the benchmarked stages for one collection size, in the order the sync runs them.
+
+    Each stage is a (name, setup, action) tuple. setup prepares fresh inputs
+    outside the measurement, so stages that mutate their input can be repeated.
+    """
+    spec = generator.spec()
+    old_path = os.path.join(work_dir, 'old.json')
+    new_path = os.path.join(work_dir, 'new.json')
+    output_path = os.path.join(work_dir, 'updated.json')
+    with open(old_path, 'w') as file:
+        json.dump(generator.collection(with_events=True), file, indent=4)
+    with open(new_path, 'w') as file:
+        json.dump(generator.collection(with_events=False, changed_ratio=CHANGED_RATIO), file, indent=4)
+
+    def load_both():
+        with open(old_path, 'r') as old_file:
+            old_data = json.load(old_file)
+        with open(new_path, 'r') as new_file:
+            new_data = json.load(new_file)
+        return old_data, new_data
+
+    def with_endpoints():
+        old_data, new_data = load_both()
+        return extract_endpoints(old_data['collection']['item']), new_data
+
+    def merge(inputs):
+        old_endpoints, new_data = inputs
+        stats = {'old_endpoints_count': len(old_endpoints), 'updated_endpoints': [], 'updated_events_count': 0}
+        return update_endpoints(new_data['collection']['item'], old_endpoints, stats)
+
+    def codec_load_both():
+        return codec.read_file(old_path), codec.read_file(new_path)
+
+    def dump(inputs):
+        _, new_data = inputs
+        with open(output_path, 'w') as output_file:
+            json.dump(new_data, output_file, indent=4)
+
+    return [
+        ('hash_json', lambda: spec, hash_json),
+        ('json_load', lambda: None, lambda _: load_both()),
+        ('extract_endpoints', load_both, lambda inputs: extract_endpoints(inputs[0]['collection']['item'])),
+        ('update_endpoints', with_endpoints, merge),
+        ('diff_collections', load_both, lambda inputs: diff_collections(inputs[0]['collection']['item'], inputs[1]['collection']['item'])),
+        ('json_dump', load_both, dump),
+        ('codec_load', lambda: None, lambda _: codec_load_both()),
+        ('codec_dump', load_both, lambda inputs: codec.write_file(output_path, inputs[1])),
+    ]
+
+
+def measure(setup, action, repeat):
+    """
+    Times an action and records its peak traced memory in a separate run.
+
+    Args:
+        setup (callable): Returns the input of the action.
+        action (callable): The measured code.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        dict: The median and minimum time in seconds and the peak allocated bytes.
+    """
+    timings = []
+    for _ in range(repeat):
+        inputs = setup()
+        gc.collect()
+        started = time.perf_counter()
+        action(inputs)
+        timings.append(time.perf_counter() - started)
+        del inputs
+
+    # Tracing slows the code down, so memory is measured outside the timed runs
+    inputs = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        action(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': statistics.median(timings), 'min_seconds': min(timings), 'peak_bytes': peak}
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=0, stages=None):
+    """
+    Runs every stage for every collection size.
+
+    Args:
+        sizes (iterable): The endpoint counts to generate.
+        repeat (int): The number of timed runs per stage.
+        seed (int): The generator seed.
+        stages (iterable, optional): Only run these stage names.
+
+    Returns:
+        dict: The environment and the per-size, per-stage results.
+    """
+    results = {}
+    for size in sizes:
+        generator = Generator(size, seed)
+        results[str(size)] = {}
+        with tempfile.TemporaryDirectory() as work_dir:
+            for name, setup, action in run_stages(generator, work_dir):
+                if stages and name not in stages:
+                    continue
+                result = measure(setup, action, repeat)
+                results[str(size)][name] = result
+                print(f"{size:>8} {name:<18} {result['seconds'] * 1000:10.1f} ms {result['peak_bytes'] / 2 ** 20:10.1f} MiB")
+    return {
+        'created_at': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'codec': codec.BACKEND,
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two benchmark result files stage by stage.
+
+    Args:
+        baseline (dict): The results of the reference commit.
+        current (dict): The results of the commit under test.
+        threshold (float): The relative increase in time or peak memory that counts as a regression.
+
+    Returns:
+        list: One row per stage present in both results, as dicts with the relative changes and a regression flag.
+    """
+    rows = []
+    for size, stages in current['results'].items():
+        for name, result in stages.items():
+            reference = baseline['results'].get(size, {}).get(name)
+            if reference is None:
+                continue
+            time_change = _relative_change(reference['seconds'], result['seconds'])
+            memory_change = _relative_change(reference['peak_bytes'], result['peak_bytes'])
+            rows.append({
+                'size': size,
+                'stage': name,
+                'time_change': time_change,
+                'memory_change': memory_change,
+                'regression': time_change > threshold or memory_change > threshold,
+            })
+    return rows
+
+
+def _relative_change(before, after):
+    if not before:
+        return 0.0
+    return (after - before) / before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the collection merge engine on generated collections.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and save the results.")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Endpoint counts to benchmark, e.g. 1000 10000 200000.")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per stage; the median is reported.")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the collection generator.")
+    run_parser.add_argument("--stages", nargs="+", help="Only run these stages.")
+    run_parser.add_argument("-o", "--output", help="Write the results to this JSON file.")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files and flag regressions.")
+    compare_parser.add_argument("baseline", help="Results of the reference commit.")
+    compare_parser.add_argument("current", help="Results of the commit under test.")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown or memory growth that counts as a regression.")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.repeat, args.seed, args.stages)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=4)
+            print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)
+    with open(args.current, 'r') as file:
+        current = json.load(file)
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['size']:>8} {row['stage']:<18} time {row['time_change']:+8.1%} memory {row['memory_change']:+8.1%} {flag}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
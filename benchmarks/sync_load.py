@@ -0,0 +1,168 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.generate import Generator
+from fake_postman import main as fake_postman
+from postman_sync import metrics
+from postman_sync import helper_functions
+from postman_sync.main_script import main_code, new_entry, UPDATE_MODES, CONVERTERS
+from postman_sync.state import SqliteState
+
+API_KEY = 'load-test-key'
+
+
+class SpecServer:
+    """
+    Serves generated specs at /specs/<index>.json, so the sync can be pointed at hundreds of links.
+    """
+
+    def __init__(self):
+        self.specs = {}
+        specs = self.specs
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.rsplit('/', 1)[-1]
+                if name not in specs:
+                    self.send_error(404)
+                    return
+                body = specs[name]
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def publish(self, index, spec):
+        self.specs[f"{index}.json"] = json.dumps(spec).encode()
+
+
+def start_fake_postman(port=None):
+    """
+    Runs the fake Postman API in a background thread.
+
+    Returns:
+        tuple: The base URL and the uvicorn server. Set its should_exit to stop it.
+    """
+    import uvicorn
+
+    if port is None:
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_postman.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server
+
+
+def run_load_test(links=100, endpoints=50, changed_ratio=0.3, workers=8, seed=0, update_mode='new', converter='postman', **fault_settings):
+    """
+    Registers generated links against the fake Postman API, changes some specs and times a full main_code run.
+
+    Args:
+        links (int): The number of links to register.
+        endpoints (int): The number of operations per spec.
+        changed_ratio (float): The share of specs that change before the measured run.
+        workers (int): The number of links synced concurrently.
+        seed (int): The generator seed.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+        converter (str): How specs are converted, either 'postman' or 'local'.
+        **fault_settings: Latency, rate limit and failure injection settings of the fake Postman API.
+
+    Returns:
+        dict: The setup and sync durations, the sync metrics and the fake server's request statistics.
+    """
+    # main_code loads the API key itself; the fake API accepts any key
+    if not os.getenv('POSTMAN_API_KEY'):
+        os.environ['POSTMAN_API_KEY'] = API_KEY
+    fake_postman.reset()
+    api_url, postman_server = start_fake_postman()
+    previous_api_url = helper_functions.POSTMAN_API_URL
+    helper_functions.set_api_url(api_url)
+    spec_server = SpecServer()
+    spec_url = spec_server.start()
+    state = SqliteState(':memory:')
+    try:
+        started = time.perf_counter()
+        for index in range(links):
+            spec_server.publish(index, Generator(endpoints, seed + index).spec())
+            new_entry(API_KEY, f"{spec_url}/specs/{index}.json", state)
+        setup_seconds = time.perf_counter() - started
+
+        changed = int(links * changed_ratio)
+        for index in range(changed):
+            spec_server.publish(index, Generator(endpoints + 1, seed + index).spec())
+
+        fake_postman.stats.clear()
+        fake_postman.configure(**fault_settings)
+        run_metrics = metrics.start_run()
+        started = time.perf_counter()
+        main_code(workers=workers, state=state, converter=converter, update_mode=update_mode)
+        sync_seconds = time.perf_counter() - started
+        run_metrics.finish()
+        return {
+            'links': links,
+            'changed_links': changed,
+            'setup_seconds': setup_seconds,
+            'sync_seconds': sync_seconds,
+            'totals': run_metrics.summary()['totals'],
+            'fake_postman': dict(fake_postman.stats),
+        }
+    finally:
+        fake_postman.configure(latency=0.0, latency_jitter=0.0, rate_limit=0, failure_rate=0.0)
+        state.close()
+        spec_server.stop()
+        postman_server.should_exit = True
+        helper_functions.set_api_url(previous_api_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a full sync of many links against the local fake Postman API.")
+    parser.add_argument("--links", type=int, default=100, help="Number of links to register.")
+    parser.add_argument("--endpoints", type=int, default=50, help="Operations per generated spec.")
+    parser.add_argument("--changed-ratio", type=float, default=0.3, help="Share of specs that change before the measured run.")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Number of links synced concurrently.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the spec generator.")
+    parser.add_argument("--update-mode", choices=UPDATE_MODES, default='new', help="How changes are published.")
+    parser.add_argument("--converter", choices=CONVERTERS, default='postman', help="How specs are converted.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake API adds to every response.")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per minute the fake API allows before answering 429.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake API requests answered with a 500 error.")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    result = run_load_test(args.links, args.endpoints, args.changed_ratio, args.workers, args.seed, args.update_mode, args.converter,
+                           latency=args.latency, rate_limit=args.rate_limit, failure_rate=args.failure_rate)
+    print(json.dumps(result, indent=4))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from postman_sync.converter import convert_spec
+
+# Owner prefix of the generated collection UIDs
+OWNER_ID = '1234567'
+
+# Paths that control the fake server itself and are never delayed, limited or failed
+CONTROL_PREFIX = '/_fake'
+
+
+class Settings:
+    """
+    Fault injection settings of the fake Postman API.
+
+    Args:
+        latency (float): Seconds added to every response.
+        latency_jitter (float): Up to this many extra seconds, chosen at random per response.
+        rate_limit (int): Requests allowed per rolling minute before 429 responses, or 0 for no limit.
+        failure_rate (float): Share of requests answered with a 500 error.
+        seed (int, optional): Seed for the latency jitter and failure injection.
+    """
+
+    FIELDS = ('latency', 'latency_jitter', 'rate_limit', 'failure_rate', 'seed')
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, rate_limit=0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.failure_rate = failure_rate
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv('FAKE_POSTMAN_SEED')
+        return cls(
+            latency=float(os.getenv('FAKE_POSTMAN_LATENCY', 0)),
+            latency_jitter=float(os.getenv('FAKE_POSTMAN_LATENCY_JITTER', 0)),
+            rate_limit=int(os.getenv('FAKE_POSTMAN_RATE_LIMIT', 0)),
+            failure_rate=float(os.getenv('FAKE_POSTMAN_FAILURE_RATE', 0)),
+            seed=int(seed) if seed else None,
+        )
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+settings = Settings.from_env()
+rng = random.Random(settings.seed)
+collections = {}
+stats = Counter()
+recent_requests = deque()
+
+app = FastAPI(title="Fake Postman API")
+
+
+def configure(**values):
+    """
+    Updates the fault injection settings, e.g. configure(latency=0.05, rate_limit=60).
+    """
+    global rng
+    for field, value in values.items():
+        if field not in Settings.FIELDS:
+            raise ValueError(f"Unknown setting: {field}")
+        setattr(settings, field, value)
+    if 'seed' in values:
+        rng = random.Random(settings.seed)
+
+
+def reset():
+    """
+    Deletes every stored collection and clears the request statistics.
+    """
+    collections.clear()
+    stats.clear()
+    recent_requests.clear()
+
+
+def error(status_code, name, message):
+    return JSONResponse(status_code=status_code, content={'error': {'name': name, 'message': message}})
+
+
+def not_found(uid):
+    return error(404, 'instanceNotFoundError', f"We could not find the collection you are looking for: {uid}")
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    if request.url.path.startswith(CONTROL_PREFIX):
+        return await call_next(request)
+
+    stats['requests'] += 1
+    delay = settings.latency + (rng.uniform(0, settings.latency_jitter) if settings.latency_jitter else 0)
+    if delay:
+        await asyncio.sleep(delay)
+
+    if not request.headers.get('X-Api-Key'):
+        stats['unauthorized'] += 1
+        return error(401, 'AuthenticationError', 'Invalid API Key. Every request requires a valid API Key to be sent.')
+
+    if settings.rate_limit:
+        now = time.monotonic()
+        while recent_requests and recent_requests[0] <= now - 60:
+            recent_requests.popleft()
+        if len(recent_requests) >= settings.rate_limit:
+            stats['rate_limited'] += 1
+            retry_after = max(math.ceil(recent_requests[0] + 60 - now), 1)
+            response = error(429, 'rateLimited', 'Rate limit exceeded. Please retry after some time.')
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        recent_requests.append(now)
+
+    if settings.failure_rate and rng.random() < settings.failure_rate:
+        stats['failed'] += 1
+        return error(500, 'serverError', 'Injected failure.')
+
+    response = await call_next(request)
+    route = request.scope.get('route')
+    stats[f"{request.method} {route.path}" if route else 'unmatched'] += 1
+    return response
+
+
+def timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds').replace('+00:00', 'Z')
+
+
+def touch(uid):
+    """
+    Bumps the 'updatedAt' of a stored collection after a change.
+    """
+    collections[uid]['info']['updatedAt'] = timestamp()
+
+
+def store_collection(collection, uid=None):
+    """
+    Stores a collection under a new or existing UID, giving every folder and request an ID.
+
+    Returns:
+        dict: The collection summary returned by the Postman API.
+    """
+    collection_id = uid.split('-', 1)[1] if uid else str(uuid.uuid4())
+    created_at = collections[uid]['info'].get('createdAt') if uid in collections else None
+    uid = uid or f"{OWNER_ID}-{collection_id}"
+    info = dict(collection.get('info', {}))
+    info['_postman_id'] = collection_id
+    info.setdefault('schema', 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json')
+    info['updatedAt'] = timestamp()
+    info['createdAt'] = created_at or info['updatedAt']
+    stored = dict(collection, info=info)
+    stack = [stored.get('item', [])]
+    while stack:
+        for item in stack.pop():
+            item.setdefault('id', str(uuid.uuid4()))
+            if 'item' in item:
+                stack.append(item['item'])
+    collections[uid] = stored
+    return {'id': collection_id, 'name': info.get('name'), 'uid': uid}
+
+
+def find_item(items, item_id):
+    """
+    Returns the list holding the item with the given ID and its index, or (None, None).
+    """
+    stack = [items]
+    while stack:
+        children = stack.pop()
+        for index, item in enumerate(children):
+            if item.get('id') == item_id:
+                return children, index
+            if 'item' in item:
+                stack.append(item['item'])
+    return None, None
+
+
+def request_item(payload, item=None):
+    """
+    Applies a Postman requests API payload to a collection request item.
+    """
+    item = item or {'id': str(uuid.uuid4()), 'response': []}
+    item['name'] = payload.get('name', item.get('name'))
+    headers = [line.split(':', 1) for line in payload.get('headers', '').splitlines() if ':' in line]
+    request = {
+        'method': payload.get('method', 'GET'),
+        'header': [{'key': key.strip(), 'value': value.strip()} for key, value in headers],
+        'url': {'raw': payload.get('url', '')},
+    }
+    if payload.get('dataMode') == 'raw':
+        request['body'] = {'mode': 'raw', 'raw': payload.get('rawModeData', '')}
+    elif payload.get('dataMode') in ('urlencoded', 'params'):
+        mode = 'urlencoded' if payload['dataMode'] == 'urlencoded' else 'formdata'
+        request['body'] = {'mode': mode, mode: payload.get('data', [])}
+    item['request'] = request
+    return item
+
+
+@app.post("/import/openapi")
+async def import_openapi(request: Request):
+    body = await request.json()
+    spec = body.get('input')
+    if isinstance(spec, str):
+        try:
+            spec = json.loads(spec)
+        except ValueError:
+            spec = None
+    converted = convert_spec(spec) if isinstance(spec, dict) else None
+    if not converted:
+        return error(400, 'paramMissingError', 'Could not import the OpenAPI definition.')
+    return {'collections': [store_collection(converted['collection'])]}
+
+
+@app.get("/collections")
+async def list_collections():
+    return {'collections': [
+        {'id': collection['info']['_postman_id'], 'name': collection['info'].get('name'), 'uid': uid,
+         'createdAt': collection['info']['createdAt'], 'updatedAt': collection['info']['updatedAt']}
+        for uid, collection in collections.items()
+    ]}
+
+
+@app.post("/collections")
+async def create_collection(request: Request):
+    body = await request.json()
+    collection = body.get('collection')
+    if not isinstance(collection, dict) or 'info' not in collection:
+        return error(400, 'malformedRequestError', 'Found 1 errors with the supplied collection.')
+    return {'collection': store_collection(collection)}
+
+
+@app.get("/collections/{uid}")
+async def get_collection(uid: str):
+    if uid not in collections:
+        return not_found(uid)
+    return {'collection': collections[uid]}
+
+
+@app.put("/collections/{uid}")
+async def update_collection(uid: str, request: Request):
+    if uid not in collections:
+        return not_found(uid)
+    body = await request.json()
+    collection = body.get('collection')
+    if not isinstance(collection, dict):
+        return error(400, 'malformedRequestError', 'Found 1 errors with the supplied collection.')
+    return {'collection': store_collection(collection, uid)}
+
+
+@app.delete("/collections/{uid}")
+async def delete_collection(uid: str):
+    if uid not in collections:
+        return not_found(uid)
+    collection = collections.pop(uid)
+    return {'collection': {'id': collection['info']['_postman_id'], 'uid': uid}}
+
+
+@app.post("/collections/{uid}/requests")
+async def create_request(uid: str, request: Request, folder: str = None):
+    if uid not in collections:
+        return not_found(uid)
+    items = collections[uid].setdefault('item', [])
+    if folder:
+        parent, index = find_item(items, folder)
+        if parent is None:
+            return error(404, 'instanceNotFoundError', f"Folder not found: {folder}")
+        items = parent[index].setdefault('item', [])
+    item = request_item(await request.json())
+    items.append(item)
+    touch(uid)
+    return {'data': {'id': item['id'], 'name': item['name']}}
+
+
+@app.put("/collections/{uid}/requests/{request_id}")
+async def update_request(uid: str, request_id: str, request: Request):
+    if uid not in collections:
+        return not_found(uid)
+    parent, index = find_item(collections[uid].get('item', []), request_id)
+    if parent is None:
+        return error(404, 'instanceNotFoundError', f"Request not found: {request_id}")
+    item = request_item(await request.json(), parent[index])
+    touch(uid)
+    return {'data': {'id': item['id'], 'name': item['name']}}
+
+
+@app.delete("/collections/{uid}/requests/{request_id}")
+async def delete_request(uid: str, request_id: str):
+    if uid not in collections:
+        return not_found(uid)
+    parent, index = find_item(collections[uid].get('item', []), request_id)
+    if parent is None:
+        return error(404, 'instanceNotFoundError', f"Request not found: {request_id}")
+    parent.pop(index)
+    touch(uid)
+    return {'data': {'id': request_id}}
+
+
+@app.get(f"{CONTROL_PREFIX}/settings")
+async def get_settings():
+    return settings.as_dict()
+
+
+@app.put(f"{CONTROL_PREFIX}/settings")
+async def put_settings(request: Request):
+    try:
+        configure(**await request.json())
+    except ValueError as e:
+        return error(400, 'invalidSetting', str(e))
+    return settings.as_dict()
+
+
+@app.get(f"{CONTROL_PREFIX}/stats")
+async def get_stats():
+    return {'collections': len(collections), 'requests': dict(stats)}
+
+
+@app.post(f"{CONTROL_PREFIX}/reset")
+async def post_reset():
+    reset()
+    return {'reset': True}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Postman API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8100, help="Port to listen on.")
+    parser.add_argument("--latency", type=float, default=settings.latency, help="Seconds added to every response.")
+    parser.add_argument("--latency-jitter", type=float, default=settings.latency_jitter, help="Up to this many extra seconds per response, at random.")
+    parser.add_argument("--rate-limit", type=int, default=settings.rate_limit, help="Requests per rolling minute before answering 429, or 0 for no limit.")
+    parser.add_argument("--failure-rate", type=float, default=settings.failure_rate, help="Share of requests answered with a 500 error.")
+    parser.add_argument("--seed", type=int, default=settings.seed, help="Seed for the latency jitter and failure injection.")
+    args = parser.parse_args()
+
+    configure(latency=args.latency, latency_jitter=args.latency_jitter, rate_limit=args.rate_limit, failure_rate=args.failure_rate, seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port)
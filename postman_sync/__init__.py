@@ -1,9 +1,18 @@
-from .endpoint_transfer import extract_endpoints, update_endpoints
-from .helper_functions import cleanup_collection, get_collection_json, create_collection_json
+import importlib
 
 # Package-level constants
 API_VERSION = '1.0'
 
+# Public helpers and the modules they live in. They are imported on first
+# access, so importing the package does not load requests.
+_LAZY_EXPORTS = {
+    'extract_endpoints': 'endpoint_transfer',
+    'update_endpoints': 'endpoint_transfer',
+    'cleanup_collection': 'helper_functions',
+    'get_collection_json': 'helper_functions',
+    'create_collection_json': 'helper_functions',
+}
+
 __all__ = [
     'extract_endpoints',
     'update_endpoints',
@@ -11,4 +20,17 @@ __all__ = [
     'get_collection_json',
     'create_collection_json',
     'API_VERSION',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,762 @@
+import asyncio
+import copy
+import hashlib
+import logging
+import tempfile
+import time
+import weakref
+from datetime import datetime
+
+import httpx
+
+from postman_sync import breaker, codec, collection_cache, download, metrics, transport
+from postman_sync.helper_functions import api_url, request_payload
+from postman_sync.converter import convert_spec
+from postman_sync.endpoint_transfer import merge_collections, diff_collections, index_folders
+from postman_sync.fingerprints import operation_fingerprints, diff_operations, has_changes
+from postman_sync.main_script import (UPDATE_MODES, hash_json, conditional_headers, update_validators, update_body_hash,
+                                      mark_latest, record_download, record_merge, report_skipped_links)
+
+# Requests waiting for a response at once, across every link on the event loop
+MAX_IN_FLIGHT = 100
+
+# Links sync_entries checks at once
+MAX_CONCURRENT_LINKS = 1000
+
+# The base exception of failed requests, the counterpart of transport.RequestException
+RequestException = httpx.HTTPError
+
+# Failures that are retried, like requests' ConnectionError in the blocking transport.
+# Both happen before the request is sent, so they are retried for every method
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Locks of the spec conversions in progress, keyed by spec hash and converter, so links
+# converting the same spec at once wait for the first one like CollectionCache.get_or_build
+_build_locks = weakref.WeakValueDictionary()
+
+_http_transport = None
+# The event loop the client and the in-flight semaphore belong to, and both of them
+_pool = None
+
+
+def configure(max_in_flight=None, http_transport=None):
+    """
+    Adjusts the async client settings. The client is recreated on its next use.
+
+    Args:
+        max_in_flight (int, optional): The number of requests waiting for a response at once, and of pooled connections.
+        http_transport (httpx.AsyncBaseTransport, optional): Sends the requests, e.g. an httpx.MockTransport in tests.
+    """
+    global MAX_IN_FLIGHT, _http_transport, _pool
+    if max_in_flight is not None:
+        MAX_IN_FLIGHT = max(max_in_flight, 1)
+    if http_transport is not None:
+        _http_transport = http_transport
+    _pool = None
+
+
+def _loop_pool():
+    # An AsyncClient and a Semaphore are bound to the event loop they are first used on
+    global _pool
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool[0] is not loop:
+        limits = httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT)
+        client = httpx.AsyncClient(limits=limits, transport=_http_transport)
+        _pool = (loop, client, asyncio.Semaphore(MAX_IN_FLIGHT))
+    return _pool
+
+
+def get_client():
+    """
+    Returns the shared AsyncClient of the running event loop, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: The pooled client used for every Postman and spec call.
+    """
+    return _loop_pool()[1]
+
+
+async def aclose():
+    """
+    Closes the shared client. Call it before the event loop stops.
+    """
+    global _pool
+    if _pool is not None and _pool[0] is asyncio.get_running_loop():
+        await _pool[1].aclose()
+    _pool = None
+
+
+def request_timeout():
+    """
+    Returns the connect and read timeouts of the blocking transport, shortened to the time left before the current deadline.
+    """
+    connect, read = transport.bounded_timeout((transport.CONNECT_TIMEOUT, transport.READ_TIMEOUT))
+    return httpx.Timeout(read, connect=connect, pool=None)
+
+
+async def request(method, url, stream=False, metric=metrics.API_CALLS, **kwargs):
+    """
+    Sends a request through the shared client, retrying transient failures like transport.request.
+
+    At most MAX_IN_FLIGHT requests wait for a response at once; the others wait
+    for a slot instead of opening more connections. Retries and the global rate
+    limit wait without blocking the event loop, and the deadline of the current
+    context applies as in the blocking transport.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+        stream (bool): Return before the body is read. The caller must read or close the response.
+        metric (str): The counter incremented for every attempt. Defaults to metrics.API_CALLS.
+        **kwargs: Passed through to httpx.AsyncClient.build_request.
+
+    Returns:
+        httpx.Response: The final response.
+
+    Raises:
+        httpx.HTTPError: If the request still fails after all retries.
+        transport.DeadlineExceeded: If the deadline passes before a response arrives.
+    """
+    _, client, in_flight = _loop_pool()
+    attempt = 0
+    while True:
+        transport.check_deadline()
+        wait = transport.reserve_rate_limit()
+        if wait:
+            await asyncio.sleep(wait)
+        metrics.incr(metric)
+        if attempt:
+            metrics.incr(metrics.RETRIES)
+        try:
+            async with in_flight:
+                sending = client.send(client.build_request(method, url, timeout=request_timeout(), **kwargs), stream=stream)
+                # The socket timeouts bound each read, this bounds the whole exchange
+                response = await asyncio.wait_for(sending, transport.remaining())
+        except asyncio.TimeoutError:
+            raise transport.DeadlineExceeded(f"{method} {url} did not finish before the time budget ran out.")
+        except RequestException as e:
+            # A timeout that the deadline shortened cancels the link rather than failing the request
+            transport.check_deadline()
+            if not isinstance(e, RETRY_EXCEPTIONS) or attempt >= transport.MAX_RETRIES:
+                raise
+            delay = transport.backoff_seconds(attempt)
+            logging.warning(f"{method} {url} failed: {e}. Retrying in {delay:.1f}s.")
+        else:
+            delay = transport.retry_delay(response, attempt, method)
+            if delay is None:
+                _record_transfer(response, stream)
+                return response
+            logging.warning(f"{method} {url} returned {response.status_code}. Retrying in {delay:.1f}s.")
+            await response.aclose()
+        left = transport.remaining()
+        if left is not None and delay >= left:
+            raise transport.DeadlineExceeded(f"{method} {url} cannot be retried before the time budget runs out.")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+class _AsyncChunks:
+    """
+    Streams a download.ImportPayload to httpx from the start on every retry, reading it in a worker thread.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def __aiter__(self):
+        self.payload.seek(0)
+        chunk = await asyncio.to_thread(self.payload.read, download.CHUNK_SIZE)
+        while chunk:
+            yield chunk
+            chunk = await asyncio.to_thread(self.payload.read, download.CHUNK_SIZE)
+
+
+def _record_transfer(response, stream):
+    if metrics.active() is None:
+        return
+    metrics.incr(metrics.BYTES_SENT, int(response.request.headers.get('Content-Length', 0)))
+    if not stream:
+        metrics.incr(metrics.BYTES_RECEIVED, len(response.content))
+
+
+async def read_body(response):
+    """
+    Reads a streamed response body in chunks, hashing it on the way, like download.read_body.
+
+    Returns:
+        download.SpecBody: The body.
+
+    Raises:
+        download.SpecTooLarge: If the body exceeds the size limit.
+        transport.DeadlineExceeded: If the deadline passes during the download.
+    """
+    max_size = download.MAX_SIZE
+    file = tempfile.SpooledTemporaryFile(max_size=download.MAX_IN_MEMORY)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in response.aiter_bytes(download.CHUNK_SIZE):
+            transport.check_deadline()
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise download.SpecTooLarge(f"{response.url} is larger than the {max_size} byte limit.")
+            digest.update(chunk)
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+    finally:
+        await response.aclose()
+    metrics.incr(metrics.BYTES_RECEIVED, size)
+    return download.SpecBody(file, size, digest.hexdigest())
+
+
+async def download_spec(url, headers=None):
+    """
+    Downloads a spec without holding more than the memory ceiling of raw bytes, like download.download_spec.
+
+    Responses other than 200 are closed before they are returned, so their
+    connections go back to the pool. Their error excerpt is read first.
+
+    Returns:
+        tuple: The response and its SpecBody, or None as the body if the status is not 200.
+    """
+    response = await request('GET', url, stream=True, headers=headers, metric=metrics.SPEC_DOWNLOADS)
+    if response.status_code == 200:
+        return response, await read_body(response)
+    if response.status_code == 304:
+        await response.aread()
+        await response.aclose()
+    else:
+        await error_excerpt(response)
+    return response, None
+
+
+async def error_excerpt(response):
+    """
+    Returns the start of an error response body for logging, without reading the rest of a streamed body.
+
+    The excerpt is read once and kept on the response, which is closed.
+    """
+    if '_error_excerpt' in vars(response):
+        return response._error_excerpt
+    excerpt = b''
+    try:
+        async for excerpt in response.aiter_bytes(download.ERROR_EXCERPT_SIZE):
+            break
+    except RequestException:
+        excerpt = b''
+    finally:
+        await response.aclose()
+    response._error_excerpt = excerpt.decode('utf-8', errors='replace')
+    return response._error_excerpt
+
+
+async def cleanup_collection(collection_id, api_key):
+    """
+    Deletes a Postman collection. The async counterpart of helper_functions.cleanup_collection.
+
+    Returns:
+        bool: True if the collection was successfully deleted, False otherwise.
+    """
+    url = api_url(f"/collections/{collection_id}")
+    try:
+        logging.debug(f"Attempting to delete collection with ID: {collection_id}")
+        response = await request('DELETE', url, headers={'X-Api-Key': api_key})
+        if response.status_code == 200:
+            logging.info(f"Successfully deleted collection with ID: {collection_id}")
+            return True
+        logging.error(f"Failed to delete collection. Status code: {response.status_code}, Response: {response.text}")
+        return False
+    except RequestException as e:
+        logging.error(f"Request to delete collection failed: {e}")
+        return False
+
+
+async def get_collection_json(collection_id, api_key):
+    """
+    Fetches a Postman collection. The async counterpart of helper_functions.get_collection_json.
+
+    Returns:
+        dict: The JSON data of the Postman collection if successful, None otherwise.
+    """
+    url = api_url(f"/collections/{collection_id}")
+    try:
+        logging.debug(f"Attempting to fetch collection with ID: {collection_id}")
+        response = await request('GET', url, headers={'X-Api-Key': api_key})
+        if response.status_code == 200:
+            logging.info(f"Successfully fetched collection with ID: {collection_id}")
+            return codec.response_json(response)
+        logging.error(f"Failed to fetch collection. Status code: {response.status_code}, Response: {response.text}")
+        return None
+    except RequestException as e:
+        logging.error(f"Request to fetch collection failed: {e}")
+        return None
+
+
+async def list_collections(api_key):
+    """
+    Lists the collections the API key can access. The async counterpart of helper_functions.list_collections.
+
+    Returns:
+        list: The collection summaries, each with its 'uid' and 'updatedAt', if successful, None otherwise.
+    """
+    try:
+        logging.debug("Attempting to list collections.")
+        response = await request('GET', api_url("/collections"), headers={'X-Api-Key': api_key})
+        if response.status_code == 200:
+            return codec.response_json(response).get('collections', [])
+        logging.error(f"Failed to list collections. Status code: {response.status_code}, Response: {response.text}")
+        return None
+    except RequestException as e:
+        logging.error(f"Request to list collections failed: {e}")
+        return None
+
+
+async def fetch_swagger_json(swagger_url):
+    """
+    Fetches a Swagger JSON. The async counterpart of helper_functions.fetch_swagger_json.
+
+    Returns:
+        dict: The Swagger JSON if successful, None otherwise.
+    """
+    try:
+        logging.debug(f"Attempting to download Swagger JSON from: {swagger_url}")
+        response, body = await download_spec(swagger_url)
+        if response.status_code == 200:
+            with body:
+                swagger_json = body.parse()
+            logging.info("Successfully downloaded Swagger JSON.")
+            return swagger_json
+        logging.error(f"Failed to download Swagger JSON. Status code: {response.status_code}, Response: {await error_excerpt(response)}")
+        return None
+    except download.SpecTooLarge as e:
+        logging.error(f"Skipping the Swagger JSON: {e}")
+        return None
+    except RequestException as e:
+        logging.error(f"Request to download Swagger JSON failed: {e}")
+        return None
+
+
+async def create_collection_json(swagger_url, api_key, swagger_json=None, spec_body=None):
+    """
+    Imports a Swagger JSON into a new Postman collection. The async counterpart of helper_functions.create_collection_json.
+
+    With spec_body, the import is streamed from the downloaded body instead of encoding the parsed spec again.
+
+    Returns:
+        str: The ID of the created Postman collection if successful, None otherwise.
+    """
+    if swagger_json is None:
+        swagger_json = await fetch_swagger_json(swagger_url)
+    elif isinstance(swagger_json, (bytes, bytearray, str)):
+        try:
+            swagger_json = codec.loads(swagger_json)
+        except ValueError as e:
+            logging.error(f"Swagger JSON could not be parsed: {e}")
+            return None
+    if not swagger_json:
+        return None
+    if 'openapi' not in swagger_json and 'swagger' not in swagger_json:
+        logging.error("Swagger JSON does not contain the necessary 'openapi' or 'swagger' version field.")
+        return None
+
+    headers = {'X-Api-Key': api_key, 'Content-Type': 'application/json'}
+    payload = spec_body.import_payload() if spec_body is not None else None
+    if payload is None:
+        payload = codec.dumps({'type': 'json', 'input': swagger_json})
+    else:
+        headers['Content-Length'] = str(len(payload))
+        payload = _AsyncChunks(payload)
+    try:
+        logging.debug("Attempting to create Postman collection with downloaded Swagger JSON.")
+        response = await request('POST', api_url("/import/openapi"), headers=headers, content=payload)
+        if response.status_code == 200:
+            collections = codec.response_json(response).get('collections')
+            if collections:
+                collection_id = collections[0].get('uid')
+                logging.info(f"Successfully created Postman collection with ID: {collection_id}")
+                return collection_id
+            logging.error("No collections found in the response.")
+            return None
+        logging.error(f"Failed to create Postman collection. Status code: {response.status_code}, Response: {response.text}")
+        return None
+    except RequestException as e:
+        logging.error(f"Request to create Postman collection failed: {e}")
+        return None
+
+
+async def create_collection(json_data, api_key):
+    """
+    Publishes collection JSON as a new "<name> Latest <datetime>" collection. The async counterpart of main_script.create_collection.
+
+    Returns:
+        str: The ID of the created Postman collection if successful, None otherwise.
+    """
+    mark_latest(json_data)
+    data = codec.dumps({'collection': json_data['collection']})
+    try:
+        logging.debug("Attempting to create Postman collection.")
+        response = await request('POST', api_url("/collections"), headers={'X-Api-Key': api_key, 'Content-Type': 'application/json'}, content=data)
+        if response.status_code == 200:
+            collection = codec.response_json(response).get('collection')
+            if collection:
+                collection_id = collection.get('uid')
+                logging.info(f"Successfully created Postman collection with ID: {collection_id}")
+                return collection_id
+            logging.error("No collections found in the response.")
+            return None
+        logging.error(f"Failed to create Postman collection. Status code: {response.status_code}, Response: {response.text}")
+        return None
+    except RequestException as e:
+        logging.error(f"Request to create Postman collection failed: {e}")
+        return None
+
+
+async def update_collection(collection_id, collection_json, api_key):
+    """
+    Replaces the contents of a Postman collection. The async counterpart of helper_functions.update_collection.
+    """
+    data = codec.dumps({'collection': collection_json['collection']})
+    return await _send_item_change('PUT', api_url(f"/collections/{collection_id}"), api_key, f"update collection {collection_id}", content=data)
+
+
+async def create_request(collection_id, item, api_key, folder_id=None):
+    """
+    Adds a request item to a Postman collection. The async counterpart of helper_functions.create_request.
+    """
+    params = {'folder': folder_id} if folder_id else None
+    return await _send_item_change('POST', api_url(f"/collections/{collection_id}/requests"), api_key,
+                                   f"create request {item.get('name')}", params=params, content=codec.dumps(request_payload(item)))
+
+
+async def update_request(collection_id, request_id, item, api_key):
+    """
+    Updates a request of a Postman collection, leaving its events untouched. The async counterpart of helper_functions.update_request.
+    """
+    return await _send_item_change('PUT', api_url(f"/collections/{collection_id}/requests/{request_id}"), api_key,
+                                   f"update request {request_id}", content=codec.dumps(request_payload(item)))
+
+
+async def delete_request(collection_id, request_id, api_key):
+    """
+    Deletes a request from a Postman collection. The async counterpart of helper_functions.delete_request.
+    """
+    return await _send_item_change('DELETE', api_url(f"/collections/{collection_id}/requests/{request_id}"), api_key, f"delete request {request_id}")
+
+
+async def _send_item_change(method, url, api_key, action, **kwargs):
+    try:
+        logging.debug(f"Attempting to {action}.")
+        response = await request(method, url, headers={'X-Api-Key': api_key, 'Content-Type': 'application/json'}, **kwargs)
+        if response.status_code == 200:
+            logging.info(f"Successfully completed: {action}.")
+            return True
+        logging.error(f"Failed to {action}. Status code: {response.status_code}, Response: {response.text}")
+        return False
+    except RequestException as e:
+        logging.error(f"Request to {action} failed: {e}")
+        return False
+
+
+async def build_collection_json(link, spec, api_key, converter='postman', spec_hash=None, spec_body=None):
+    """
+    Converts a downloaded spec into Postman collection JSON, through the collection cache when it is enabled.
+
+    The local conversion and the cache's disk I/O run in a worker thread, so a
+    large spec does not stall the other links on the event loop.
+
+    Returns:
+        dict: The Postman collection JSON if successful, None otherwise.
+    """
+    cache = collection_cache.active()
+    if cache is None:
+        return await convert_collection(link, spec, api_key, converter, spec_body)
+
+    spec_hash = spec_hash or await asyncio.to_thread(hash_json, spec)
+    lock = _build_locks.setdefault((spec_hash, converter), asyncio.Lock())
+    async with lock:
+        collection = await asyncio.to_thread(cache.get, spec_hash, converter)
+        if collection is not None:
+            metrics.incr(metrics.CONVERT_CACHE_HITS)
+            logging.info("Reusing the cached conversion of an identical spec.")
+            return collection
+        metrics.incr(metrics.CONVERT_CACHE_MISSES)
+        collection = await convert_collection(link, spec, api_key, converter, spec_body)
+        if collection is not None:
+            await asyncio.to_thread(cache.put, spec_hash, converter, collection)
+        return collection
+
+
+async def convert_collection(link, spec, api_key, converter='postman', spec_body=None):
+    """
+    Converts a spec into Postman collection JSON, locally or through a temporary collection of the import API.
+
+    Returns:
+        dict: The Postman collection JSON if successful, None otherwise.
+    """
+    if converter == 'local':
+        return await asyncio.to_thread(convert_spec, spec)
+
+    new_collection_id = await create_collection_json(link, api_key, spec, spec_body)
+    if not new_collection_id:
+        logging.error("Failed to create a new collection from the link.")
+        return None
+    try:
+        collection = await get_collection_json(new_collection_id, api_key)
+        if not collection:
+            logging.error("Failed to fetch the new collection JSON.")
+        return collection
+    finally:
+        # Also deleted when the link's time budget ran out during the fetch
+        with transport.grace_period():
+            await cleanup_collection(new_collection_id, api_key)
+
+
+async def sync_collection(link, spec, old_collection_uid, api_key, converter='postman', update_mode='new', spec_hash=None, spec_body=None):
+    """
+    Builds a collection for a spec, carries over the tests of the old collection and publishes the result.
+
+    The async counterpart of main_script.sync_collection. The sync journal,
+    collection snapshots and artifacts are not used.
+
+    Returns:
+        str: The ID of the published collection if successful, None otherwise.
+    """
+    with metrics.stage('convert'):
+        new_collection_json = await build_collection_json(link, spec, api_key, converter, spec_hash, spec_body)
+    if not new_collection_json:
+        return None
+
+    with metrics.stage('fetch_old'):
+        old_collection_json = await get_collection_json(old_collection_uid, api_key)
+    if not old_collection_json:
+        logging.error("Failed to fetch the old collection JSON.")
+        return None
+
+    with metrics.stage('merge'):
+        updated_collection_json, stats = await asyncio.to_thread(merge_collections, old_collection_json, new_collection_json)
+    record_merge(stats)
+
+    with metrics.stage('publish'):
+        return await publish_collection(old_collection_uid, old_collection_json, updated_collection_json, api_key, update_mode)
+
+
+async def publish_collection(old_collection_uid, old_collection_json, updated_collection_json, api_key, update_mode='new'):
+    """
+    Publishes a merged collection according to the update mode. The async counterpart of main_script.publish_collection.
+
+    Returns:
+        str: The ID of the published collection if successful, None otherwise.
+    """
+    if update_mode == 'items':
+        if await patch_collection(old_collection_uid, old_collection_json, updated_collection_json, api_key):
+            return old_collection_uid
+        logging.error("Failed to patch the collection.")
+        return None
+    if update_mode == 'replace':
+        updated_collection_json['collection']['info']['name'] = old_collection_json['collection']['info']['name']
+        if await update_collection(old_collection_uid, updated_collection_json, api_key):
+            return old_collection_uid
+        logging.error("Failed to update the collection.")
+        return None
+
+    latest_collection_id = await create_collection(updated_collection_json, api_key)
+    if not latest_collection_id:
+        logging.error("Failed to create the latest collection.")
+    return latest_collection_id
+
+
+async def patch_collection(collection_id, old_collection_json, updated_collection_json, api_key):
+    """
+    Applies only the changed requests of the updated collection. The async counterpart of main_script.patch_collection.
+
+    The request changes are sent concurrently, within the in-flight limit.
+
+    Returns:
+        bool: True if every change was applied, False otherwise.
+    """
+    old_items = old_collection_json['collection']['item']
+    changes = await asyncio.to_thread(diff_collections, old_items, updated_collection_json['collection']['item'])
+    logging.info(f"Patching collection {collection_id}: {len(changes['added'])} added, {len(changes['modified'])} modified, {len(changes['removed'])} removed requests.")
+
+    changed_old_items = changes['removed'] + [old_item for old_item, _ in changes['modified']]
+    if any('id' not in old_item for old_item in changed_old_items):
+        logging.warning("Published requests have no IDs. Replacing the whole collection instead.")
+        updated_collection_json['collection']['info']['name'] = old_collection_json['collection']['info']['name']
+        return await update_collection(collection_id, updated_collection_json, api_key)
+
+    folders = index_folders(old_items)
+    calls = [delete_request(collection_id, old_item['id'], api_key) for old_item in changes['removed']]
+    calls += [update_request(collection_id, old_item['id'], new_item, api_key) for old_item, new_item in changes['modified']]
+    for new_item, path in changes['added']:
+        while path and path not in folders:
+            path = path[:-1]
+        folder_id = folders[path].get('id') if path else None
+        calls.append(create_request(collection_id, new_item, api_key, folder_id))
+    return all(await asyncio.gather(*calls))
+
+
+async def sync_link(entry, api_key, converter='postman', update_mode='new'):
+    """
+    Checks a single links file entry for changes and updates its collection. The async counterpart of main_script.sync_link.
+
+    The entry is updated in place.
+
+    Args:
+        entry (dict): The links file entry to process.
+        api_key (str): The Postman API key.
+        converter (str): How the spec is converted to a collection, either 'postman' or 'local'.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+
+    Returns:
+        bool: True if the entry was updated, False otherwise.
+    """
+    if update_mode not in UPDATE_MODES:
+        raise ValueError(f"Unknown update mode: {update_mode}")
+    with metrics.link_context(entry['link']):
+        return await _sync_link(entry, api_key, converter, update_mode)
+
+
+async def _sync_link(entry, api_key, converter, update_mode):
+    link = entry['link']
+    logging.debug(f"Processing link: {link} with old collection UID: {entry['Collection UID']}")
+
+    try:
+        with metrics.stage('download'):
+            try:
+                response, body = await download_spec(link, conditional_headers(entry))
+            except (RequestException, transport.DeadlineExceeded):
+                await asyncio.to_thread(record_download, entry, None)
+                raise
+        # Recording a failure writes to the state, which must not block the event loop
+        await asyncio.to_thread(record_download, entry, response.status_code)
+        if response.status_code == 304:
+            logging.info("Spec not modified. Moving on to the next object.")
+            return False
+        if response.status_code != 200:
+            logging.error(f"Failed to download JSON from link. Status code: {response.status_code}, Response: {await error_excerpt(response)}")
+            return False
+
+        body_hash = body.sha256
+        # The body stays open for the import, which sends it instead of encoding the parsed spec again
+        with body:
+            if body_hash == entry.get('body_hash'):
+                logging.info("Spec body unchanged. Moving on to the next object.")
+                return update_validators(entry, response)
+            # Parsing, hashing and fingerprinting a large spec takes a while, so it runs off the event loop
+            with metrics.stage('parse'):
+                new_json = await asyncio.to_thread(body.parse)
+            with metrics.stage('hash'):
+                new_hash = await asyncio.to_thread(hash_json, new_json)
+            if new_hash == entry['hash']:
+                logging.info("No changes found. Moving on to the next object.")
+                validators_changed = update_validators(entry, response)
+                return update_body_hash(entry, body_hash) or validators_changed
+            logging.info("Changes detected. Comparing operations.")
+            with metrics.stage('fingerprint'):
+                new_operations = await asyncio.to_thread(operation_fingerprints, new_json)
+            if 'operations' in entry:
+                changes = diff_operations(entry['operations'], new_operations)
+                if not has_changes(changes):
+                    logging.info("No changes to operations. Skipping the collection update.")
+                    entry['hash'] = new_hash
+                    update_body_hash(entry, body_hash)
+                    update_validators(entry, response)
+                    return True
+                logging.info(f"Operations changed: {len(changes['added'])} added, {len(changes['removed'])} removed, {len(changes['modified'])} modified.")
+            latest_collection_id = await sync_collection(link, new_json, entry['Collection UID'], api_key, converter, update_mode, spec_hash=new_hash, spec_body=body)
+            if latest_collection_id:
+                entry['Collection UID'] = latest_collection_id
+                entry['hash'] = new_hash
+                entry['operations'] = new_operations
+                entry['Last Date Updated'] = datetime.now().isoformat()
+                update_body_hash(entry, body_hash)
+                update_validators(entry, response)
+                logging.info("Collection updated successfully.")
+                return True
+    except download.SpecTooLarge as e:
+        logging.error(f"Skipping the spec: {e}")
+    except RequestException as e:
+        logging.error(f"Request to download JSON failed: {e}")
+    return False
+
+
+async def sync_entries(entries, api_key, state, concurrency=MAX_CONCURRENT_LINKS, link_budget=None, deadline_at=None, **sync_options):
+    """
+    Syncs a batch of links file entries concurrently on the running event loop, storing every updated entry.
+
+    The async counterpart of main_script.sync_entries. Up to concurrency links
+    are checked at once, while the requests they send stay within MAX_IN_FLIGHT.
+    Updated entries and failure records are written to the state from a worker
+    thread, so a slow state backend does not block the event loop.
+
+    Args:
+        entries (list): The links file entries to sync.
+        api_key (str): The Postman API key.
+        state (StateBackend): Where updated entries are stored.
+        concurrency (int): The number of links synced at once.
+        link_budget (float, optional): Seconds each link may take across all of its stages.
+        deadline_at (float, optional): The time.monotonic() time after which no link is started and running links are cancelled.
+        **sync_options: Passed through to sync_link for every link.
+
+    Returns:
+        dict: The links cancelled for running out of time ('timed_out'), the links never started ('skipped')
+        and the links skipped after earlier failed downloads ('backed_off').
+    """
+    report = {'timed_out': [], 'skipped': [], 'backed_off': []}
+    circuit_breaker = breaker.active()
+    slots = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(entry):
+        link = entry['link']
+        async with slots:
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                report['skipped'].append(link)
+                return False
+            if circuit_breaker is not None and not circuit_breaker.allow(entry):
+                logging.debug(f"Skipping {link} while it or its host is backing off.")
+                report['backed_off'].append(link)
+                return False
+            try:
+                with transport.deadline(link_budget, at=deadline_at):
+                    updated = await sync_link(entry, api_key, **sync_options)
+            except transport.DeadlineExceeded as e:
+                logging.warning(f"Sync of {link} cancelled: {e}")
+                report['timed_out'].append(link)
+                return False
+            finally:
+                if circuit_breaker is not None:
+                    circuit_breaker.release(entry)
+            if updated:
+                # The state is written on another thread, so it gets a copy the event loop cannot change
+                await asyncio.to_thread(state.update, copy.deepcopy(entry))
+            return updated
+
+    logging.info(f"Syncing {len(entries)} links, {concurrency} at a time.")
+    results = await asyncio.gather(*(run(entry) for entry in entries), return_exceptions=True)
+    for entry, result in zip(entries, results):
+        if isinstance(result, Exception):
+            logging.error(f"Sync of {entry['link']} failed: {result}")
+    report_skipped_links(report)
+    return report
+
+
+async def main_code(state, api_key, concurrency=MAX_CONCURRENT_LINKS, link_budget=None, run_deadline=None, **sync_options):
+    """
+    Syncs every stored link on the running event loop. The async counterpart of main_script.main_code.
+
+    Args:
+        state (StateBackend): Where the links are stored.
+        api_key (str): The Postman API key.
+        concurrency (int): The number of links synced at once.
+        link_budget (float, optional): Seconds each link may take across all of its stages.
+        run_deadline (float, optional): Seconds the whole run may take. Links not started by then are skipped.
+        **sync_options: Passed through to sync_link for every link.
+
+    Returns:
+        dict: The report of sync_entries.
+    """
+    entries = await asyncio.to_thread(state.entries)
+    deadline_at = time.monotonic() + run_deadline if run_deadline is not None else None
+    return await sync_entries(entries, api_key, state, concurrency, link_budget, deadline_at, **sync_options)
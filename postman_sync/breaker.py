@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from postman_sync import metrics
+
+# Consecutive failed downloads from a host before its circuit opens
+FAILURE_THRESHOLD = 3
+
+# Seconds a circuit first stays open. Every failed probe doubles it, up to the maximum
+OPEN_WINDOW = 5 * 60
+MAX_OPEN_WINDOW = 24 * 60 * 60
+
+# Seconds a single failing link is first skipped for, doubled with every further failure
+LINK_BACKOFF = 60
+
+_active = None
+
+
+class CircuitBreaker:
+    """
+    Tracks failed spec downloads per link and per host, and decides which links are skipped.
+
+    A link whose download failed is skipped for an exponentially growing
+    backoff. When downloads from one host fail threshold times in a row, even
+    across links, the host's circuit opens and all of its links are skipped for
+    open_window seconds. After that the circuit is half-open: a single link is
+    let through as a probe. Success closes the circuit. Failure opens it again
+    for twice as long.
+
+    The failure counts of links are stored in their entries and those of hosts
+    in the host records of the state, so the backoff carries over between runs.
+
+    Args:
+        state (StateBackend): Where the link entries and host records are stored.
+        threshold (int): The consecutive failures of a host that open its circuit.
+        open_window (float): The seconds a circuit first stays open.
+        max_open_window (float): The longest a circuit or a link backoff lasts, in seconds.
+        link_backoff (float): The seconds a link is first skipped after a failure.
+    """
+
+    def __init__(self, state, threshold=FAILURE_THRESHOLD, open_window=OPEN_WINDOW, max_open_window=MAX_OPEN_WINDOW, link_backoff=LINK_BACKOFF):
+        self.state = state
+        self.threshold = max(threshold, 1)
+        self.open_window = open_window
+        self.max_open_window = max_open_window
+        self.link_backoff = link_backoff
+        self._lock = threading.Lock()
+        self._hosts = state.hosts()
+        # Hosts mapped to the link that is probing them
+        self._probing = {}
+
+    def allow(self, entry, now=None):
+        """
+        Returns whether a link may be synced now, claiming the probe of a half-open circuit.
+        """
+        now = time.time() if now is None else now
+        if entry.get('retry_at', 0) > now:
+            return False
+        host = host_of(entry['link'])
+        with self._lock:
+            record = self._hosts.get(host)
+            if record is None or record['open_until'] is None:
+                return True
+            if now < record['open_until'] or host in self._probing:
+                return False
+            logging.info(f"Circuit of {host} is half-open. Probing it with {entry['link']}.")
+            self._probing[host] = entry['link']
+            return True
+
+    def release(self, entry):
+        """
+        Frees the probe of a half-open circuit if the link ended without recording a download.
+        """
+        host = host_of(entry['link'])
+        with self._lock:
+            if self._probing.get(host) == entry['link']:
+                del self._probing[host]
+
+    def record(self, entry, status_code, now=None):
+        """
+        Records the outcome of a spec download.
+
+        Args:
+            entry (dict): The links file entry whose spec was downloaded.
+            status_code (int): The response status code, or None if no response arrived.
+            now (float, optional): The current time, as a timestamp.
+        """
+        now = time.time() if now is None else now
+        link_ok = status_code in (200, 304)
+        # Client errors are the link's fault, the host itself answered
+        host_ok = status_code is not None and status_code < 500
+        self._record_host(entry['link'], host_ok, now)
+
+        if link_ok:
+            if 'failures' in entry:
+                del entry['failures'], entry['retry_at']
+                self.state.update(entry)
+        else:
+            entry['failures'] = entry.get('failures', 0) + 1
+            entry['retry_at'] = now + min(self.link_backoff * 2 ** (entry['failures'] - 1), self.max_open_window)
+            self.state.update(entry)
+
+    def _record_host(self, link, ok, now):
+        host = host_of(link)
+        with self._lock:
+            probe = self._probing.get(host) == link
+            if probe:
+                del self._probing[host]
+            record = self._hosts.get(host)
+            if ok:
+                if record is None:
+                    return
+                if record['open_until'] is not None:
+                    logging.info(f"Circuit of {host} closed.")
+                del self._hosts[host]
+                self.state.update_host(host, None)
+                return
+
+            record = record or {'failures': 0, 'opens': 0, 'open_until': None}
+            record['failures'] += 1
+            closed = record['open_until'] is None
+            # A link that started before the circuit opened does not extend it
+            if probe or closed and record['failures'] >= self.threshold:
+                window = min(self.open_window * 2 ** record['opens'], self.max_open_window)
+                record['opens'] += 1
+                record['open_until'] = now + window
+                metrics.incr(metrics.CIRCUITS_OPENED)
+                logging.warning(f"Circuit of {host} opened after {record['failures']} failed downloads. Skipping its links for {window:.0f}s.")
+            self._hosts[host] = record
+            self.state.update_host(host, record)
+
+
+def host_of(link):
+    return urlparse(link).netloc
+
+
+def enable(state, threshold=FAILURE_THRESHOLD):
+    """
+    Turns on failure backoff and per-host circuits for the following syncs.
+
+    Args:
+        state (StateBackend): Where the link entries and host records are stored.
+        threshold (int): The consecutive failures of a host that open its circuit.
+
+    Returns:
+        CircuitBreaker: The active breaker.
+    """
+    global _active
+    _active = CircuitBreaker(state, threshold)
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    """
+    Returns the active breaker, or None if failure backoff is off.
+    """
+    return _active
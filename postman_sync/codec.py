@@ -0,0 +1,108 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The JSON library used for parsing and writing, chosen at import time
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(data):
+    """
+    Parses a JSON document with the fastest available backend.
+
+    Documents orjson rejects but the standard library accepts, such as NaN
+    literals or integers beyond 64 bits, are parsed with the standard library.
+
+    Args:
+        data (bytes | memoryview | str): The JSON document.
+
+    Returns:
+        The parsed value.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def dumps(value, pretty=False):
+    """
+    Serializes a value to JSON with the fastest available backend.
+
+    The output is only meant to be parsed again. It is not canonical, so it must
+    not be hashed; use canonical_dumps for that.
+
+    Args:
+        value: The value to serialize.
+        pretty (bool): Whether to indent the output for people to read.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass
+    return json.dumps(value, indent=4 if pretty else None).encode()
+
+
+def canonical_dumps(value):
+    """
+    Serializes a value in the canonical form used for hashes and fingerprints.
+
+    This is always json.dumps(value, sort_keys=True) from the standard library,
+    whichever backend is installed, so stored hashes keep matching.
+
+    Args:
+        value: The value to serialize.
+
+    Returns:
+        str: The canonical JSON text.
+    """
+    return json.dumps(value, sort_keys=True)
+
+
+def read_file(path):
+    """
+    Reads and parses a JSON file.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        The parsed value.
+    """
+    with open(path, 'rb') as file:
+        return loads(file.read())
+
+
+def write_file(path, value, pretty=True):
+    """
+    Serializes a value and writes it to a JSON file.
+
+    Args:
+        path (str): The file to write.
+        value: The value to serialize.
+        pretty (bool): Whether to indent the output for people to read.
+    """
+    with open(path, 'wb') as file:
+        file.write(dumps(value, pretty))
+
+
+def response_json(response):
+    """
+    Parses the body of an HTTP response.
+
+    Args:
+        response (requests.Response): The response to parse.
+
+    Returns:
+        The parsed value.
+    """
+    return loads(response.content)
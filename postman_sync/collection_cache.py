@@ -0,0 +1,175 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from postman_sync import codec, metrics
+
+# Default size limit of the cache directory
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bumped when the cached collection format changes, so old entries are never read
+CACHE_VERSION = 1
+
+# Number of locks that serialize conversions of the same spec across workers
+LOCK_STRIPES = 64
+
+_active = None
+
+
+class CollectionCache:
+    """
+    A content-addressed disk cache of converted collections, keyed by spec hash and converter.
+
+    Entries are single JSON files. The least recently used ones are deleted once
+    the directory grows past max_bytes. Use times are kept in the file
+    modification times, so the order survives restarts.
+
+    Args:
+        directory (str): The cache directory. It is created if missing.
+        max_bytes (int): The size limit of all entries together.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._build_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        os.makedirs(directory, exist_ok=True)
+
+        # Entry paths mapped to their sizes, least recently used first
+        self._entries = OrderedDict()
+        self._total = 0
+        scanned = []
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                scanned.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(scanned):
+            self._entries[path] = size
+            self._total += size
+        self._evict()
+
+    def _path(self, spec_hash, converter):
+        return os.path.join(self.directory, f"v{CACHE_VERSION}-{converter}-{spec_hash}.json")
+
+    def get(self, spec_hash, converter):
+        """
+        Returns a fresh copy of the cached collection, or None on a miss.
+        """
+        path = self._path(spec_hash, converter)
+        with self._lock:
+            if path not in self._entries:
+                return None
+            self._entries.move_to_end(path)
+        try:
+            collection = codec.read_file(path)
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        return collection
+
+    def put(self, spec_hash, converter, collection):
+        """
+        Stores a converted collection, then evicts the least recently used entries over the size limit.
+        """
+        path = self._path(spec_hash, converter)
+        data = codec.dumps(collection)
+        if len(data) > self.max_bytes:
+            return
+        # Written under a temporary name and renamed, so readers never see a partial entry
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write cache entry {path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        with self._lock:
+            self._total += len(data) - self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._evict()
+
+    def get_or_build(self, spec_hash, converter, build):
+        """
+        Returns the cached collection for a spec, or builds, stores and returns it.
+
+        Workers converting the same spec at the same time wait for the first one,
+        so an identical spec behind several links is converted once.
+
+        Args:
+            spec_hash (str): The hash_json of the spec.
+            converter (str): The converter name, since the converters produce different collections.
+            build (callable): Converts the spec. Its result is not cached if it is None.
+
+        Returns:
+            dict: The collection JSON, or None if the build failed.
+        """
+        with self._build_locks[int(spec_hash[:8], 16) % LOCK_STRIPES]:
+            collection = self.get(spec_hash, converter)
+            if collection is not None:
+                metrics.incr(metrics.CONVERT_CACHE_HITS)
+                logging.info("Reusing the cached conversion of an identical spec.")
+                return collection
+            metrics.incr(metrics.CONVERT_CACHE_MISSES)
+            collection = build()
+            if collection is not None:
+                self.put(spec_hash, converter, collection)
+            return collection
+
+    def _evict(self):
+        # Called with self._lock held
+        while self._total > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            logging.debug(f"Evicted cache entry {path}")
+
+    def _remove(self, path):
+        with self._lock:
+            self._total -= self._entries.pop(path, 0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def enable(directory, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Turns on the cache of converted collections for the following syncs.
+
+    Args:
+        directory (str): The cache directory.
+        max_bytes (int): The size limit of the cache directory.
+
+    Returns:
+        CollectionCache: The active cache.
+    """
+    global _active
+    _active = CollectionCache(directory, max_bytes)
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    """
+    Returns the active cache, or None if caching is off.
+    """
+    return _active
@@ -0,0 +1,438 @@
+import copy
+import json
+import logging
+from http import HTTPStatus
+
+# Postman collection settings
+COLLECTION_SCHEMA = 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json'
+BASE_URL_VARIABLE = 'baseUrl'
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+# Placeholders used by the Postman importer for schema types and formats
+FORMAT_PLACEHOLDERS = {
+    'int32': '<integer>',
+    'int64': '<long>',
+    'float': '<float>',
+    'double': '<double>',
+    'date': '<date>',
+    'date-time': '<dateTime>',
+    'uuid': '<uuid>',
+    'email': '<email>',
+    'uri': '<uri>',
+    'byte': '<byte>',
+    'binary': '<binary>',
+}
+MAX_SCHEMA_DEPTH = 10
+
+# Swagger 2 array parameter delimiters
+COLLECTION_FORMAT_DELIMITERS = {'csv': ',', 'ssv': ' ', 'tsv': '\t', 'pipes': '|'}
+
+
+def convert_spec(spec):
+    """
+    Converts an OpenAPI 3 or Swagger 2 document into Postman collection JSON without calling the Postman API.
+
+    The output has the same shape as the collection returned by get_collection_json
+    after a Postman import: folders follow the path segments, and each request
+    carries its url.raw, params, headers and body.
+
+    Args:
+        spec (dict): The parsed OpenAPI or Swagger document.
+
+    Returns:
+        dict: The Postman collection JSON if successful, None otherwise.
+    """
+    if 'openapi' not in spec and 'swagger' not in spec:
+        logging.error("Swagger JSON does not contain the necessary 'openapi' or 'swagger' version field.")
+        return None
+
+    converter = _SpecConverter(spec)
+    info = spec.get('info', {})
+    collection = {
+        'info': {
+            'name': info.get('title', 'Converted from OpenAPI'),
+            'schema': COLLECTION_SCHEMA,
+        },
+        'item': converter.items(),
+        'variable': [{'key': BASE_URL_VARIABLE, 'value': converter.base_url(), 'type': 'string'}],
+    }
+    if info.get('description'):
+        collection['info']['description'] = info['description']
+    return {'collection': collection}
+
+
+class _PathNode:
+    def __init__(self, name):
+        self.name = name
+        self.children = {}
+        self.requests = []
+        self.request_count = 0
+
+
+class _SpecConverter:
+    def __init__(self, spec):
+        self.spec = spec
+        self.swagger2 = 'swagger' in spec
+
+    def base_url(self):
+        """
+        Returns the value of the baseUrl collection variable.
+        """
+        if self.swagger2:
+            host = self.spec.get('host')
+            base_path = self.spec.get('basePath', '')
+            if not host:
+                return base_path or '/'
+            scheme = (self.spec.get('schemes') or ['http'])[0]
+            return f"{scheme}://{host}{base_path}".rstrip('/')
+
+        servers = self.spec.get('servers') or []
+        if not servers:
+            return '/'
+        url = servers[0].get('url', '/')
+        for name, variable in servers[0].get('variables', {}).items():
+            url = url.replace(f"{{{name}}}", str(variable.get('default', '')))
+        return url.rstrip('/') or '/'
+
+    def items(self):
+        """
+        Builds the collection item tree, grouping requests into folders by path segment.
+        """
+        root = _PathNode('')
+        for path, path_item in self.spec.get('paths', {}).items():
+            # Vendor extensions can sit next to the paths, with any value
+            if path.startswith('x-'):
+                continue
+            path_item = self.resolve(path_item)
+            if not isinstance(path_item, dict):
+                continue
+            segments = [segment for segment in path.split('/') if segment]
+            for method in HTTP_METHODS:
+                if method not in path_item:
+                    continue
+                request = self.request_item(path, segments, method, path_item)
+                node = root
+                node.request_count += 1
+                for segment in segments:
+                    node = node.children.setdefault(segment, _PathNode(segment))
+                    node.request_count += 1
+                node.requests.append(request)
+
+        items = [self.node_item(child) for child in root.children.values()]
+        return items + root.requests
+
+    def node_item(self, node):
+        """
+        Converts a path node into a folder, or into its only request when it holds just one.
+        """
+        if node.request_count == 1:
+            if node.requests:
+                return node.requests[0]
+            return self.node_item(next(iter(node.children.values())))
+        items = [self.node_item(child) for child in node.children.values()]
+        return {'name': node.name, 'item': items + node.requests}
+
+    def request_item(self, path, segments, method, path_item):
+        """
+        Converts a single operation into a Postman request item.
+        """
+        operation = path_item[method]
+        parameters = self.parameters(path_item.get('parameters', []), operation.get('parameters', []))
+        url = self.url(segments, parameters)
+        headers = [self.param_entry(param) for param in parameters if param.get('in') == 'header']
+
+        request = {'method': method.upper(), 'header': headers}
+        body = self.body(operation, parameters)
+        if body:
+            content_type, request['body'] = body
+            if content_type and not any(header['key'].lower() == 'content-type' for header in headers):
+                headers.append({'key': 'Content-Type', 'value': content_type})
+        accept = self.response_content_type(operation)
+        if accept and not any(header['key'].lower() == 'accept' for header in headers):
+            headers.append({'key': 'Accept', 'value': accept})
+        request['url'] = url
+        if operation.get('description'):
+            request['description'] = operation['description']
+
+        name = operation.get('summary') or operation.get('operationId') or path
+        return {
+            'name': name,
+            'request': request,
+            'response': self.responses(operation, request),
+        }
+
+    def parameters(self, path_level, operation_level):
+        """
+        Merges path-level and operation-level parameters, the latter taking precedence.
+        """
+        merged = {}
+        for param in list(path_level) + list(operation_level):
+            param = self.resolve(param)
+            merged[(param.get('name'), param.get('in'))] = param
+        return list(merged.values())
+
+    def url(self, segments, parameters):
+        """
+        Builds the Postman URL object for a path and its parameters.
+        """
+        path = [f":{segment[1:-1]}" if segment.startswith('{') and segment.endswith('}') else segment for segment in segments]
+        query = [entry for param in parameters if param.get('in') == 'query' for entry in self.query_entries(param)]
+        variables = [self.param_entry(param) for param in parameters if param.get('in') == 'path']
+
+        raw = '{{' + BASE_URL_VARIABLE + '}}'
+        if path:
+            raw += '/' + '/'.join(path)
+        if query:
+            raw += '?' + '&'.join(f"{param['key']}={param['value']}" for param in query)
+
+        url = {'raw': raw, 'host': ['{{' + BASE_URL_VARIABLE + '}}'], 'path': path}
+        if query:
+            url['query'] = query
+        if variables:
+            url['variable'] = variables
+        return url
+
+    def query_entries(self, param):
+        """
+        Converts a query parameter into Postman query entries, repeating exploded arrays.
+        """
+        schema = self.resolve(param if self.swagger2 else param.get('schema', {}))
+        if schema.get('type') != 'array':
+            return [self.param_entry(param)]
+        item_value = self.placeholder(schema.get('items', {}))
+        if self.swagger2:
+            explode = param.get('collectionFormat') == 'multi'
+            delimiter = COLLECTION_FORMAT_DELIMITERS.get(param.get('collectionFormat'), ',')
+        else:
+            explode = param.get('explode', param.get('style', 'form') == 'form')
+            delimiter = {'spaceDelimited': ' ', 'pipeDelimited': '|'}.get(param.get('style'), ',')
+        entry = self.param_entry(param)
+        if explode:
+            return [dict(entry, value=item_value), dict(entry, value=item_value)]
+        entry['value'] = delimiter.join([item_value, item_value])
+        return [entry]
+
+    def param_entry(self, param):
+        """
+        Converts a parameter into a Postman key/value entry.
+        """
+        schema = param.get('schema', param) if not self.swagger2 else param
+        entry = {'key': param.get('name'), 'value': self.placeholder(schema)}
+        description = param.get('description', '')
+        if param.get('required'):
+            description = f"(Required) {description}"
+        if description:
+            entry['description'] = description.strip()
+        return entry
+
+    def placeholder(self, schema):
+        """
+        Returns the type placeholder the Postman importer uses for a scalar parameter.
+        """
+        return _type_placeholder(self.resolve(schema or {}))
+
+    def body(self, operation, parameters):
+        """
+        Builds the request body and its content type.
+
+        Returns:
+            tuple: The content type and the Postman body object, or None if the operation has no body.
+        """
+        if self.swagger2:
+            body_params = [param for param in parameters if param.get('in') == 'body']
+            form_params = [param for param in parameters if param.get('in') == 'formData']
+            consumes = operation.get('consumes') or self.spec.get('consumes') or ['application/json']
+            if body_params:
+                content_type = consumes[0]
+                return content_type, self.raw_body(content_type, body_params[0].get('schema', {}))
+            if form_params:
+                content_type = consumes[0]
+                return content_type, self.form_body(content_type, {param['name']: param for param in form_params}, set(param['name'] for param in form_params if param.get('required')))
+            return None
+
+        request_body = self.resolve(operation.get('requestBody'))
+        if not request_body or not request_body.get('content'):
+            return None
+        content_type, media = next(iter(request_body['content'].items()))
+        schema = media.get('schema', {})
+        if content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+            schema = self.resolve(schema)
+            return content_type, self.form_body(content_type, schema.get('properties', {}), set(schema.get('required', [])))
+        return content_type, self.raw_body(content_type, schema)
+
+    def raw_body(self, content_type, schema):
+        example = self.example(schema)
+        body = {'mode': 'raw', 'raw': json.dumps(example, indent=2) if 'json' in content_type else _scalar_text(example)}
+        if 'json' in content_type:
+            body['options'] = {'raw': {'headerFamily': 'json', 'language': 'json'}}
+        return body
+
+    def form_body(self, content_type, properties, required):
+        mode = 'urlencoded' if content_type == 'application/x-www-form-urlencoded' else 'formdata'
+        fields = []
+        for name, schema in properties.items():
+            field = {'key': name, 'value': self.placeholder(schema)}
+            if mode == 'formdata':
+                field['type'] = 'file' if self.resolve(schema).get('format') == 'binary' or schema.get('type') == 'file' else 'text'
+            if name in required:
+                field['description'] = '(Required) ' + self.resolve(schema).get('description', '')
+                field['description'] = field['description'].strip()
+            fields.append(field)
+        return {'mode': mode, mode: fields}
+
+    def response_content_type(self, operation):
+        if self.swagger2:
+            produces = operation.get('produces') or self.spec.get('produces') or ['application/json']
+            if any('schema' in response for _, response in self.response_objects(operation)):
+                return produces[0]
+            return None
+        for _, response in self.response_objects(operation):
+            content = response.get('content')
+            if content:
+                return next(iter(content))
+        return None
+
+    def response_objects(self, operation):
+        """
+        Yields the status codes and resolved Response objects of an operation, as (code, response) pairs.
+
+        Vendor extensions are skipped. Range codes such as 2XX or 2xx become the
+        first code of their range, and the default response becomes 500.
+        """
+        for code, response in operation.get('responses', {}).items():
+            code = str(code).upper()
+            if code == 'DEFAULT':
+                status_code = 500
+            elif code.replace('X', '0').isdigit():
+                status_code = int(code.replace('X', '0'))
+            else:
+                continue
+            response = self.resolve(response)
+            if isinstance(response, dict):
+                yield status_code, response
+
+    def responses(self, operation, request):
+        """
+        Builds the saved example responses for an operation.
+        """
+        examples = []
+        for status_code, response in self.response_objects(operation):
+            if self.swagger2:
+                schema = response.get('schema')
+                content_type = self.response_content_type(operation) if schema is not None else None
+            else:
+                content = response.get('content') or {}
+                content_type = next(iter(content), None)
+                schema = content[content_type].get('schema') if content_type else None
+            example = {
+                'name': response.get('description', ''),
+                'originalRequest': copy.deepcopy({key: value for key, value in request.items() if key != 'description'}),
+                'status': _status_text(status_code),
+                'code': status_code,
+                'header': [{'key': 'Content-Type', 'value': content_type}] if content_type else [],
+                'body': '',
+            }
+            if schema is not None and content_type:
+                sample = self.example(schema)
+                example['body'] = json.dumps(sample, indent=2) if 'json' in content_type else _scalar_text(sample)
+                example['_postman_previewlanguage'] = 'json' if 'json' in content_type else 'text'
+            examples.append(example)
+        return examples
+
+    def example(self, schema, depth=0, seen=()):
+        """
+        Generates a placeholder value from a schema, the way the Postman importer fills request and response bodies.
+
+        Like the importer's default schema resolution, scalars become type
+        placeholders such as <string> rather than examples or defaults, so the
+        output only changes when the schema does.
+        """
+        ref = schema.get('$ref') if isinstance(schema, dict) else None
+        if ref:
+            if ref in seen or depth > MAX_SCHEMA_DEPTH:
+                return '<Circular reference to ' + ref + ' detected>'
+            seen = seen + (ref,)
+        schema = self.resolve(schema or {})
+        if 'allOf' in schema:
+            merged = {}
+            for part in schema['allOf']:
+                value = self.example(part, depth + 1, seen)
+                if isinstance(value, dict):
+                    merged.update(value)
+            return merged
+        for combinator in ('oneOf', 'anyOf'):
+            if schema.get(combinator):
+                return self.example(schema[combinator][0], depth + 1, seen)
+
+        schema_type = schema.get('type')
+        if isinstance(schema_type, list):
+            schema_type = next((value for value in schema_type if value != 'null'), None)
+        if schema_type == 'array' or 'items' in schema:
+            item = self.example(schema.get('items', {}), depth + 1, seen)
+            return [item, item]
+        if schema_type == 'object' or 'properties' in schema:
+            return {name: self.example(prop, depth + 1, seen) for name, prop in schema.get('properties', {}).items()}
+        if not schema_type and not schema.get('format'):
+            return {}
+        return _type_placeholder(schema)
+
+    def resolve(self, value):
+        """
+        Follows local $ref pointers until a concrete object is reached.
+        """
+        seen = set()
+        while isinstance(value, dict) and '$ref' in value:
+            ref = value['$ref']
+            if ref in seen or not ref.startswith('#/'):
+                return {}
+            seen.add(ref)
+            target = self.spec
+            for part in ref[2:].split('/'):
+                part = part.replace('~1', '/').replace('~0', '~')
+                if not isinstance(target, dict) or part not in target:
+                    logging.warning(f"Unresolvable reference in spec: {ref}")
+                    return {}
+                target = target[part]
+            value = target
+        return value
+
+
+def _type_placeholder(schema):
+    schema_format = schema.get('format')
+    if schema_format in FORMAT_PLACEHOLDERS:
+        return FORMAT_PLACEHOLDERS[schema_format]
+    schema_type = schema.get('type')
+    if isinstance(schema_type, list):
+        schema_type = next((value for value in schema_type if value != 'null'), None)
+    return f"<{schema_type or 'string'}>"
+
+
+def _status_text(status_code):
+    try:
+        return HTTPStatus(status_code).phrase
+    except ValueError:
+        return ''
+
+
+def _scalar_text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert an OpenAPI or Swagger JSON file into a Postman collection without the Postman API.")
+    parser.add_argument("spec_file", help="Path to the OpenAPI or Swagger JSON file.")
+    parser.add_argument("output_file", help="Path to save the Postman collection file.")
+
+    args = parser.parse_args()
+
+    with open(args.spec_file, 'r') as spec_file:
+        collection_json = convert_spec(json.load(spec_file))
+    if collection_json:
+        with open(args.output_file, 'w') as output_file:
+            json.dump(collection_json, output_file, indent=4)
@@ -0,0 +1,248 @@
+import hashlib
+import io
+import logging
+import mmap
+import tempfile
+
+from postman_sync import codec, metrics, transport
+
+# Bodies larger than this are spooled to a temporary file instead of kept in memory
+MAX_IN_MEMORY = 8 * 1024 * 1024
+
+# Downloads larger than this are aborted, or None for no limit
+MAX_SIZE = None
+
+CHUNK_SIZE = 1024 * 1024
+
+# Length of the response body excerpt included in error logs
+ERROR_EXCERPT_SIZE = 1000
+
+# The /import/openapi request body around the raw spec
+IMPORT_PREFIX = b'{"type": "json", "input": '
+IMPORT_SUFFIX = b'}'
+
+
+class SpecTooLarge(Exception):
+    """
+    Raised when a spec download exceeds the configured size limit.
+    """
+
+
+def configure(max_in_memory=None, max_size=None):
+    """
+    Adjusts the memory ceiling and size limit of spec downloads.
+
+    Args:
+        max_in_memory (int, optional): The number of bytes kept in memory before spooling to disk.
+        max_size (int, optional): The largest accepted spec, in bytes. 0 removes the limit.
+    """
+    global MAX_IN_MEMORY, MAX_SIZE
+    if max_in_memory is not None:
+        MAX_IN_MEMORY = max(max_in_memory, 0)
+    if max_size is not None:
+        MAX_SIZE = max_size or None
+
+
+class SpecBody:
+    """
+    A downloaded response body, held in memory or spooled to disk, with its size and digest.
+
+    Args:
+        file (tempfile.SpooledTemporaryFile): The body, positioned anywhere.
+        size (int): The body size in bytes.
+        sha256 (str): The SHA-256 hex digest of the body.
+    """
+
+    def __init__(self, file, size, sha256):
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
+
+    def read(self):
+        """
+        Returns the whole body as bytes.
+        """
+        self.file.seek(0)
+        return self.file.read()
+
+    def parse(self):
+        """
+        Parses the body as JSON.
+
+        With orjson, a body held in memory is parsed straight from its buffer and
+        a spooled one from a memory map of its file, so no copy of the raw bytes
+        is made alongside the parsed document. The standard library parser needs
+        the body as bytes, so it is read once.
+        """
+        if codec.orjson is None:
+            return codec.loads(self.read())
+        # SpooledTemporaryFile only exposes whether it rolled over, and its buffer, privately
+        if self.file._rolled:
+            self.file.flush()
+            with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                return codec.loads(view)
+        with self.file._file.getbuffer() as view:
+            return codec.loads(view)
+
+    def import_payload(self):
+        """
+        Returns the body of an /import/openapi request for this spec, read from the body as it is sent.
+
+        Returns:
+            ImportPayload: The request body, or None if the spec is not a UTF-8
+            JSON object and must be encoded again from the parsed document.
+        """
+        self.file.seek(0)
+        if not self.file.read(64).lstrip().startswith(b'{'):
+            return None
+        return ImportPayload(self)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ImportPayload(io.RawIOBase):
+    """
+    The body of an /import/openapi request, with the spec copied from its downloaded body.
+
+    Sending it instead of re-encoding the parsed spec keeps a large spec from
+    being held in memory a second time. It is read like a file, which requests
+    streams, and rewinds before every retry of the request.
+
+    Args:
+        spec_body (SpecBody): The downloaded spec, which must stay open until the request is sent.
+    """
+
+    def __init__(self, spec_body):
+        super().__init__()
+        self.spec_body = spec_body
+        self._size = len(IMPORT_PREFIX) + spec_body.size + len(IMPORT_SUFFIX)
+        self._position = 0
+
+    def __len__(self):
+        return self._size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}[whence]
+        self._position = min(max(base + offset, 0), self._size)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        spec_end = len(IMPORT_PREFIX) + self.spec_body.size
+        if self._position < len(IMPORT_PREFIX):
+            data = IMPORT_PREFIX[self._position:self._position + len(buffer)]
+        elif self._position < spec_end:
+            self.spec_body.file.seek(self._position - len(IMPORT_PREFIX))
+            data = self.spec_body.file.read(min(len(buffer), spec_end - self._position))
+        else:
+            data = IMPORT_SUFFIX[self._position - spec_end:self._position - spec_end + len(buffer)]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def read_body(response, max_in_memory=None, max_size=None):
+    """
+    Reads a streamed response body in chunks, hashing it on the way.
+
+    Args:
+        response (requests.Response): A response requested with stream=True.
+        max_in_memory (int, optional): Overrides MAX_IN_MEMORY.
+        max_size (int, optional): Overrides MAX_SIZE.
+
+    Returns:
+        SpecBody: The body.
+
+    Raises:
+        SpecTooLarge: If the body exceeds the size limit.
+        transport.DeadlineExceeded: If the deadline passes during the download.
+    """
+    max_in_memory = MAX_IN_MEMORY if max_in_memory is None else max_in_memory
+    max_size = MAX_SIZE if max_size is None else max_size
+    file = tempfile.SpooledTemporaryFile(max_size=max_in_memory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            # The read timeout bounds each chunk; this bounds a body that keeps trickling in
+            transport.check_deadline()
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise SpecTooLarge(f"{response.url} is larger than the {max_size} byte limit.")
+            digest.update(chunk)
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+    finally:
+        response.close()
+    metrics.incr(metrics.BYTES_RECEIVED, size)
+    if size > max_in_memory:
+        logging.debug(f"Spooled {size} bytes from {response.url} to disk.")
+    return SpecBody(file, size, digest.hexdigest())
+
+
+def download_spec(url, headers=None):
+    """
+    Downloads a spec without holding more than the memory ceiling of raw bytes.
+
+    Args:
+        url (str): The spec URL.
+        headers (dict, optional): Extra request headers, such as conditional request validators.
+
+    Responses other than 200 are closed before they are returned. Their error
+    excerpt is read first, so error_excerpt still returns it afterwards.
+
+    Returns:
+        tuple: The response and its SpecBody, or None as the body if the status is not 200.
+
+    Raises:
+        requests.exceptions.RequestException: If the download fails.
+        SpecTooLarge: If the spec exceeds the size limit.
+    """
+    response = transport.get(url, headers=headers, stream=True, metric=metrics.SPEC_DOWNLOADS)
+    if response.status_code == 200:
+        return response, read_body(response)
+    if response.status_code == 304:
+        # Closing a streamed response with its body unread drops the connection instead of
+        # returning it to the pool. A 304 has no body, so reading it is free.
+        response.content
+        response.close()
+    else:
+        error_excerpt(response)
+    return response, None
+
+
+def error_excerpt(response):
+    """
+    Returns the start of an error response body for logging, without reading the rest of a streamed body.
+
+    The excerpt is read once and kept on the response, which is closed.
+    """
+    if '_error_excerpt' in vars(response):
+        return response._error_excerpt
+    try:
+        excerpt = next(response.iter_content(chunk_size=ERROR_EXCERPT_SIZE), b'')
+    except Exception:
+        excerpt = ''
+    finally:
+        response.close()
+    if isinstance(excerpt, bytes):
+        excerpt = excerpt.decode('utf-8', errors='replace')
+    response._error_excerpt = excerpt
+    return excerpt
@@ -1,53 +1,399 @@
 
-import json
+import logging
+import os
+import re
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from postman_sync import codec
 
-def extract_endpoints(items):
-    endpoints = {}
-    for item in items:
-        if 'item' in item:
-            endpoints.update(extract_endpoints(item['item']))
+# Fallback rules that match a new request to an old one, in the order they are tried
+MATCH_RULES = ('exact', 'template', 'suffix', 'name')
+
+# Path parameters in any notation: {{var}}, {param} and :param
+PATH_PARAMETER = re.compile(r'\{\{[^{}]*\}\}|\{[^{}]*\}|^:.+$')
+
+def endpoint_key(item):
+    """
+    Returns the key used to match a request item between collections.
+
+    Args:
+        item (dict): A Postman request item.
+
+    Returns:
+        str: The request method and raw URL, e.g. "GET {{baseUrl}}/pets".
+    """
+    return f"{item['request']['method']} {item['request']['url']['raw']}"
+
+def iter_requests(items):
+    """
+    Walks a collection item tree iteratively, yielding each request with its folder path.
+
+    Items are visited in document order with an explicit stack, so arbitrarily
+    deep folder trees cost linear time and never hit the recursion limit.
+
+    Args:
+        items (list): The top-level collection items.
+
+    Yields:
+        tuple: The request item and the tuple of folder names leading to it.
+    """
+    stack = [(iter(items), ())]
+    while stack:
+        iterator, path = stack[-1]
+        item = next(iterator, None)
+        if item is None:
+            stack.pop()
+        elif 'item' in item:
+            stack.append((iter(item['item']), path + (item.get('name'),)))
         elif 'request' in item:
-            endpoint = f"{item['request']['method']} {item['request']['url']['raw']}"
-            endpoints[endpoint] = item
-    return endpoints
+            yield item, path
+
+def index_endpoints(items):
+    """
+    Builds an index of every request in a collection in a single pass.
+
+    Args:
+        items (list): The top-level collection items.
+
+    Returns:
+        dict: Endpoint keys mapped to the request item and its folder path.
+    """
+    return {endpoint_key(item): (item, path) for item, path in iter_requests(items)}
+
+def extract_endpoints(items):
+    return {endpoint_key(item): item for item, _ in iter_requests(items)}
+
+def path_template(raw_url):
+    """
+    Normalizes a raw request URL to the segments of its path template.
+
+    The scheme, host or base URL variable, query string and fragment are dropped,
+    and every path parameter becomes "{}", whatever its name or notation.
+
+    Args:
+        raw_url (str): The raw request URL, e.g. "{{baseUrl}}/pets/:petId?limit=10".
+
+    Returns:
+        tuple: The path segments, e.g. ("pets", "{}").
+    """
+    path = raw_url.split('?', 1)[0].split('#', 1)[0]
+    if '://' in path:
+        path = path.split('://', 1)[1].partition('/')[2]
+    elif not path.startswith('/'):
+        path = path.partition('/')[2]
+    return tuple(PATH_PARAMETER.sub('{}', segment) if '{' in segment or segment[0] == ':' else segment
+                 for segment in path.split('/') if segment)
+
+def query_keys(raw_url):
+    """
+    Returns the query parameter names of a raw request URL, ignoring their order and values.
+    """
+    query = raw_url.partition('?')[2].split('#', 1)[0]
+    return frozenset(part.split('=', 1)[0] for part in query.split('&') if part)
+
+class PathTrie:
+    """
+    A trie of request path templates, keyed by method and then by path segments from last to first.
+
+    Walking the segments in reverse means a request whose base path changed, such as
+    "/v1/pets/{}" becoming "/pets/{}", still ends on the branch of its old template.
+    Every node remembers the requests below it per method, up to two, which is
+    enough to tell a unique match from an ambiguous one in a single walk.
+    """
+
+    def __init__(self):
+        self.roots = {}
+
+    def insert(self, method, segments, value):
+        node = self.roots.setdefault(method, {'children': {}, 'values': [], 'below': []})
+        for segment in reversed(segments):
+            if len(node['below']) < 2:
+                node['below'].append(value)
+            node = node['children'].setdefault(segment, {'children': {}, 'values': [], 'below': []})
+        if len(node['below']) < 2:
+            node['below'].append(value)
+        node['values'].append(value)
+
+    def find(self, method, segments):
+        """
+        Returns the values stored under exactly these segments.
+        """
+        node = self.roots.get(method)
+        for segment in reversed(segments):
+            if node is None:
+                return []
+            node = node['children'].get(segment)
+        return node['values'] if node is not None else []
+
+    def find_suffix(self, method, segments):
+        """
+        Returns the single value whose template is a suffix of these segments, or the reverse, or None.
+
+        This matches a request whose base path gained or lost leading segments.
+        The shared suffix must contain a literal segment, so two requests are
+        never matched on path parameters alone, and the longest one wins.
+        """
+        node = self.roots.get(method)
+        if node is None:
+            return None
+        match = None
+        literal = False
+        for segment in reversed(segments):
+            node = node['children'].get(segment)
+            if node is None:
+                return match
+            literal = literal or segment != '{}'
+            if literal and len(node['values']) == 1:
+                match = node['values'][0]
+        # Every segment matched, so the segments are a suffix of the templates below this node
+        if literal and len(node['below']) == 1:
+            return node['below'][0]
+        return match
+
+class EndpointMatcher:
+    """
+    Indexes the requests of an old collection, so each new request is matched to
+    an old one in time proportional to its path length.
+
+    The rules in MATCH_RULES are tried in order:
+
+    - exact: the same method and raw URL.
+    - template: the same method and path template, ignoring the base URL, query
+      parameter order and path parameter names. Ties are broken by the query parameter names.
+    - suffix: the same method and a path template that is a suffix of the other, for a changed base path.
+    - name: the same method and request name, which the importers derive from the summary or operationId.
+
+    Only exact matches may reuse an old request. The fallback rules only consider
+    old requests that are not matched yet, so every exact match must be made first.
+
+    Args:
+        old_endpoints (dict): Endpoint keys mapped to the old requests, as returned by extract_endpoints.
+    """
+
+    def __init__(self, old_endpoints):
+        self.exact = old_endpoints
+        self.exact_matched = set()
+        self.templates = None
+        self.names = None
+        self.claimed = set()
+
+    def _build_fallback_index(self):
+        # Built on the first fallback, from the old requests no exact match took, which are usually few
+        self.templates = PathTrie()
+        self.names = {}
+        for endpoint, item in self.exact.items():
+            if endpoint in self.exact_matched:
+                continue
+            request = item['request']
+            self.templates.insert(request['method'], path_template(request['url']['raw']), item)
+            if item.get('name'):
+                self.names.setdefault((request['method'], item['name']), []).append(item)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def match_exact(self, endpoint):
+        """
+        Returns the old request with this endpoint key, or None.
+        """
+        old_item = self.exact.get(endpoint)
+        if old_item is not None:
+            self.exact_matched.add(endpoint)
+        return old_item
+
+    def match_fallback(self, item):
+        """
+        Tries the fallback rules for a request without an exact match.
+
+        Returns:
+            tuple: The matched old item and the name of the rule, or (None, None).
+        """
+        if self.templates is None:
+            self._build_fallback_index()
+        request = item['request']
+        method = request['method']
+        raw_url = request['url']['raw']
+        segments = path_template(raw_url)
+
+        candidates = self._unclaimed(self.templates.find(method, segments))
+        if len(candidates) > 1:
+            keys = query_keys(raw_url)
+            candidates = [old_item for old_item in candidates if query_keys(old_item['request']['url']['raw']) == keys]
+        if len(candidates) == 1:
+            return self._claim(candidates[0], 'template')
+
+        old_item = self.templates.find_suffix(method, segments)
+        if old_item is not None and id(old_item) not in self.claimed:
+            return self._claim(old_item, 'suffix')
+
+        # Names are only trusted when a single unmatched old request of the method has the name
+        named = self.names.get((method, item.get('name')), [])
+        if len(named) == 1 and id(named[0]) not in self.claimed:
+            return self._claim(named[0], 'name')
+        return None, None
+
+    def _unclaimed(self, items):
+        return [old_item for old_item in items if id(old_item) not in self.claimed]
+
+    def _claim(self, old_item, rule):
+        self.claimed.add(id(old_item))
+        return old_item, rule
 
 def update_endpoints(new_items, old_endpoints, stats):
+    """
+    Copies the events of matching old requests onto the new requests.
+
+    Exact matches are resolved first for every request, so a fallback rule never
+    takes an old request that another new request matches exactly.
+
+    Args:
+        new_items (list): The top-level items of the new collection.
+        old_endpoints (EndpointMatcher | dict): The old requests, or endpoint keys mapped to them as returned by extract_endpoints.
+        stats (dict): Merge statistics to update. 'match_rules' counts the matches of each rule.
+
+    Returns:
+        int: The number of new requests that received events.
+    """
+    matcher = old_endpoints if isinstance(old_endpoints, EndpointMatcher) else EndpointMatcher(old_endpoints)
+    stats.setdefault('match_rules', dict.fromkeys(MATCH_RULES, 0))
     updated_count = 0
-    for item in new_items:
-        if 'item' in item:
-            updated_count += update_endpoints(item['item'], old_endpoints, stats)
-        elif 'request' in item:
-            endpoint = f"{item['request']['method']} {item['request']['url']['raw']}"
-            if endpoint in old_endpoints:
-                item['event'] = old_endpoints[endpoint].get('event', [])
-                updated_count += 1
-                stats['updated_endpoints'].append(endpoint)
-                stats['updated_events_count'] += len(item['event'])
-                print(f"Updated events for endpoint: {endpoint}")
+    unmatched = []
+    for item, _ in iter_requests(new_items):
+        endpoint = endpoint_key(item)
+        old_item = matcher.match_exact(endpoint)
+        if old_item is None:
+            unmatched.append((item, endpoint))
+        else:
+            _copy_events(item, old_item, endpoint, 'exact', stats)
+            updated_count += 1
+    for item, endpoint in unmatched:
+        old_item, rule = matcher.match_fallback(item)
+        if old_item is not None:
+            _copy_events(item, old_item, endpoint, rule, stats)
+            updated_count += 1
     return updated_count
 
-def main(old_file_path, new_file_path, output_file_path):
-    with open(old_file_path, 'r') as old_file:
-        old_data = json.load(old_file)
-    
-    with open(new_file_path, 'r') as new_file:
-        new_data = json.load(new_file)
-    print(old_data)
-    print("Extracting endpoints from the old file...")
-    old_endpoints = extract_endpoints(old_data['collection']['item'])
-    print(f"Extracted {len(old_endpoints)} endpoints from the old file.")
+def _copy_events(item, old_item, endpoint, rule, stats):
+    item['event'] = old_item.get('event', [])
+    stats['match_rules'][rule] += 1
+    stats['updated_endpoints'].append(endpoint)
+    stats['updated_events_count'] += len(item['event'])
+    logging.debug(f"Updated events for endpoint: {endpoint} (matched by {rule})")
+
+def index_folders(items):
+    """
+    Builds an index of every folder in a collection by its folder path.
+
+    Args:
+        items (list): The top-level collection items.
+
+    Returns:
+        dict: Tuples of folder names mapped to the folder item.
+    """
+    folders = {}
+    stack = [(items, ())]
+    while stack:
+        children, path = stack.pop()
+        for item in children:
+            if 'item' in item:
+                folder_path = path + (item.get('name'),)
+                folders.setdefault(folder_path, item)
+                stack.append((item['item'], folder_path))
+    return folders
+
+def request_signature(item):
+    """
+    Returns the parts of a request item that the Postman importer generates, for change detection.
+
+    Args:
+        item (dict): A Postman request item.
+
+    Returns:
+        tuple: The name, method, raw URL, headers and body of the request.
+    """
+    request = item['request']
+    body = request.get('body') or {}
+    mode = body.get('mode')
+    headers = tuple((header.get('key'), header.get('value')) for header in request.get('header', []))
+    return (item.get('name'), request['method'], request['url']['raw'], headers, mode, codec.canonical_dumps(body.get(mode)))
+
+def diff_collections(old_items, new_items):
+    """
+    Compares the requests of two collections, pairing them like merge_collections does.
+
+    Requests are paired by endpoint first, then by the fallback rules of
+    EndpointMatcher. A request whose URL changed in a way the rules recognize is
+    therefore reported as modified, which keeps its ID and tests, rather than as
+    removed and added again.
+
+    Args:
+        old_items (list): The top-level items of the published collection.
+        new_items (list): The top-level items of the merged collection.
+
+    Returns:
+        dict: 'added' holds (new item, folder path) pairs, 'removed' holds old items
+        and 'modified' holds (old item, new item) pairs whose generated parts differ.
+    """
+    matcher = EndpointMatcher(extract_endpoints(old_items))
+    # Each new request with its folder path and the old request paired with it, in document order
+    pairs = []
+    paired = set()
+    for new_item, path in iter_requests(new_items):
+        old_item = matcher.match_exact(endpoint_key(new_item))
+        # A duplicated new endpoint is only paired once
+        if old_item is not None and id(old_item) in paired:
+            old_item = None
+        if old_item is not None:
+            paired.add(id(old_item))
+        pairs.append([new_item, path, old_item])
+    for pair in pairs:
+        if pair[2] is None:
+            pair[2], _ = matcher.match_fallback(pair[0])
+            if pair[2] is not None:
+                paired.add(id(pair[2]))
+
+    changes = {'added': [], 'removed': [], 'modified': []}
+    for new_item, path, old_item in pairs:
+        if old_item is None:
+            changes['added'].append((new_item, path))
+        elif request_signature(old_item) != request_signature(new_item):
+            changes['modified'].append((old_item, new_item))
+    changes['removed'] = [old_item for old_item in matcher.exact.values() if id(old_item) not in paired]
+    return changes
+
+def merge_collections(old_data, new_data):
+    """
+    Carries the events (tests and scripts) of the old collection over to the matching endpoints of the new one.
+
+    The merge happens in memory; new_data is updated in place and returned as the merged collection.
+
+    Args:
+        old_data (dict): The old Postman collection JSON.
+        new_data (dict): The new Postman collection JSON.
+
+    Returns:
+        tuple: The merged collection JSON and the merge statistics.
+    """
+    old_endpoints = EndpointMatcher(extract_endpoints(old_data['collection']['item']))
     stats = {
         'old_endpoints_count': len(old_endpoints),
         'updated_endpoints': [],
         'updated_events_count': 0,
+        'match_rules': dict.fromkeys(MATCH_RULES, 0),
     }
+    stats['updated_count'] = update_endpoints(new_data['collection']['item'], old_endpoints, stats)
+    return new_data, stats
+
+def main(old_file_path, new_file_path, output_file_path):
+    old_data = codec.read_file(old_file_path)
+    new_data = codec.read_file(new_file_path)
 
     print("Updating new file with events from old file...")
-    updated_count = update_endpoints(new_data['collection']['item'], old_endpoints, stats)
+    new_data, stats = merge_collections(old_data, new_data)
+    updated_count = stats['updated_count']
     print(f"Updated {updated_count} endpoints in the new file.")
 
-    with open(output_file_path, 'w') as output_file:
-        json.dump(new_data, output_file, indent=4)
+    codec.write_file(output_file_path, new_data)
     
     print(f"Saved updated new file to {output_file_path}")
     
@@ -55,6 +401,7 @@ def main(old_file_path, new_file_path, output_file_path):
     print(f"Total endpoints in old file: {stats['old_endpoints_count']}")
     print(f"Total endpoints updated in new file: {updated_count}")
     print(f"Total events updated: {stats['updated_events_count']}")
+    print(f"Matches per rule: {', '.join(f'{rule} {count}' for rule, count in stats['match_rules'].items())}")
 
 if __name__ == "__main__":
     import argparse
@@ -0,0 +1,144 @@
+import hashlib
+
+from postman_sync import codec
+
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+# Key of the fingerprint covering document-level fields such as the title and servers
+DOCUMENT_KEY = '*'
+
+# Fields that neither the converter nor the Postman importer carry into the collection.
+# Vendor extensions (x-*) are left out as well
+IGNORED_FIELDS = {'externalDocs'}
+
+# Fields whose keys are user-chosen names rather than spec keywords
+NAME_MAP_FIELDS = {'properties', 'patternProperties', 'definitions', 'schemas', 'responses', 'content', 'headers', 'variables', 'encoding'}
+
+# Document-level fields that change the generated collection
+DOCUMENT_FIELDS = ('openapi', 'swagger', 'servers', 'host', 'basePath', 'schemes', 'consumes', 'produces')
+
+
+def operation_fingerprints(spec):
+    """
+    Calculates a fingerprint for every operation of an OpenAPI or Swagger document.
+
+    Each fingerprint covers the whole operation and the parameters of its path,
+    with referenced components folded in, so editing a shared schema changes
+    every operation that uses it. Descriptions and examples are included, since
+    they end up in the requests, parameters and saved responses of the
+    collection. Only external docs and vendor extensions are left out.
+
+    Args:
+        spec (dict): The parsed OpenAPI or Swagger document.
+
+    Returns:
+        dict: Operation keys such as "GET /pets/{id}" mapped to their fingerprints.
+    """
+    resolver = _RefDigester(spec)
+    fingerprints = {}
+    document = {field: spec[field] for field in DOCUMENT_FIELDS if field in spec}
+    info = spec.get('info', {})
+    document['title'] = info.get('title')
+    document['description'] = info.get('description')
+    fingerprints[DOCUMENT_KEY] = _digest(resolver.normalize(document))
+
+    for path, path_item in spec.get('paths', {}).items():
+        if path.startswith('x-') or not isinstance(path_item, dict):
+            continue
+        path_item = resolver.normalize(path_item)
+        path_parameters = path_item.get('parameters', [])
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if operation is None:
+                continue
+            relevant = {'pathParameters': path_parameters, 'operation': operation}
+            fingerprints[f"{method.upper()} {path}"] = _digest(relevant)
+    return fingerprints
+
+
+def diff_operations(old_fingerprints, new_fingerprints):
+    """
+    Compares two sets of operation fingerprints.
+
+    Args:
+        old_fingerprints (dict): The fingerprints stored from the previous sync.
+        new_fingerprints (dict): The fingerprints of the downloaded spec.
+
+    Returns:
+        dict: Sorted lists of 'added', 'removed' and 'modified' operation keys.
+    """
+    old_keys = set(old_fingerprints)
+    new_keys = set(new_fingerprints)
+    return {
+        'added': sorted(new_keys - old_keys),
+        'removed': sorted(old_keys - new_keys),
+        'modified': sorted(key for key in old_keys & new_keys if old_fingerprints[key] != new_fingerprints[key]),
+    }
+
+
+def has_changes(diff):
+    """
+    Returns True if an operation diff contains any added, removed or modified operation.
+    """
+    return any(diff[kind] for kind in ('added', 'removed', 'modified'))
+
+
+class _RefDigester:
+    """
+    Replaces local $ref pointers with a digest of their target.
+
+    Each referenced component is normalized and hashed once, so large specs with
+    heavily shared schemas are fingerprinted in linear time.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.digests = {}
+        self.in_progress = set()
+        self.hit_cycle = False
+
+    def normalize(self, value, name_map=False):
+        """
+        Drops ignored fields and replaces references with digests.
+
+        Keys of name maps such as schema properties are user-chosen names, so
+        they are kept even when they look like an ignored field.
+        """
+        if isinstance(value, dict):
+            if name_map:
+                return {key: self.normalize(item) for key, item in value.items()}
+            if '$ref' in value:
+                return {'$ref': self.ref_digest(value['$ref'])}
+            return {key: self.normalize(item, key in NAME_MAP_FIELDS) for key, item in value.items()
+                    if key not in IGNORED_FIELDS and not key.startswith('x-')}
+        if isinstance(value, list):
+            return [self.normalize(item) for item in value]
+        return value
+
+    def ref_digest(self, ref):
+        if ref in self.digests:
+            return self.digests[ref]
+        if ref in self.in_progress:
+            # Cycles are identified by the pointer itself
+            self.hit_cycle = True
+            return ref
+        if not ref.startswith('#/'):
+            return ref
+        self.in_progress.add(ref)
+        outer_hit_cycle, self.hit_cycle = self.hit_cycle, False
+        target = self.spec
+        for part in ref[2:].split('/'):
+            part = part.replace('~1', '/').replace('~0', '~')
+            target = target.get(part) if isinstance(target, dict) else None
+        digest = _digest(self.normalize(target))
+        self.in_progress.discard(ref)
+        # A digest cut short by a cycle depends on where the walk started, so it is not reused
+        if not self.hit_cycle:
+            self.digests[ref] = digest
+        self.hit_cycle = outer_hit_cycle or self.hit_cycle
+        return digest
+
+
+def _digest(value):
+    json_str = codec.canonical_dumps(value)
+    return hashlib.sha256(json_str.encode()).hexdigest()[:32]
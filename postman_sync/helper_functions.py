@@ -1,9 +1,28 @@
-import requests
 import logging
 import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from postman_sync import codec, download, transport
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Base URL of the Postman API. Point it at a local stand-in, such as fake_postman, to run syncs offline.
+POSTMAN_API_URL = os.getenv('POSTMAN_API_URL', 'https://api.getpostman.com').rstrip('/')
+
+def set_api_url(url):
+    """
+    Changes the base URL that every Postman API call is sent to.
+
+    Args:
+        url (str): The base URL, e.g. "http://127.0.0.1:8100".
+    """
+    global POSTMAN_API_URL
+    POSTMAN_API_URL = url.rstrip('/')
+
+def api_url(path):
+    """
+    Returns the full URL of a Postman API path, e.g. api_url("/collections").
+    """
+    return f"{POSTMAN_API_URL}{path}"
 
 def cleanup_collection(collection_id, api_key):
     """
@@ -16,14 +35,14 @@ def cleanup_collection(collection_id, api_key):
     Returns:
         bool: True if the collection was successfully deleted, False otherwise.
     """
-    url = f"https://api.getpostman.com/collections/{collection_id}"
+    url = api_url(f"/collections/{collection_id}")
     headers = {
         'X-Api-Key': api_key
     }
     
     try:
         logging.debug(f"Attempting to delete collection with ID: {collection_id}")
-        response = requests.delete(url, headers=headers)
+        response = transport.delete(url, headers=headers)
 
         if response.status_code == 200:
             logging.info(f"Successfully deleted collection with ID: {collection_id}")
@@ -32,7 +51,7 @@ def cleanup_collection(collection_id, api_key):
             logging.error(f"Failed to delete collection. Status code: {response.status_code}, Response: {response.text}")
             return False
 
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         logging.error(f"Request to delete collection failed: {e}")
         return False
 
@@ -47,26 +66,55 @@ def get_collection_json(collection_id, api_key):
     Returns:
         dict: The JSON data of the Postman collection if successful, None otherwise.
     """
-    url = f"https://api.getpostman.com/collections/{collection_id}"
+    url = api_url(f"/collections/{collection_id}")
     headers = {
         'X-Api-Key': api_key
     }
 
     try:
         logging.debug(f"Attempting to fetch collection with ID: {collection_id}")
-        response = requests.get(url, headers=headers)
+        response = transport.get(url, headers=headers)
 
         if response.status_code == 200:
             logging.info(f"Successfully fetched collection with ID: {collection_id}")
-            return response.json()
+            return codec.response_json(response)
         else:
             logging.error(f"Failed to fetch collection. Status code: {response.status_code}, Response: {response.text}")
             return None
 
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         logging.error(f"Request to fetch collection failed: {e}")
         return None
 
+def list_collections(api_key):
+    """
+    Lists the collections the API key can access, without their contents.
+
+    Args:
+        api_key (str): The Postman API key.
+
+    Returns:
+        list: The collection summaries, each with its 'uid' and 'updatedAt', if successful, None otherwise.
+    """
+    url = api_url("/collections")
+    headers = {
+        'X-Api-Key': api_key
+    }
+
+    try:
+        logging.debug("Attempting to list collections.")
+        response = transport.get(url, headers=headers)
+
+        if response.status_code == 200:
+            return codec.response_json(response).get('collections', [])
+        else:
+            logging.error(f"Failed to list collections. Status code: {response.status_code}, Response: {response.text}")
+            return None
+
+    except transport.RequestException as e:
+        logging.error(f"Request to list collections failed: {e}")
+        return None
+
 
 def fetch_swagger_json(swagger_url):
     """
@@ -80,31 +128,48 @@ def fetch_swagger_json(swagger_url):
     """
     try:
         logging.debug(f"Attempting to download Swagger JSON from: {swagger_url}")
-        response = requests.get(swagger_url)
+        response, body = download.download_spec(swagger_url)
 
         if response.status_code == 200:
-            swagger_json = response.json()
+            with body:
+                swagger_json = body.parse()
             logging.info("Successfully downloaded Swagger JSON.")
             return swagger_json
         else:
-            logging.error(f"Failed to download Swagger JSON. Status code: {response.status_code}, Response: {response.text}")
+            logging.error(f"Failed to download Swagger JSON. Status code: {response.status_code}, Response: {download.error_excerpt(response)}")
             return None
-    except requests.exceptions.RequestException as e:
+    except download.SpecTooLarge as e:
+        logging.error(f"Skipping the Swagger JSON: {e}")
+        return None
+    except transport.RequestException as e:
         logging.error(f"Request to download Swagger JSON failed: {e}")
         return None
 
-def create_collection_json(swagger_url, api_key):
+def create_collection_json(swagger_url, api_key, swagger_json=None, spec_body=None):
     """
     Downloads a Swagger JSON from the provided URL, validates it, and creates a Postman collection using the Postman API.
 
+    If the spec has already been downloaded, pass it as swagger_json to skip the download.
+    Pass its downloaded body as well to send the import from the body instead of
+    encoding the parsed spec again.
+
     Args:
         swagger_url (str): The URL of the Swagger JSON.
         api_key (str): The Postman API key.
+        swagger_json (dict | bytes | str, optional): The already downloaded spec, parsed or raw.
+        spec_body (download.SpecBody, optional): The downloaded body of swagger_json.
 
     Returns:
         str: The ID of the created Postman collection if successful, None otherwise.
     """
-    swagger_json = fetch_swagger_json(swagger_url)
+    if swagger_json is None:
+        swagger_json = fetch_swagger_json(swagger_url)
+    elif isinstance(swagger_json, (bytes, bytearray, str)):
+        try:
+            swagger_json = codec.loads(swagger_json)
+        except ValueError as e:
+            logging.error(f"Swagger JSON could not be parsed: {e}")
+            return None
     if not swagger_json:
         return None
 
@@ -112,28 +177,27 @@ def create_collection_json(swagger_url, api_key):
         logging.error("Swagger JSON does not contain the necessary 'openapi' or 'swagger' version field.")
         return None
 
-    logging.debug(f"Validated Swagger JSON: {json.dumps(swagger_json, indent=4)}")
-
-    import_url = "https://api.getpostman.com/import/openapi"
+    import_url = api_url("/import/openapi")
     headers = {
         'X-Api-Key': api_key,
         'Content-Type': 'application/json'
     }
 
-    payload = json.dumps({
-        'type': 'json',
-        'input': swagger_json
-    })
+    payload = spec_body.import_payload() if spec_body is not None else None
+    if payload is None:
+        payload = codec.dumps({
+            'type': 'json',
+            'input': swagger_json
+        })
 
-    logging.debug(f"Payload for Postman API: {payload}")
+    logging.debug(f"Import payload size: {len(payload)} bytes")
 
     try:
         logging.debug("Attempting to create Postman collection with downloaded Swagger JSON.")
-        response = requests.post(import_url, headers=headers, data=payload)
+        response = transport.post(import_url, headers=headers, data=payload)
 
         if response.status_code == 200:
-            response_json = response.json()
-            logging.debug(f"Import Response JSON: {json.dumps(response_json, indent=4)}")
+            response_json = codec.response_json(response)
             if 'collections' in response_json and len(response_json['collections']) > 0:
                 collection_id = response_json['collections'][0].get('uid')
                 logging.info(f"Successfully created Postman collection with ID: {collection_id}")
@@ -144,13 +208,129 @@ def create_collection_json(swagger_url, api_key):
         else:
             logging.error(f"Failed to create Postman collection. Status code: {response.status_code}, Response: {response.text}")
             return None
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         logging.error(f"Request to create Postman collection failed: {e}")
         return None
 
+def update_collection(collection_id, collection_json, api_key):
+    """
+    Replaces the contents of an existing Postman collection, keeping its ID.
+
+    Args:
+        collection_id (str): The ID of the Postman collection to update.
+        collection_json (dict): The Postman collection JSON, with the collection under the 'collection' key.
+        api_key (str): The Postman API key.
+
+    Returns:
+        bool: True if the collection was successfully updated, False otherwise.
+    """
+    url = api_url(f"/collections/{collection_id}")
+    data = codec.dumps({'collection': collection_json['collection']})
+    return _send_item_change('PUT', url, api_key, f"update collection {collection_id}", data=data) is not None
+
+def create_request(collection_id, item, api_key, folder_id=None):
+    """
+    Adds a request item to an existing Postman collection.
+
+    Args:
+        collection_id (str): The ID of the Postman collection.
+        item (dict): The Postman request item to add.
+        api_key (str): The Postman API key.
+        folder_id (str, optional): The ID of the folder to add the request to. Defaults to the collection root.
+
+    Returns:
+        bool: True if the request was successfully created, False otherwise.
+    """
+    url = api_url(f"/collections/{collection_id}/requests")
+    params = {'folder': folder_id} if folder_id else None
+    return _send_item_change('POST', url, api_key, f"create request {item.get('name')}", params=params, data=codec.dumps(request_payload(item))) is not None
+
+def update_request(collection_id, request_id, item, api_key):
+    """
+    Updates the name, URL, headers and body of a request in a Postman collection.
+
+    The request's events (tests and scripts) are left untouched.
+
+    Args:
+        collection_id (str): The ID of the Postman collection.
+        request_id (str): The ID of the request to update.
+        item (dict): The Postman request item holding the new values.
+        api_key (str): The Postman API key.
+
+    Returns:
+        bool: True if the request was successfully updated, False otherwise.
+    """
+    url = api_url(f"/collections/{collection_id}/requests/{request_id}")
+    return _send_item_change('PUT', url, api_key, f"update request {request_id}", data=codec.dumps(request_payload(item))) is not None
+
+def delete_request(collection_id, request_id, api_key):
+    """
+    Deletes a request from a Postman collection.
+
+    Args:
+        collection_id (str): The ID of the Postman collection.
+        request_id (str): The ID of the request to delete.
+        api_key (str): The Postman API key.
+
+    Returns:
+        bool: True if the request was successfully deleted, False otherwise.
+    """
+    url = api_url(f"/collections/{collection_id}/requests/{request_id}")
+    return _send_item_change('DELETE', url, api_key, f"delete request {request_id}") is not None
+
+def request_payload(item):
+    """
+    Converts a collection request item into the request format of the Postman requests API.
+
+    Args:
+        item (dict): The Postman request item.
+
+    Returns:
+        dict: The request payload.
+    """
+    request = item['request']
+    url = request['url']
+    payload = {
+        'name': item.get('name'),
+        'method': request['method'],
+        'url': url['raw'] if isinstance(url, dict) else url,
+        'headers': '\n'.join(f"{header['key']}: {header['value']}" for header in request.get('header', [])),
+    }
+    if request.get('description'):
+        payload['description'] = request['description']
+    body = request.get('body') or {}
+    if body.get('mode') == 'raw':
+        payload['dataMode'] = 'raw'
+        payload['rawModeData'] = body.get('raw', '')
+    elif body.get('mode') in ('urlencoded', 'formdata'):
+        payload['dataMode'] = 'urlencoded' if body['mode'] == 'urlencoded' else 'params'
+        payload['data'] = [{'key': field['key'], 'value': field.get('value', ''), 'type': field.get('type', 'text')} for field in body[body['mode']]]
+    return payload
+
+def _send_item_change(method, url, api_key, action, **kwargs):
+    headers = {
+        'X-Api-Key': api_key,
+        'Content-Type': 'application/json'
+    }
+    try:
+        logging.debug(f"Attempting to {action}.")
+        response = transport.request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 200:
+            logging.info(f"Successfully completed: {action}.")
+            return response
+        else:
+            logging.error(f"Failed to {action}. Status code: {response.status_code}, Response: {response.text}")
+            return None
+    except transport.RequestException as e:
+        logging.error(f"Request to {action} failed: {e}")
+        return None
+
 if __name__ == "__main__":
     import argparse
 
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
     parser = argparse.ArgumentParser(description="Delete, fetch, or create a Postman collection using the Postman API.")
     parser.add_argument("action", choices=["delete", "fetch", "create"], help="Action to perform: 'delete', 'fetch', or 'create'.")
     parser.add_argument("api_key", help="The Postman API key.")
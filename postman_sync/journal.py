@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from postman_sync import codec
+from postman_sync.helper_functions import cleanup_collection, list_collections
+
+# Temporary collections younger than this many seconds may still be in use by a running sync
+ORPHAN_AGE = 600
+
+_active = None
+
+
+class LinkJournal:
+    """
+    The checkpoints of one link's sync attempt.
+
+    Stage outputs are small values stored in the record itself, except for
+    collections, which are written next to it.
+    """
+
+    def __init__(self, journal, link, record):
+        self.journal = journal
+        self.link = link
+        self.record = record
+
+    def completed(self, stage):
+        """
+        Returns the recorded output of a completed stage, or None.
+        """
+        return self.record['stages'].get(stage)
+
+    def checkpoint(self, stage, output):
+        """
+        Records that a stage completed with the given output.
+        """
+        self.record['stages'][stage] = output
+        self.journal._write(self.link, self.record)
+
+    def completed_collection(self, stage):
+        """
+        Returns the collection recorded for a completed stage, or None.
+        """
+        file_name = self.completed(stage)
+        if file_name is None:
+            return None
+        try:
+            return codec.read_file(os.path.join(self.journal.directory, file_name))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring the unreadable {stage} checkpoint of {self.link}: {e}")
+            return None
+
+    def checkpoint_collection(self, stage, collection):
+        """
+        Records that a stage completed with a collection as its output.
+        """
+        file_name = f"{self.journal._key(self.link)}.{stage}.json"
+        codec.write_file(os.path.join(self.journal.directory, file_name), collection, pretty=False)
+        self.checkpoint(stage, file_name)
+
+    def add_temporary(self, uid):
+        """
+        Records a temporary collection before anything else can fail, so the sweeper can delete it.
+        """
+        self.record['temporary'][uid] = time.time()
+        self.journal._write(self.link, self.record)
+
+    def remove_temporary(self, uid):
+        if self.record['temporary'].pop(uid, None) is not None:
+            self.journal._write(self.link, self.record)
+
+
+class Journal:
+    """
+    A directory of per-link sync journals.
+
+    Each record holds the spec hash of the attempt, the outputs of its completed
+    stages and the temporary collections that were created and not yet deleted.
+    A sync of the same spec resumes from the recorded stages. Finishing a link
+    drops its checkpoints, but temporary collections stay recorded until the
+    sweeper deletes them.
+
+    Args:
+        directory (str): The journal directory. It is created if missing.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def open(self, link, spec_hash):
+        """
+        Returns the journal of a link's sync, resuming the recorded attempt if it was for the same spec.
+        """
+        record = self._read(self._path(link))
+        if record is None:
+            record = {'link': link, 'spec_hash': spec_hash, 'stages': {}, 'temporary': {}}
+        elif record['spec_hash'] != spec_hash:
+            if 'publish' in record['stages']:
+                logging.warning(f"An interrupted sync of {link} published {record['stages']['publish']}, "
+                                "but the spec changed since. The collection is left as is.")
+            self._drop_stage_files(record)
+            record = {'link': link, 'spec_hash': spec_hash, 'stages': {}, 'temporary': record['temporary']}
+        elif record['stages']:
+            logging.info(f"Resuming the sync of {link} after: {', '.join(record['stages'])}.")
+        return LinkJournal(self, link, record)
+
+    def finish(self, link):
+        """
+        Drops the checkpoints of a link once its result is stored.
+        """
+        path = self._path(link)
+        record = self._read(path)
+        if record is None:
+            return
+        self._drop_stage_files(record)
+        if record['temporary']:
+            record['stages'] = {}
+            self._write(link, record)
+        else:
+            os.remove(path)
+
+    def sweep(self, api_key, min_age=ORPHAN_AGE):
+        """
+        Deletes the temporary collections that interrupted syncs left behind.
+
+        Args:
+            api_key (str): The Postman API key.
+            min_age (float): Only collections recorded at least this many seconds ago are deleted.
+
+        Returns:
+            int: The number of collections deleted.
+        """
+        records = [record for record in map(self._read, self._record_paths()) if record and record['temporary']]
+        if not records:
+            return 0
+        listed = list_collections(api_key)
+        if listed is None:
+            return 0
+        existing = {collection.get('uid') for collection in listed}
+        cutoff = time.time() - min_age
+        deleted = 0
+        for record in records:
+            for uid, created_at in list(record['temporary'].items()):
+                if created_at > cutoff:
+                    continue
+                if uid not in existing:
+                    del record['temporary'][uid]
+                elif cleanup_collection(uid, api_key):
+                    logging.info(f"Deleted orphaned temporary collection {uid} of {record['link']}.")
+                    del record['temporary'][uid]
+                    deleted += 1
+            if record['temporary'] or record['stages']:
+                self._write(record['link'], record)
+            else:
+                os.remove(self._path(record['link']))
+        return deleted
+
+    def _key(self, link):
+        return hashlib.sha256(link.encode()).hexdigest()[:16]
+
+    def _path(self, link):
+        return os.path.join(self.directory, f"{self._key(link)}.journal.json")
+
+    def _record_paths(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.journal.json')]
+
+    def _drop_stage_files(self, record):
+        for output in record['stages'].values():
+            if isinstance(output, str) and output.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.directory, output))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, link, record):
+        # Written under a temporary name and renamed, so a crash never leaves a partial record
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(record, file)
+        os.replace(temp_path, self._path(link))
+
+
+def enable(directory):
+    """
+    Turns on the sync journal for the following syncs.
+
+    Args:
+        directory (str): The journal directory.
+
+    Returns:
+        Journal: The active journal.
+    """
+    global _active
+    _active = Journal(directory)
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    """
+    Returns the active journal, or None if journaling is off.
+    """
+    return _active
@@ -3,22 +3,35 @@ import os
 import hashlib
 import logging
 import argparse
-import requests
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import urlparse
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from postman_sync.helper_functions import cleanup_collection, get_collection_json, create_collection_json
-from postman_sync.endpoint_transfer import extract_endpoints, update_endpoints, main as update_main
-
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+from postman_sync import breaker, codec, collection_cache, download, journal, metrics, snapshots, transport
+from postman_sync.helper_functions import api_url, set_api_url, cleanup_collection, get_collection_json, create_collection_json, update_collection, create_request, update_request, delete_request
+from postman_sync.converter import convert_spec
+from postman_sync.endpoint_transfer import merge_collections, diff_collections, index_folders
+from postman_sync.state import JsonFileState, open_state
+from postman_sync.scheduler import LinkScheduler, MIN_INTERVAL, MAX_INTERVAL
+from postman_sync.fingerprints import operation_fingerprints, diff_operations, has_changes
 
 API_KEY_FILE = 'api_key.txt'
 LINKS_FILE = 'links.json'
 NEW_JSON_FILE = 'new.json'
 OLD_JSON_FILE = 'old.json'
 UPDATED_JSON_FILE = 'updated.json'
+CONVERTERS = ('postman', 'local')
+UPDATE_MODES = ('new', 'replace', 'items')
+COMMANDS = ('sync', 'daemon')
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Longest the daemon sleeps before re-reading the stored links
+DAEMON_MAX_SLEEP = 60
 
 def save_api_key(api_key):
     """
@@ -65,39 +78,73 @@ def initialize_links_file():
             json.dump([], file)
         logging.info("Links file initialized.")
 
-def load_links():
+def hash_json(data):
     """
-    Loads the links from the file.
+    Calculates the hash of a JSON object.
+
+    Args:
+        data (dict): The JSON object.
 
     Returns:
-        list: A list of links.
+        str: The hash of the JSON object.
     """
-    with open(LINKS_FILE, 'r') as file:
-        return json.load(file)
+    json_str = codec.canonical_dumps(data)
+    return hashlib.sha256(json_str.encode()).hexdigest()
 
-def save_links(links):
+def conditional_headers(entry):
     """
-    Saves the links to the file.
+    Builds conditional request headers from the validators stored on a links entry.
 
     Args:
-        links (list): A list of links.
+        entry (dict): The links file entry.
+
+    Returns:
+        dict: The If-None-Match and If-Modified-Since headers, where known.
+    """
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+def update_validators(entry, response):
     """
-    with open(LINKS_FILE, 'w') as file:
-        json.dump(links, file, indent=4)
-    logging.info("Links file updated.")
+    Stores the ETag and Last-Modified validators of a spec response on a links entry.
 
-def hash_json(data):
+    Args:
+        entry (dict): The links file entry.
+        response (requests.Response): The spec download response.
+
+    Returns:
+        bool: True if the stored validators changed, False otherwise.
     """
-    Calculates the hash of a JSON object.
+    changed = False
+    for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified')):
+        value = response.headers.get(header)
+        if entry.get(key) != value:
+            if value:
+                entry[key] = value
+            else:
+                entry.pop(key, None)
+            changed = True
+    return changed
+
+def update_body_hash(entry, body_hash):
+    """
+    Stores the raw body digest of a spec response on a links entry.
 
     Args:
-        data (dict): The JSON object.
+        entry (dict): The links file entry.
+        body_hash (str): The SHA-256 hex digest of the raw response body.
 
     Returns:
-        str: The hash of the JSON object.
+        bool: True if the stored digest changed, False otherwise.
     """
-    json_str = json.dumps(data, sort_keys=True)
-    return hashlib.sha256(json_str.encode()).hexdigest()
+    if entry.get('body_hash') == body_hash:
+        return False
+    entry['body_hash'] = body_hash
+    return True
 
 
 def create_collection_from_file(json_file_path, api_key):
@@ -111,16 +158,33 @@ def create_collection_from_file(json_file_path, api_key):
     Returns:
         str: The ID of the created Postman collection if successful, None otherwise.
     """
-    with open(json_file_path, 'rb') as file:
-        json_data = json.load(file)
+    json_data = codec.read_file(json_file_path)
+    logging.debug(f"Attempting to create Postman collection with JSON file: {json_file_path}")
+    return create_collection(json_data, api_key)
 
-    # Modify the collection name to include "Latest" and the datetime
+def mark_latest(json_data):
+    """
+    Appends "Latest" and the current datetime to the name of a collection about to be published.
+    """
     current_datetime = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
     if 'info' in json_data['collection'] and 'name' in json_data['collection']['info']:
         original_name = json_data['collection']['info']['name']
         json_data['collection']['info']['name'] = f"{original_name} Latest {current_datetime}"
 
-    import_url = "https://api.getpostman.com/collections"
+def create_collection(json_data, api_key):
+    """
+    Creates a Postman collection from collection JSON and returns the collection ID.
+
+    Args:
+        json_data (dict): The Postman collection JSON.
+        api_key (str): The Postman API key.
+
+    Returns:
+        str: The ID of the created Postman collection if successful, None otherwise.
+    """
+    mark_latest(json_data)
+
+    import_url = api_url("/collections")
     headers = {
         'X-Api-Key': api_key,
         'Content-Type': 'application/json'
@@ -130,12 +194,11 @@ def create_collection_from_file(json_file_path, api_key):
     }
 
     try:
-        logging.debug(f"Attempting to create Postman collection with JSON file: {json_file_path}")
-        response = requests.post(import_url, headers=headers, json=data)
+        logging.debug("Attempting to create Postman collection.")
+        response = transport.post(import_url, headers=headers, data=codec.dumps(data))
 
         if response.status_code == 200:
-            response_json = response.json()
-            logging.debug(f"Import Response JSON: {json.dumps(response_json, indent=4)}")
+            response_json = codec.response_json(response)
             if 'collection' in response_json and len(response_json['collection']) > 0:
                 collection_id = response_json['collection'].get('uid')
                 logging.info(f"Successfully created Postman collection with ID: {collection_id}")
@@ -146,108 +209,619 @@ def create_collection_from_file(json_file_path, api_key):
         else:
             logging.error(f"Failed to create Postman collection. Status code: {response.status_code}, Response: {response.text}")
             return None
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         logging.error(f"Request to create Postman collection failed: {e}")
         return None
 
-def main_code():
+def build_collection_json(link, spec, api_key, converter='postman', spec_hash=None, link_journal=None, spec_body=None):
+    """
+    Converts a downloaded spec into Postman collection JSON.
+
+    The 'postman' converter imports the spec into a temporary collection, fetches
+    it and deletes it again. The 'local' converter builds the same item tree
+    offline without any Postman API calls. When the collection cache is enabled,
+    a spec that was converted before, behind any link, is not converted again.
+
+    Args:
+        link (str): The Swagger JSON link.
+        spec (dict): The downloaded spec.
+        api_key (str): The Postman API key.
+        converter (str): Either 'postman' or 'local'.
+        spec_hash (str, optional): The hash_json of the spec, if already calculated.
+        link_journal (journal.LinkJournal, optional): Records the temporary collection until it is deleted.
+        spec_body (download.SpecBody, optional): The downloaded body of the spec, sent as is by the 'postman' converter.
+
+    Returns:
+        dict: The Postman collection JSON if successful, None otherwise.
+    """
+    cache = collection_cache.active()
+    if cache is None:
+        return convert_collection(link, spec, api_key, converter, link_journal, spec_body)
+    if spec_hash is None:
+        spec_hash = hash_json(spec)
+    return cache.get_or_build(spec_hash, converter, lambda: convert_collection(link, spec, api_key, converter, link_journal, spec_body))
+
+def convert_collection(link, spec, api_key, converter='postman', link_journal=None, spec_body=None):
+    """
+    Converts a spec with the given converter, bypassing the collection cache.
+    """
+    if converter == 'local':
+        return convert_spec(spec)
+
+    new_collection_id = create_collection_json(link, api_key, spec, spec_body)
+    if not new_collection_id:
+        logging.error("Failed to create a new collection from the link.")
+        return None
+    try:
+        if link_journal is not None:
+            link_journal.add_temporary(new_collection_id)
+        new_collection_json = get_collection_json(new_collection_id, api_key)
+        if not new_collection_json:
+            logging.error("Failed to fetch the new collection JSON.")
+    finally:
+        # Also deleted when the link's time budget ran out during the fetch
+        with transport.grace_period():
+            if cleanup_collection(new_collection_id, api_key) and link_journal is not None:
+                link_journal.remove_temporary(new_collection_id)
+    return new_collection_json
+
+def sync_link(entry, api_key, converter='postman', artifacts_dir=None, update_mode='new'):
+    """
+    Checks a single links file entry for changes and updates its collection.
+
+    The entry is updated in place when a new collection is created.
+
+    Args:
+        entry (dict): The links file entry to process.
+        api_key (str): The Postman API key.
+        converter (str): How the spec is converted to a collection, either 'postman' or 'local'.
+        artifacts_dir (str, optional): Directory to write the new, old and updated collection JSON to for debugging.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+
+    Returns:
+        bool: True if the entry was updated, False otherwise.
+    """
+    with metrics.link_context(entry['link']):
+        return _sync_link(entry, api_key, converter, artifacts_dir, update_mode)
+
+def _sync_link(entry, api_key, converter, artifacts_dir, update_mode):
+    old_collection_uid = entry['Collection UID']
+    link = entry['link']
+    logging.debug(f"Processing link: {link} with old collection UID: {old_collection_uid}")
+
+    try:
+        with metrics.stage('download'):
+            # The body is digested while it streams in and spooled to disk past the memory ceiling
+            try:
+                response, body = download.download_spec(link, conditional_headers(entry))
+            except (transport.RequestException, transport.DeadlineExceeded):
+                record_download(entry, None)
+                raise
+        record_download(entry, response.status_code)
+        if response.status_code == 304:
+            logging.info("Spec not modified. Moving on to the next object.")
+            return False
+        elif response.status_code == 200:
+            body_hash = body.sha256
+            # The body stays open for the import, which sends it instead of encoding the parsed spec again
+            with body:
+                if body_hash == entry.get('body_hash'):
+                    logging.info("Spec body unchanged. Moving on to the next object.")
+                    return update_validators(entry, response)
+                with metrics.stage('parse'):
+                    new_json = body.parse()
+                with metrics.stage('hash'):
+                    new_hash = hash_json(new_json)
+                if new_hash == entry['hash']:
+                    logging.info("No changes found. Moving on to the next object.")
+                    validators_changed = update_validators(entry, response)
+                    return update_body_hash(entry, body_hash) or validators_changed
+                logging.info("Changes detected. Comparing operations.")
+                with metrics.stage('fingerprint'):
+                    new_operations = operation_fingerprints(new_json)
+                if 'operations' in entry:
+                    changes = diff_operations(entry['operations'], new_operations)
+                    if not has_changes(changes):
+                        logging.info("No changes to operations. Skipping the collection update.")
+                        entry['hash'] = new_hash
+                        update_body_hash(entry, body_hash)
+                        update_validators(entry, response)
+                        return True
+                    logging.info(f"Operations changed: {len(changes['added'])} added, {len(changes['removed'])} removed, {len(changes['modified'])} modified.")
+                latest_collection_id = sync_collection(link, new_json, old_collection_uid, api_key, converter, artifacts_dir, update_mode, spec_hash=new_hash, spec_body=body)
+                if latest_collection_id:
+                    entry['Collection UID'] = latest_collection_id
+                    entry['hash'] = new_hash
+                    entry['operations'] = new_operations
+                    entry['Last Date Updated'] = datetime.now().isoformat()
+                    update_body_hash(entry, body_hash)
+                    update_validators(entry, response)
+                    logging.info("Collection updated successfully.")
+                    return True
+        else:
+            logging.error(f"Failed to download JSON from link. Status code: {response.status_code}, Response: {download.error_excerpt(response)}")
+
+    except download.SpecTooLarge as e:
+        logging.error(f"Skipping the spec: {e}")
+    except transport.RequestException as e:
+        logging.error(f"Request to download JSON failed: {e}")
+    return False
+
+def sync_collection(link, spec, old_collection_uid, api_key, converter='postman', artifacts_dir=None, update_mode='new', spec_hash=None, spec_body=None):
+    """
+    Builds a collection for a spec, carries over the tests of the old collection and publishes the result.
+
+    The 'new' update mode publishes the result as a new "<name> Latest <datetime>"
+    collection. 'replace' overwrites the old collection in place with a single PUT,
+    and 'items' only creates, updates and deletes the requests that changed, so the
+    collection keeps its UID and the upload scales with the size of the diff.
+
+    Args:
+        link (str): The Swagger JSON link.
+        spec (dict): The downloaded spec.
+        old_collection_uid (str): The UID of the collection holding the current tests.
+        api_key (str): The Postman API key.
+        converter (str): How the spec is converted to a collection, either 'postman' or 'local'.
+        artifacts_dir (str, optional): Directory to write the new, old and updated collection JSON to for debugging.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+        spec_hash (str, optional): The hash_json of the spec, if already calculated.
+        spec_body (download.SpecBody, optional): The downloaded body of the spec, if it is still open.
+
+    Returns:
+        str: The ID of the published collection if successful, None otherwise.
+    """
+    link_journal = open_journal(link, spec, spec_hash)
+    if link_journal is not None and link_journal.completed('publish'):
+        logging.info("The collection was already published by an interrupted sync.")
+        return link_journal.completed('publish')
+
+    with metrics.stage('convert'):
+        new_collection_json = link_journal.completed_collection('convert') if link_journal is not None else None
+        if new_collection_json is None:
+            new_collection_json = build_collection_json(link, spec, api_key, converter, spec_hash, link_journal, spec_body)
+            # Checkpointed before the merge changes the collection in place
+            if new_collection_json and link_journal is not None:
+                link_journal.checkpoint_collection('convert', new_collection_json)
+    if not new_collection_json:
+        return None
+
+    with metrics.stage('fetch_old'):
+        old_collection_json = fetch_old_collection(old_collection_uid, api_key, update_mode)
+    if not old_collection_json:
+        logging.error("Failed to fetch the old collection JSON.")
+        return None
+
+    write_artifacts(artifacts_dir, link, {NEW_JSON_FILE: new_collection_json, OLD_JSON_FILE: old_collection_json})
+    with metrics.stage('merge'):
+        updated_collection_json, stats = merge_collections(old_collection_json, new_collection_json)
+    record_merge(stats)
+    write_artifacts(artifacts_dir, link, {UPDATED_JSON_FILE: updated_collection_json})
+
+    with metrics.stage('publish'):
+        latest_collection_id = publish_collection(old_collection_uid, old_collection_json, updated_collection_json, api_key, update_mode)
+    if latest_collection_id and link_journal is not None:
+        link_journal.checkpoint('publish', latest_collection_id)
+    record_snapshot(old_collection_uid, latest_collection_id, updated_collection_json, api_key, update_mode)
+    return latest_collection_id
+
+def record_merge(stats):
+    """
+    Logs and counts what a merge_collections call carried over.
+    """
+    metrics.incr(metrics.ENDPOINTS_MERGED, stats['updated_count'])
+    metrics.incr(metrics.EVENTS_MERGED, stats['updated_events_count'])
+    for rule, count in stats['match_rules'].items():
+        metrics.incr(metrics.ENDPOINTS_MATCHED_BY + rule, count)
+    logging.info(f"Carried over {stats['updated_events_count']} events to {stats['updated_count']} of {stats['old_endpoints_count']} endpoints.")
+    fallback_matches = {rule: count for rule, count in stats['match_rules'].items() if rule != 'exact' and count}
+    if fallback_matches:
+        logging.info(f"Endpoints matched despite a changed URL: {fallback_matches}")
+
+def open_journal(link, spec, spec_hash=None):
+    """
+    Returns the journal of a link's sync when journaling is enabled, resuming an interrupted sync of the same spec.
+    """
+    sync_journal = journal.active()
+    if sync_journal is None:
+        return None
+    return sync_journal.open(link, spec_hash or hash_json(spec))
+
+def finish_journal(link):
+    """
+    Drops the checkpoints of a link once its updated entry is stored.
+    """
+    sync_journal = journal.active()
+    if sync_journal is not None:
+        sync_journal.finish(link)
+
+def record_download(entry, status_code):
+    """
+    Records the outcome of a spec download for the failure backoff, when it is enabled.
+
+    Args:
+        entry (dict): The links file entry whose spec was downloaded.
+        status_code (int): The response status code, or None if no response arrived.
+    """
+    circuit_breaker = breaker.active()
+    if circuit_breaker is not None:
+        circuit_breaker.record(entry, status_code)
+
+def sweep_orphans(api_key):
+    """
+    Deletes temporary collections that interrupted syncs left behind, when journaling is enabled.
+    """
+    sync_journal = journal.active()
+    if sync_journal is not None:
+        deleted = sync_journal.sweep(api_key)
+        if deleted:
+            logging.info(f"Deleted {deleted} orphaned temporary collections.")
+
+def fetch_old_collection(collection_uid, api_key, update_mode='new'):
+    """
+    Returns the collection holding the current tests, from the local snapshot if Postman confirms it is unchanged.
+
+    The 'items' update mode needs the request IDs Postman assigned, which a
+    snapshot of the uploaded JSON lacks, so it always downloads the collection.
+
+    Args:
+        collection_uid (str): The collection UID.
+        api_key (str): The Postman API key.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+
+    Returns:
+        dict: The collection JSON if successful, None otherwise.
+    """
+    store = snapshots.active()
+    if store is not None and update_mode != 'items':
+        snapshot = store.load(collection_uid, api_key)
+        if snapshot is not None:
+            logging.info(f"Using the local snapshot of collection {collection_uid}.")
+            return snapshot
+    return get_collection_json(collection_uid, api_key)
+
+def record_snapshot(old_collection_uid, latest_collection_id, updated_collection_json, api_key, update_mode='new'):
+    """
+    Stores a snapshot of a collection that was just published, and drops the snapshot of the collection it replaced.
+    """
+    store = snapshots.active()
+    if store is None or not latest_collection_id:
+        return
+    if latest_collection_id != old_collection_uid or update_mode == 'items':
+        store.discard(old_collection_uid)
+    if update_mode != 'items':
+        store.save(latest_collection_id, updated_collection_json, api_key)
+
+def publish_collection(old_collection_uid, old_collection_json, updated_collection_json, api_key, update_mode='new'):
+    """
+    Publishes a merged collection according to the update mode.
+
+    Args:
+        old_collection_uid (str): The UID of the collection holding the current tests.
+        old_collection_json (dict): The old collection JSON.
+        updated_collection_json (dict): The merged collection JSON.
+        api_key (str): The Postman API key.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+
+    Returns:
+        str: The ID of the published collection if successful, None otherwise.
+    """
+    if update_mode == 'items':
+        if patch_collection(old_collection_uid, old_collection_json, updated_collection_json, api_key):
+            return old_collection_uid
+        logging.error("Failed to patch the collection.")
+        return None
+    if update_mode == 'replace':
+        updated_collection_json['collection']['info']['name'] = old_collection_json['collection']['info']['name']
+        if update_collection(old_collection_uid, updated_collection_json, api_key):
+            return old_collection_uid
+        logging.error("Failed to update the collection.")
+        return None
+
+    latest_collection_id = create_collection(updated_collection_json, api_key)
+    if not latest_collection_id:
+        logging.error("Failed to create the latest collection.")
+    return latest_collection_id
+
+def patch_collection(collection_id, old_collection_json, updated_collection_json, api_key):
+    """
+    Applies only the changed requests of the updated collection to the published one.
+
+    Added requests are created in the closest existing folder, modified requests
+    are updated without touching their tests, and removed requests are deleted.
+    If the published requests carry no IDs, the whole collection is replaced instead.
+
+    Args:
+        collection_id (str): The ID of the published Postman collection.
+        old_collection_json (dict): The published collection JSON, as fetched from Postman.
+        updated_collection_json (dict): The merged collection JSON.
+        api_key (str): The Postman API key.
+
+    Returns:
+        bool: True if every change was applied, False otherwise.
+    """
+    old_items = old_collection_json['collection']['item']
+    changes = diff_collections(old_items, updated_collection_json['collection']['item'])
+    logging.info(f"Patching collection {collection_id}: {len(changes['added'])} added, {len(changes['modified'])} modified, {len(changes['removed'])} removed requests.")
+
+    changed_old_items = changes['removed'] + [old_item for old_item, _ in changes['modified']]
+    if any('id' not in old_item for old_item in changed_old_items):
+        logging.warning("Published requests have no IDs. Replacing the whole collection instead.")
+        updated_collection_json['collection']['info']['name'] = old_collection_json['collection']['info']['name']
+        return update_collection(collection_id, updated_collection_json, api_key)
+
+    folders = index_folders(old_items)
+    applied = True
+    for old_item in changes['removed']:
+        applied = delete_request(collection_id, old_item['id'], api_key) and applied
+    for old_item, new_item in changes['modified']:
+        applied = update_request(collection_id, old_item['id'], new_item, api_key) and applied
+    for new_item, path in changes['added']:
+        while path and path not in folders:
+            path = path[:-1]
+        folder_id = folders[path].get('id') if path else None
+        applied = create_request(collection_id, new_item, api_key, folder_id) and applied
+    return applied
+
+def write_artifacts(artifacts_dir, link, collections):
+    """
+    Writes intermediate collection JSON files for a link when an artifacts directory is configured.
+
+    Each link gets its own subdirectory, so concurrent syncs do not overwrite each other.
+
+    Args:
+        artifacts_dir (str): The artifacts directory, or None to skip writing.
+        link (str): The Swagger JSON link.
+        collections (dict): File names mapped to the collection JSON to write.
+    """
+    if not artifacts_dir:
+        return
+    link_dir = os.path.join(artifacts_dir, hashlib.sha256(link.encode()).hexdigest()[:16])
+    os.makedirs(link_dir, exist_ok=True)
+    for file_name, collection_json in collections.items():
+        codec.write_file(os.path.join(link_dir, file_name), collection_json)
+        logging.debug(f"Wrote {file_name} for {link} to {link_dir}")
+
+def main_code(workers=1, max_per_host=None, state=None, link_budget=None, run_deadline=None, **sync_options):
     """
     Main code execution function that processes all objects in the links file.
+
+    With more than one worker, independent links are synced in parallel. Each
+    link is still handled exactly as in a sequential run; only the order in
+    which links finish changes.
+
+    Args:
+        workers (int): The number of links to sync concurrently.
+        max_per_host (int, optional): The maximum number of links synced concurrently per spec host.
+        state (StateBackend, optional): Where the links are stored. Defaults to the links file.
+        link_budget (float, optional): Seconds each link may take across all of its stages.
+        run_deadline (float, optional): Seconds the whole run may take. Links not started by then are skipped.
+        **sync_options: Passed through to sync_link for every link.
+
+    Returns:
+        dict: The links cancelled for running out of time ('timed_out'), the links never started ('skipped')
+        and the links skipped after earlier failed downloads ('backed_off').
     """
     logging.info("Executing main_code function.")
-    links = load_links()
+    if state is None:
+        state = JsonFileState(LINKS_FILE)
     api_key = load_api_key()
-    
-    for entry in links:
-        old_collection_uid = entry['Collection UID']
-        link = entry['link']
-        logging.debug(f"Processing link: {link} with old collection UID: {old_collection_uid}")
+    if workers > 1:
+        transport.configure(pool_maxsize=workers)
+    deadline_at = time.monotonic() + run_deadline if run_deadline is not None else None
+    return sync_entries(state.entries(), api_key, state, workers, max_per_host, link_budget=link_budget, deadline_at=deadline_at, **sync_options)
+
+def sync_entries(entries, api_key, state, workers=1, max_per_host=None, link_budget=None, deadline_at=None, **sync_options):
+    """
+    Syncs a batch of links file entries, storing every updated entry.
 
+    A link that fails with an unexpected error, or runs out of time, is logged
+    and does not stop the rest of the batch. The connection pool is not resized
+    here, since the daemon calls this for every batch: callers running several
+    workers size it once, as main_code and run_daemon do.
+
+    Args:
+        entries (list): The links file entries to sync.
+        api_key (str): The Postman API key.
+        state (StateBackend): Where updated entries are stored.
+        workers (int): The number of links to sync concurrently.
+        max_per_host (int, optional): The maximum number of links synced concurrently per spec host.
+        link_budget (float, optional): Seconds each link may take across all of its stages.
+        deadline_at (float, optional): The time.monotonic() time after which no link is started and running links are cancelled.
+        **sync_options: Passed through to sync_link for every link.
+
+    Returns:
+        dict: The links cancelled for running out of time ('timed_out'), the links never started ('skipped')
+        and the links skipped after earlier failed downloads ('backed_off').
+    """
+    report = {'timed_out': [], 'skipped': [], 'backed_off': []}
+    circuit_breaker = breaker.active()
+
+    def sync_within_budget(entry):
+        link = entry['link']
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            report['skipped'].append(link)
+            return False
+        if circuit_breaker is not None and not circuit_breaker.allow(entry):
+            logging.debug(f"Skipping {link} while it or its host is backing off.")
+            report['backed_off'].append(link)
+            return False
         try:
-            response = requests.get(link)
-            if response.status_code == 200:
-                new_json = response.json()
-                new_hash = hash_json(new_json)
-                if new_hash == entry['hash']:
-                    logging.info("No changes found. Moving on to the next object.")
-                    continue
-                else:
-                    logging.info("Changes detected. Updating the collection.")
-                    new_collection_id = create_collection_json(link, api_key)
-                    if new_collection_id:
-                        new_collection_json = get_collection_json(new_collection_id, api_key)
-                        with open(NEW_JSON_FILE, 'w') as new_file:
-                            json.dump(new_collection_json, new_file, indent=4)
-
-                        cleanup_collection(new_collection_id, api_key)
-
-                        old_collection_json = get_collection_json(old_collection_uid, api_key)
-                        with open(OLD_JSON_FILE, 'w') as old_file:
-                            json.dump(old_collection_json, old_file, indent=4)
-
-                        update_main(OLD_JSON_FILE, NEW_JSON_FILE, UPDATED_JSON_FILE)
-
-                        latest_collection_id = create_collection_from_file(UPDATED_JSON_FILE, api_key)
-
-                        if latest_collection_id:
-                            entry['Collection UID'] = latest_collection_id
-                            entry['hash'] = new_hash
-                            entry['Last Date Updated'] = datetime.now().isoformat()
-                            save_links(links)
-                            logging.info("Collection updated successfully.")
-                        else:
-                            logging.error("Failed to create the latest collection.")
-            else:
-                logging.error(f"Failed to download JSON from link. Status code: {response.status_code}, Response: {response.text}")
+            with transport.deadline(link_budget, at=deadline_at):
+                updated = sync_link(entry, api_key, **sync_options)
+        except transport.DeadlineExceeded as e:
+            logging.warning(f"Sync of {link} cancelled: {e}")
+            report['timed_out'].append(link)
+            return False
+        finally:
+            if circuit_breaker is not None:
+                circuit_breaker.release(entry)
+        if updated:
+            state.update(entry)
+            finish_journal(link)
+        return updated
+
+    if workers <= 1:
+        for entry in entries:
+            try:
+                sync_within_budget(entry)
+            except Exception as e:
+                logging.error(f"Sync of {entry['link']} failed: {e}")
+        report_skipped_links(report)
+        return report
+
+    links_lock = threading.Lock()
+    host_slots = {}
+
+    def host_slot(link):
+        host = urlparse(link).netloc
+        with links_lock:
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(max_per_host or workers)
+            return host_slots[host]
+
+    def run(entry):
+        # The budget starts once the link holds its host slot
+        with host_slot(entry['link']):
+            return sync_within_budget(entry)
+
+    logging.info(f"Syncing {len(entries)} links with {workers} workers.")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, entry): entry['link'] for entry in entries}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Sync of {futures[future]} failed: {e}")
+    report_skipped_links(report)
+    return report
+
+def report_skipped_links(report):
+    """
+    Logs and counts the links that a sync_entries batch cancelled, skipped for running out of time, or backed off from.
+    """
+    metrics.incr(metrics.LINKS_TIMED_OUT, len(report['timed_out']))
+    metrics.incr(metrics.LINKS_SKIPPED, len(report['skipped']))
+    metrics.incr(metrics.LINKS_BACKED_OFF, len(report['backed_off']))
+    if report['timed_out']:
+        logging.warning(f"{len(report['timed_out'])} links ran out of time and were cancelled: {', '.join(report['timed_out'])}")
+    if report['skipped']:
+        logging.warning(f"{len(report['skipped'])} links were not checked before the run deadline: {', '.join(report['skipped'])}")
+    if report['backed_off']:
+        logging.info(f"{len(report['backed_off'])} links skipped after earlier failed downloads.")
+
+def run_daemon(state, api_key, workers=1, max_per_host=None, scheduler=None, stop_event=None, metrics_json=None, metrics_prom=None, link_budget=None, **sync_options):
+    """
+    Keeps polling the stored links, each on its own adaptive schedule, until stopped.
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Request to download JSON failed: {e}")
+    Links are re-read from the state before every batch, so with the SQLite
+    state, links added by another process are picked up without a restart. A link whose spec hash
+    changed is polled at the scheduler's minimum interval again; unchanged
+    links back off towards its maximum interval.
 
-def new_entry(api_key, link):
+    Args:
+        state (StateBackend): Where the links are stored.
+        api_key (str): The Postman API key.
+        workers (int): The number of links to sync concurrently.
+        max_per_host (int, optional): The maximum number of links synced concurrently per spec host.
+        scheduler (LinkScheduler, optional): Decides when each link is polled. Defaults to the scheduler defaults.
+        stop_event (threading.Event, optional): Set to stop the daemon after the current batch.
+        metrics_json (str, optional): The JSON metrics file to rewrite after every batch.
+        metrics_prom (str, optional): The Prometheus textfile to rewrite after every batch.
+        link_budget (float, optional): Seconds each link may take across all of its stages.
+        **sync_options: Passed through to sync_link for every link.
+    """
+    scheduler = scheduler or LinkScheduler()
+    stop_event = stop_event or threading.Event()
+    if workers > 1:
+        transport.configure(pool_maxsize=workers)
+    logging.info("Starting the sync daemon.")
+
+    while not stop_event.is_set():
+        entries = {entry['link']: entry for entry in state.entries()}
+        scheduler.track(entries.values(), time.time())
+        due = [entries[link] for link in scheduler.pop_due(time.time())]
+        if due:
+            logging.info(f"Polling {len(due)} of {len(entries)} links.")
+            old_hashes = {entry['link']: entry['hash'] for entry in due}
+            run_metrics = metrics.start_run()
+            sweep_orphans(api_key)
+            sync_entries(due, api_key, state, workers, max_per_host, link_budget=link_budget, **sync_options)
+            run_metrics.finish()
+            export_metrics(run_metrics, metrics_json, metrics_prom)
+            now = time.time()
+            for entry in due:
+                scheduler.reschedule(entry['link'], entry['hash'] != old_hashes[entry['link']], now)
+
+        wait = scheduler.seconds_until_next(time.time())
+        stop_event.wait(min(wait, DAEMON_MAX_SLEEP) if wait is not None else DAEMON_MAX_SLEEP)
+    logging.info("Sync daemon stopped.")
+
+def new_entry(api_key, link, state=None):
     """
     Handles new entries without a collection UID.
     
     Args:
         api_key (str): The Postman API key.
         link (str): The Swagger JSON link.
+        state (StateBackend, optional): Where the links are stored. Defaults to the links file.
     """
     logging.info(f"Executing new_entry function for link: {link}")
 
     try:
         # Download the JSON from the link
         logging.debug(f"Attempting to download JSON from: {link}")
-        response = requests.get(link)
+        with metrics.stage('download'):
+            response, body = download.download_spec(link)
         if response.status_code == 200:
-            json_data = response.json()
+            try:
+                json_data = body.parse()
+            except BaseException:
+                body.close()
+                raise
             json_hash = hash_json(json_data)
             logging.info("Successfully downloaded and hashed JSON.")
         else:
-            logging.error(f"Failed to download JSON. Status code: {response.status_code}, Response: {response.text}")
+            logging.error(f"Failed to download JSON. Status code: {response.status_code}, Response: {download.error_excerpt(response)}")
             return
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request to download JSON failed: {e}")
+    except download.SpecTooLarge as e:
+        logging.error(f"Skipping the spec: {e}")
         return
-
-    # Create a new collection with the downloaded JSON
-    new_collection_id = create_collection_json(link, api_key)
-    if not new_collection_id:
-        logging.error("Failed to create a new collection from the link.")
+    except transport.RequestException as e:
+        logging.error(f"Request to download JSON failed: {e}")
         return
 
-    # Create a new items object and add it to links.json
-    new_entry = {
-        "link": link,
-        "hash": json_hash,
-        "Collection UID": new_collection_id,
-        "Last Date Updated": datetime.now().isoformat()
-    }
-
-    links = load_links()
-    links.append(new_entry)
-    save_links(links)
-    logging.info(f"New entry added to links.json: {new_entry}")
-
-def new_with_existing_collection(api_key, link, old_collection_uid):
+    # The body stays open for the import, which sends it instead of encoding the parsed spec again
+    with body:
+        # Create a new collection with the downloaded JSON, unless an interrupted run already did
+        link_journal = open_journal(link, json_data, json_hash)
+        new_collection_id = link_journal.completed('import') if link_journal is not None else None
+        if new_collection_id is None:
+            with metrics.stage('convert'):
+                new_collection_id = create_collection_json(link, api_key, json_data, body)
+            if not new_collection_id:
+                logging.error("Failed to create a new collection from the link.")
+                return
+            if link_journal is not None:
+                link_journal.checkpoint('import', new_collection_id)
+
+        # Create a new items object and add it to links.json
+        new_entry = {
+            "link": link,
+            "hash": json_hash,
+            "Collection UID": new_collection_id,
+            "Last Date Updated": datetime.now().isoformat(),
+            "operations": operation_fingerprints(json_data),
+            "body_hash": body.sha256
+        }
+        update_validators(new_entry, response)
+
+        if state is None:
+            state = JsonFileState(LINKS_FILE)
+        state.add(new_entry)
+        finish_journal(link)
+        logging.info(f"New entry added to links.json for {link} with collection UID: {new_entry['Collection UID']}")
+
+def new_with_existing_collection(api_key, link, old_collection_uid, converter='postman', artifacts_dir=None, update_mode='new', state=None):
     """
     Handles new entries with an existing collection UID.
 
@@ -255,103 +829,175 @@ def new_with_existing_collection(api_key, link, old_collection_uid):
         api_key (str): The Postman API key.
         link (str): The Swagger JSON link.
         old_collection_uid (str): The existing Postman collection UID.
+        converter (str): How the spec is converted to a collection, either 'postman' or 'local'.
+        artifacts_dir (str, optional): Directory to write the new, old and updated collection JSON to for debugging.
+        update_mode (str): How changes are published, one of 'new', 'replace' or 'items'.
+        state (StateBackend, optional): Where the links are stored. Defaults to the links file.
     """
     logging.info(f"Executing new_with_existing_collection function for link: {link} and collection UID: {old_collection_uid}")
 
     try:
         # Download the JSON from the link
         logging.debug(f"Attempting to download JSON from: {link}")
-        response = requests.get(link)
+        with metrics.stage('download'):
+            response, body = download.download_spec(link)
         if response.status_code == 200:
-            json_data = response.json()
+            try:
+                json_data = body.parse()
+            except BaseException:
+                body.close()
+                raise
             json_hash = hash_json(json_data)
             logging.info("Successfully downloaded and hashed JSON.")
         else:
-            logging.error(f"Failed to download JSON. Status code: {response.status_code}, Response: {response.text}")
+            logging.error(f"Failed to download JSON. Status code: {response.status_code}, Response: {download.error_excerpt(response)}")
             return
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request to download JSON failed: {e}")
-        return
-
-    # Create a new collection with the downloaded JSON
-    new_collection_id = create_collection_json(link, api_key)
-    if not new_collection_id:
-        logging.error("Failed to create a new collection from the link.")
-        return
-
-    # Get the JSON of the newly created collection and store it in new.json
-    new_collection_json = get_collection_json(new_collection_id, api_key)
-    if not new_collection_json:
-        logging.error("Failed to fetch the new collection JSON.")
-        cleanup_collection(new_collection_id, api_key)
-        return
-
-    with open(NEW_JSON_FILE, 'w') as new_file:
-        json.dump(new_collection_json, new_file, indent=4)
-    logging.info(f"New collection JSON stored in {NEW_JSON_FILE}")
-
-    # Clean up the newly created collection
-    cleanup_collection(new_collection_id, api_key)
-
-    # Get the JSON of the old collection and store it in old.json
-    old_collection_json = get_collection_json(old_collection_uid, api_key)
-    if not old_collection_json:
-        logging.error("Failed to fetch the old collection JSON.")
+    except download.SpecTooLarge as e:
+        logging.error(f"Skipping the spec: {e}")
         return
-
-    with open(OLD_JSON_FILE, 'w') as old_file:
-        json.dump(old_collection_json, old_file, indent=4)
-    logging.info(f"Old collection JSON stored in {OLD_JSON_FILE}")
-
-    # Run the main function from endpoint_transfer.py to update the collection
-    update_main(OLD_JSON_FILE, NEW_JSON_FILE, UPDATED_JSON_FILE)
-    logging.info(f"Updated JSON stored in {UPDATED_JSON_FILE}")
-
-    # Create a new collection with the updated JSON
-    latest_collection_id = create_collection_from_file(UPDATED_JSON_FILE, api_key)
-    if not latest_collection_id:
-        logging.error("Failed to create the latest collection.")
+    except transport.RequestException as e:
+        logging.error(f"Request to download JSON failed: {e}")
         return
 
-    # Create a new items object and add it to links.json
-    new_entry = {
-        "link": link,
-        "hash": json_hash,
-        "Collection UID": latest_collection_id,
-        "Last Date Updated": datetime.now().isoformat()
-    }
+    # The body stays open for the import, which sends it instead of encoding the parsed spec again
+    with body:
+        # Build the new collection, carry over the tests of the old one and publish it
+        latest_collection_id = sync_collection(link, json_data, old_collection_uid, api_key, converter, artifacts_dir, update_mode, spec_hash=json_hash, spec_body=body)
+        if not latest_collection_id:
+            return
 
-    links = load_links()
-    links.append(new_entry)
-    save_links(links)
-    logging.info(f"New entry added to links.json: {new_entry}")
+        # Create a new items object and add it to links.json
+        new_entry = {
+            "link": link,
+            "hash": json_hash,
+            "Collection UID": latest_collection_id,
+            "Last Date Updated": datetime.now().isoformat(),
+            "operations": operation_fingerprints(json_data),
+            "body_hash": body.sha256
+        }
+        update_validators(new_entry, response)
+
+        if state is None:
+            state = JsonFileState(LINKS_FILE)
+        state.add(new_entry)
+        finish_journal(link)
+        logging.info(f"New entry added to links.json for {link} with collection UID: {new_entry['Collection UID']}")
 
 def main():
     parser = argparse.ArgumentParser(description="Manage Postman collections with Swagger JSON links.")
+    parser.add_argument("command", nargs="?", choices=COMMANDS, default='sync', help="Sync all links once (default), or keep running and poll each link on its own schedule.")
     parser.add_argument("-l", "--link", help="The URL of the Swagger JSON.")
     parser.add_argument("-c", "--collection_id", help="The ID of the existing Postman collection.")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of links to sync concurrently.")
+    parser.add_argument("--converter", choices=CONVERTERS, default='postman', help="Convert specs with the Postman import API or locally without API calls.")
+    parser.add_argument("--artifacts-dir", help="Write the new, old and updated collection JSON of each sync to this directory.")
+    parser.add_argument("--update-mode", choices=UPDATE_MODES, default='new', help="Publish changes as a new collection, replace the tracked collection in place, or patch only the changed requests.")
+    parser.add_argument("--max-per-host", type=int, help="Maximum number of links synced concurrently per spec host.")
+    parser.add_argument("--state", default=LINKS_FILE, help="Where the links are stored: a JSON file, or an SQLite database (.db/.sqlite) that links.json is migrated into on first use.")
+    parser.add_argument("--metrics-json", help="Write a JSON summary of per-link stage timings and counters to this file.")
+    parser.add_argument("--metrics-prom", help="Write the run metrics in Prometheus text format to this file, e.g. for the node exporter's textfile collector.")
+    parser.add_argument("--requests-per-minute", type=int, help="Global cap on HTTP requests per minute, including retries. The daemon also stretches poll intervals to fit it.")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="Daemon: shortest poll interval of a link, in seconds.")
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL, help="Daemon: longest poll interval of a link whose spec keeps not changing, in seconds.")
+    parser.add_argument("--max-spec-memory", type=float, help=f"MiB of a downloaded spec kept in memory before it is spooled to a temporary file. Defaults to {download.MAX_IN_MEMORY // 2 ** 20}.")
+    parser.add_argument("--max-spec-size", type=float, help="Skip specs larger than this many MiB instead of downloading them in full.")
+    parser.add_argument("--cache-dir", help="Cache converted collections in this directory, so identical specs behind several links, or seen in earlier runs, skip the conversion.")
+    parser.add_argument("--cache-size", type=float, default=collection_cache.DEFAULT_MAX_BYTES / 2 ** 20, help="Size limit of the collection cache in MiB. The least recently used entries are evicted first.")
+    parser.add_argument("--snapshot-dir", help="Keep a copy of every published collection in this directory, and use it instead of downloading the collection again while Postman reports it unchanged.")
+    parser.add_argument("--journal-dir", help="Checkpoint every sync stage in this directory, so an interrupted sync resumes where it stopped and its temporary collections are deleted later.")
+    parser.add_argument("--connect-timeout", type=float, default=transport.CONNECT_TIMEOUT, help="Seconds to wait for a connection to a spec host or the Postman API.")
+    parser.add_argument("--read-timeout", type=float, default=transport.READ_TIMEOUT, help="Seconds to wait between bytes of a response before giving up on it.")
+    parser.add_argument("--link-budget", type=float, help="Seconds each link may take across all of its requests and retries. A link over budget is cancelled and reported, and the others keep syncing.")
+    parser.add_argument("--run-deadline", type=float, help="Seconds a sync run may take. Running links are cancelled and links not started yet are skipped once it passes.")
+    parser.add_argument("--failure-threshold", type=int, default=breaker.FAILURE_THRESHOLD, help="Failed spec downloads in a row after which a host's links are skipped for a growing window, until a single probe succeeds. 0 turns off the failure backoff.")
+    parser.add_argument("--api-url", help="Base URL of the Postman API, e.g. a local fake_postman server. Defaults to $POSTMAN_API_URL or https://api.getpostman.com.")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default='DEBUG', help="Lowest level of log messages to print.")
 
     args = parser.parse_args()
-
-    initialize_links_file()
+    logging.basicConfig(level=args.log_level, format=LOG_FORMAT)
+    if args.api_url:
+        set_api_url(args.api_url)
+    if args.command == 'daemon' and args.link:
+        parser.error("--link cannot be used with the daemon command.")
+
+    if args.state == LINKS_FILE:
+        initialize_links_file()
+    state = open_state(args.state, legacy_links_file=LINKS_FILE)
     api_key = load_api_key()
+    transport.set_rate_limit(args.requests_per_minute)
+    transport.configure(connect_timeout=args.connect_timeout, read_timeout=args.read_timeout)
+    download.configure(max_in_memory=mebibytes(args.max_spec_memory), max_size=mebibytes(args.max_spec_size))
+    if args.cache_dir:
+        collection_cache.enable(args.cache_dir, mebibytes(args.cache_size))
+    if args.snapshot_dir:
+        snapshots.enable(args.snapshot_dir)
+    if args.journal_dir:
+        journal.enable(args.journal_dir)
+    if args.failure_threshold > 0:
+        breaker.enable(state, args.failure_threshold)
+
+    if args.command == 'daemon':
+        scheduler = LinkScheduler(args.min_interval, args.max_interval, args.requests_per_minute)
+        stop_event = threading.Event()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda *_: stop_event.set())
+        with state:
+            run_daemon(state, api_key, workers=args.workers, max_per_host=args.max_per_host, scheduler=scheduler, stop_event=stop_event,
+                       metrics_json=args.metrics_json, metrics_prom=args.metrics_prom, link_budget=args.link_budget,
+                       converter=args.converter, artifacts_dir=args.artifacts_dir, update_mode=args.update_mode)
+        return
 
-    if args.link:
-        links = load_links()
-        existing_entry = next((entry for entry in links if entry['link'] == args.link), None)
-        
-        if existing_entry:
-            logging.warning("The link already exists in the system.")
-        else:
-            if args.collection_id:
-                new_with_existing_collection(api_key, args.link, args.collection_id)
+    run_metrics = metrics.start_run()
+
+    with state:
+        if args.link:
+            existing_entry = state.get(args.link)
+
+            if existing_entry:
+                logging.warning("The link already exists in the system.")
             else:
-                new_entry(api_key, args.link)
-    else:
-        if api_key:
-            main_code()
+                with metrics.link_context(args.link):
+                    if args.collection_id:
+                        new_with_existing_collection(api_key, args.link, args.collection_id, args.converter, args.artifacts_dir, args.update_mode, state)
+                    else:
+                        new_entry(api_key, args.link, state)
         else:
-            logging.error("API key not provided and no API key stored in the system.")
+            if api_key:
+                sweep_orphans(api_key)
+                main_code(workers=args.workers, max_per_host=args.max_per_host, state=state, link_budget=args.link_budget, run_deadline=args.run_deadline,
+                          converter=args.converter, artifacts_dir=args.artifacts_dir, update_mode=args.update_mode)
+            else:
+                logging.error("API key not provided and no API key stored in the system.")
+
+    run_metrics.finish()
+    export_metrics(run_metrics, args.metrics_json, args.metrics_prom)
+
+def mebibytes(value):
+    """
+    Converts an optional size in MiB to bytes.
+    """
+    return None if value is None else int(value * 2 ** 20)
+
+def export_metrics(run_metrics, json_path=None, prometheus_path=None):
+    """
+    Logs a one-line summary of a run and writes its metrics to the requested files.
+
+    Args:
+        run_metrics (metrics.SyncMetrics): The metrics of the run.
+        json_path (str, optional): The JSON summary file to write.
+        prometheus_path (str, optional): The Prometheus textfile to write.
+    """
+    summary = run_metrics.summary()
+    totals = summary['totals']
+    logging.info(f"Run finished in {summary['duration_seconds']:.2f}s: {totals.get(metrics.API_CALLS, 0)} API calls, "
+                 f"{totals.get(metrics.SPEC_DOWNLOADS, 0)} spec downloads, {totals.get(metrics.RETRIES, 0)} retries, {totals.get(metrics.BYTES_RECEIVED, 0)} bytes received, "
+                 f"{totals.get(metrics.ENDPOINTS_MERGED, 0)} endpoints merged.")
+    if json_path:
+        run_metrics.write_json(json_path)
+        logging.info(f"Metrics summary written to {json_path}")
+    if prometheus_path:
+        run_metrics.write_prometheus(prometheus_path)
+        logging.info(f"Prometheus metrics written to {prometheus_path}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Counter names recorded by the sync
+API_CALLS = 'api_calls'
+SPEC_DOWNLOADS = 'spec_downloads'
+RETRIES = 'retries'
+BYTES_RECEIVED = 'bytes_received'
+BYTES_SENT = 'bytes_sent'
+ENDPOINTS_MERGED = 'endpoints_merged'
+EVENTS_MERGED = 'events_merged'
+# Followed by the name of the endpoint matching rule, e.g. endpoints_matched_by_template
+ENDPOINTS_MATCHED_BY = 'endpoints_matched_by_'
+CONVERT_CACHE_HITS = 'convert_cache_hits'
+CONVERT_CACHE_MISSES = 'convert_cache_misses'
+SNAPSHOT_HITS = 'snapshot_hits'
+SNAPSHOT_MISSES = 'snapshot_misses'
+LINKS_TIMED_OUT = 'links_timed_out'
+LINKS_SKIPPED = 'links_skipped'
+LINKS_BACKED_OFF = 'links_backed_off'
+CIRCUITS_OPENED = 'circuits_opened'
+
+# Label used for work that happens outside any link
+RUN_LINK = ''
+
+METRIC_PREFIX = 'postman_sync'
+
+_active = None
+_current_link = contextvars.ContextVar('postman_sync_link', default=RUN_LINK)
+
+
+class SyncMetrics:
+    """
+    Collects per-link, per-stage durations and counters for one sync run.
+
+    Recording is thread-safe, so concurrent link syncs can share one instance.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._stages = defaultdict(lambda: defaultdict(float))
+        self._counters = defaultdict(lambda: defaultdict(int))
+
+    def add_duration(self, link, stage_name, seconds):
+        with self._lock:
+            self._stages[link][stage_name] += seconds
+
+    def incr(self, link, name, value=1):
+        with self._lock:
+            self._counters[link][name] += value
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def summary(self):
+        """
+        Returns the recorded metrics as a JSON-serializable dict.
+
+        Returns:
+            dict: Run timing, totals per counter and the stages and counters of each link.
+        """
+        with self._lock:
+            links = sorted(set(self._stages) | set(self._counters))
+            per_link = {
+                link: {'stages': dict(self._stages[link]), 'counters': dict(self._counters[link])}
+                for link in links
+            }
+            totals = defaultdict(int)
+            for counters in self._counters.values():
+                for name, value in counters.items():
+                    totals[name] += value
+        finished_at = self.finished_at or time.time()
+        return {
+            'started_at': self.started_at,
+            'duration_seconds': finished_at - self.started_at,
+            'totals': dict(totals),
+            'links': per_link,
+        }
+
+    def write_json(self, path):
+        """
+        Writes the summary as a JSON file.
+
+        Args:
+            path (str): The file to write.
+        """
+        _write_atomically(path, json.dumps(self.summary(), indent=4))
+
+    def write_prometheus(self, path):
+        """
+        Writes the metrics in the Prometheus text format, for the node exporter's textfile collector.
+
+        The file is written to a temporary name and renamed, so the collector never reads a partial file.
+
+        Args:
+            path (str): The .prom file to write.
+        """
+        summary = self.summary()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_run_duration_seconds Duration of the last sync run.",
+            f"# TYPE {METRIC_PREFIX}_run_duration_seconds gauge",
+            f"{METRIC_PREFIX}_run_duration_seconds {summary['duration_seconds']:.6f}",
+            f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds Start time of the last sync run.",
+            f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_last_run_timestamp_seconds {summary['started_at']:.3f}",
+            f"# HELP {METRIC_PREFIX}_stage_duration_seconds Time spent per link and sync stage in the last run.",
+            f"# TYPE {METRIC_PREFIX}_stage_duration_seconds gauge",
+        ]
+        for link, data in summary['links'].items():
+            for stage_name, seconds in sorted(data['stages'].items()):
+                lines.append(f"{METRIC_PREFIX}_stage_duration_seconds{{link=\"{_escape(link)}\",stage=\"{_escape(stage_name)}\"}} {seconds:.6f}")
+
+        counter_names = sorted({name for data in summary['links'].values() for name in data['counters']})
+        for name in counter_names:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} Count of {name.replace('_', ' ')} per link in the last run.")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for link, data in summary['links'].items():
+                if name in data['counters']:
+                    lines.append(f"{METRIC_PREFIX}_{name}{{link=\"{_escape(link)}\"}} {data['counters'][name]}")
+        _write_atomically(path, '\n'.join(lines) + '\n')
+
+
+def start_run():
+    """
+    Starts collecting metrics for a new sync run.
+
+    Returns:
+        SyncMetrics: The metrics of the run.
+    """
+    global _active
+    _active = SyncMetrics()
+    return _active
+
+
+def active():
+    """
+    Returns the metrics of the current run, or None if no run is being measured.
+    """
+    return _active
+
+
+@contextmanager
+def link_context(link):
+    """
+    Attributes everything recorded inside the block to a link.
+
+    Args:
+        link (str): The Swagger JSON link being synced.
+    """
+    token = _current_link.set(link)
+    try:
+        yield
+    finally:
+        _current_link.reset(token)
+
+
+@contextmanager
+def stage(stage_name):
+    """
+    Times a sync stage for the current link. Does nothing when no run is being measured.
+
+    Args:
+        stage_name (str): The stage name, e.g. 'download' or 'merge'.
+    """
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+    link = _current_link.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_duration(link, stage_name, time.perf_counter() - started)
+
+
+def incr(name, value=1):
+    """
+    Increments a counter for the current link. Does nothing when no run is being measured.
+
+    Args:
+        name (str): The counter name.
+        value (int): The amount to add.
+    """
+    metrics = _active
+    if metrics is not None and value:
+        metrics.incr(_current_link.get(), name, value)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomically(path, content):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(content)
+    os.replace(temp_path, path)
@@ -0,0 +1,146 @@
+import heapq
+import logging
+import random
+from datetime import datetime
+
+# Poll interval bounds, in seconds
+MIN_INTERVAL = 300
+MAX_INTERVAL = 24 * 60 * 60
+
+# Each unchanged poll multiplies the interval by this factor
+BACKOFF_FACTOR = 1.5
+
+# New links start at this fraction of the time since their spec last changed
+CHANGE_AGE_FRACTION = 0.1
+
+# Random spread applied to every interval, so links added together do not stay in lockstep
+JITTER = 0.1
+
+
+class LinkScheduler:
+    """
+    Decides when each link is polled next.
+
+    Every link has its own interval. A poll that finds the spec unchanged backs
+    the interval off towards max_interval, and a change resets it to
+    min_interval. When a requests-per-minute budget is set, the interval never
+    drops below the rate at which polling every link would exceed it.
+
+    Args:
+        min_interval (float): The shortest poll interval, in seconds.
+        max_interval (float): The longest poll interval, in seconds.
+        requests_per_minute (int, optional): The global request budget the polls must fit in.
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, requests_per_minute=None):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.requests_per_minute = requests_per_minute
+        self.intervals = {}
+        self._due = {}
+        self._heap = []
+
+    def budget_interval(self):
+        """
+        Returns the shortest interval at which every tracked link can be polled within the budget.
+        """
+        if not self.requests_per_minute:
+            return 0.0
+        return len(self.intervals) * 60.0 / self.requests_per_minute
+
+    def clamp(self, interval):
+        floor = max(self.min_interval, self.budget_interval())
+        return min(max(interval, floor), max(self.max_interval, floor))
+
+    def initial_interval(self, entry, now):
+        """
+        Estimates the interval of a newly tracked link from how long ago its spec last changed.
+
+        Args:
+            entry (dict): The links file entry.
+            now (float): The current time, as a timestamp.
+
+        Returns:
+            float: The poll interval, in seconds.
+        """
+        try:
+            last_updated = datetime.fromisoformat(entry['Last Date Updated']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return self.min_interval
+        return self.clamp((now - last_updated) * CHANGE_AGE_FRACTION)
+
+    def track(self, entries, now):
+        """
+        Starts scheduling new links and stops scheduling links that are no longer stored.
+
+        New links are due at a random point within their first interval, so a
+        restart does not poll every link at once.
+
+        Args:
+            entries (list): The current links file entries.
+            now (float): The current time, as a timestamp.
+        """
+        links = {entry['link']: entry for entry in entries}
+        for link in list(self.intervals):
+            if link not in links:
+                del self.intervals[link]
+                self._due.pop(link, None)
+        for link, entry in links.items():
+            if link not in self.intervals:
+                interval = self.initial_interval(entry, now)
+                self.intervals[link] = interval
+                self._schedule(link, now + random.uniform(0, interval))
+
+    def pop_due(self, now):
+        """
+        Removes and returns the links that are due, earliest first.
+
+        Args:
+            now (float): The current time, as a timestamp.
+
+        Returns:
+            list: The due links.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, link = heapq.heappop(self._heap)
+            if self._due.get(link) == due_at:
+                self._due.pop(link, None)
+                due.append(link)
+        return due
+
+    def seconds_until_next(self, now):
+        """
+        Returns how long until the next link is due, or None if no link is scheduled.
+        """
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(self._heap[0][0] - now, 0.0)
+
+    def reschedule(self, link, changed, now):
+        """
+        Adapts the interval of a polled link and schedules its next poll.
+
+        Args:
+            link (str): The polled link.
+            changed (bool): Whether the poll found a changed spec.
+            now (float): The current time, as a timestamp.
+
+        Returns:
+            float: The new interval, in seconds, before jitter.
+        """
+        if link not in self.intervals:
+            return None
+        interval = self.min_interval if changed else self.intervals[link] * BACKOFF_FACTOR
+        interval = self.clamp(interval)
+        self.intervals[link] = interval
+        self._schedule(link, now + interval * random.uniform(1 - JITTER, 1 + JITTER))
+        logging.debug(f"Next poll of {link} in {interval:.0f}s ({'changed' if changed else 'unchanged'}).")
+        return interval
+
+    def _schedule(self, link, due_at):
+        self._due[link] = due_at
+        heapq.heappush(self._heap, (due_at, link))
+
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from postman_sync import codec, metrics
+from postman_sync.helper_functions import list_collections
+
+# Seconds a listing of the collection metadata is reused for
+METADATA_TTL = 60
+
+_active = None
+
+
+class SnapshotStore:
+    """
+    Local copies of the collections this tool published, so the next sync can skip downloading them.
+
+    Collection bodies are stored once per content digest under blobs/. A small
+    reference file per collection UID under refs/ records the digest and the
+    'updatedAt' that Postman reported right after publishing. A snapshot is only
+    used while Postman still reports that 'updatedAt', so edits made in the
+    Postman UI are never overwritten with a stale copy.
+
+    Args:
+        directory (str): The snapshot directory. It is created if missing.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._blobs = os.path.join(directory, 'blobs')
+        self._refs = os.path.join(directory, 'refs')
+        os.makedirs(self._blobs, exist_ok=True)
+        os.makedirs(self._refs, exist_ok=True)
+        self._lock = threading.Lock()
+        self._updated_at = {}
+        self._listed_at = None
+
+    def updated_at(self, uid, api_key, refresh=False):
+        """
+        Returns the 'updatedAt' Postman reports for a collection, or None if it is unknown.
+
+        One listing of all collections serves every lookup for METADATA_TTL seconds.
+
+        Args:
+            uid (str): The collection UID.
+            api_key (str): The Postman API key.
+            refresh (bool): List the collections again, e.g. right after publishing one.
+        """
+        with self._lock:
+            stale = self._listed_at is None or time.monotonic() - self._listed_at > METADATA_TTL
+            if refresh or stale:
+                collections = list_collections(api_key)
+                if collections is None:
+                    return None
+                self._updated_at = {collection.get('uid'): collection.get('updatedAt') for collection in collections}
+                self._listed_at = time.monotonic()
+            return self._updated_at.get(uid)
+
+    def load(self, uid, api_key):
+        """
+        Returns the snapshot of a collection if Postman confirms it is unchanged, None otherwise.
+        """
+        ref = self._read_ref(uid)
+        if ref is None:
+            return None
+        updated_at = self.updated_at(uid, api_key)
+        if updated_at is None or updated_at != ref['updatedAt']:
+            logging.info(f"Collection {uid} changed since it was published. Fetching it from Postman.")
+            metrics.incr(metrics.SNAPSHOT_MISSES)
+            return None
+        try:
+            collection = codec.read_file(self._blob_path(ref['digest']))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Dropping unreadable snapshot of {uid}: {e}")
+            self.discard(uid)
+            return None
+        metrics.incr(metrics.SNAPSHOT_HITS)
+        return collection
+
+    def save(self, uid, collection, api_key):
+        """
+        Records a collection that was just published under a UID.
+
+        Returns:
+            bool: True if the snapshot was stored, False if Postman did not report the collection.
+        """
+        updated_at = self.updated_at(uid, api_key, refresh=True)
+        if updated_at is None:
+            self.discard(uid)
+            return False
+        data = codec.dumps(collection)
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            _write_atomically(blob_path, data)
+        previous = self._read_ref(uid)
+        _write_atomically(self._ref_path(uid), json.dumps({'updatedAt': updated_at, 'digest': digest}).encode())
+        if previous is not None and previous['digest'] != digest:
+            self._release(previous['digest'])
+        return True
+
+    def discard(self, uid):
+        """
+        Forgets the snapshot of a collection, e.g. one that is no longer tracked.
+        """
+        ref = self._read_ref(uid)
+        try:
+            os.remove(self._ref_path(uid))
+        except OSError:
+            pass
+        if ref is not None:
+            self._release(ref['digest'])
+
+    def _release(self, digest):
+        # Blobs are shared by identical collections, so one is only deleted once no reference uses it
+        with self._lock:
+            for name in os.listdir(self._refs):
+                ref = self._read_ref_file(os.path.join(self._refs, name))
+                if ref is not None and ref['digest'] == digest:
+                    return
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def _read_ref(self, uid):
+        return self._read_ref_file(self._ref_path(uid))
+
+    @staticmethod
+    def _read_ref_file(path):
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _ref_path(self, uid):
+        return os.path.join(self._refs, f"{uid}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self._blobs, f"{digest}.json")
+
+
+def _write_atomically(path, data):
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def enable(directory):
+    """
+    Turns on local snapshots of published collections for the following syncs.
+
+    Args:
+        directory (str): The snapshot directory.
+
+    Returns:
+        SnapshotStore: The active store.
+    """
+    global _active
+    _active = SnapshotStore(directory)
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    """
+    Returns the active snapshot store, or None if snapshots are off.
+    """
+    return _active
@@ -0,0 +1,251 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+class StateBackend:
+    """
+    Stores the links file entries: one dict per monitored link, keyed by its 'link' value.
+    """
+
+    def entries(self):
+        """
+        Returns every stored entry, in insertion order.
+        """
+        raise NotImplementedError
+
+    def get(self, link):
+        """
+        Returns the entry for a link, or None if the link is not stored.
+        """
+        raise NotImplementedError
+
+    def add(self, entry):
+        """
+        Stores a new entry.
+        """
+        raise NotImplementedError
+
+    def update(self, entry):
+        """
+        Persists the changes made to an existing entry.
+        """
+        raise NotImplementedError
+
+    def hosts(self):
+        """
+        Returns the stored per-host records, keyed by host.
+        """
+        raise NotImplementedError
+
+    def update_host(self, host, record):
+        """
+        Stores the record of a host, or deletes it if the record is None.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JsonFileState(StateBackend):
+    """
+    Keeps all entries in a JSON file, rewriting the whole file on every change.
+
+    Callers get copies of the stored entries and store their changes back with
+    update, so concurrent workers never change an entry while the file is being
+    written. The file is replaced atomically, so a crash cannot leave it half-written.
+
+    Host records are kept in a second file next to it, e.g. links.hosts.json,
+    so the links file stays a plain list of entries.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hosts_path = os.path.splitext(path)[0] + '.hosts.json'
+        self._lock = threading.Lock()
+        self._entries = None
+        self._hosts = None
+
+    def _load(self):
+        if self._entries is None:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as file:
+                    self._entries = json.load(file)
+            else:
+                self._entries = []
+        return self._entries
+
+    def _save(self):
+        _write_atomically(self.path, json.dumps(self._entries, indent=4))
+        logging.info("Links file updated.")
+
+    def entries(self):
+        with self._lock:
+            return copy.deepcopy(self._load())
+
+    def get(self, link):
+        with self._lock:
+            entry = next((entry for entry in self._load() if entry['link'] == link), None)
+            return copy.deepcopy(entry)
+
+    def add(self, entry):
+        with self._lock:
+            self._load().append(copy.deepcopy(entry))
+            self._save()
+
+    def update(self, entry):
+        with self._lock:
+            entries = self._load()
+            for index, existing in enumerate(entries):
+                if existing['link'] == entry['link']:
+                    entries[index] = copy.deepcopy(entry)
+            self._save()
+
+    def _load_hosts(self):
+        if self._hosts is None:
+            if os.path.exists(self.hosts_path):
+                with open(self.hosts_path, 'r') as file:
+                    self._hosts = json.load(file)
+            else:
+                self._hosts = {}
+        return self._hosts
+
+    def hosts(self):
+        with self._lock:
+            return dict(self._load_hosts())
+
+    def update_host(self, host, record):
+        with self._lock:
+            hosts = self._load_hosts()
+            if record is None:
+                if hosts.pop(host, None) is None:
+                    return
+            else:
+                hosts[host] = dict(record)
+            _write_atomically(self.hosts_path, json.dumps(hosts, indent=4))
+
+
+def _write_atomically(path, content):
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class SqliteState(StateBackend):
+    """
+    Keeps entries in SQLite with a unique index on the link, updating one row per change in its own transaction.
+
+    Args:
+        path (str): The database file.
+        legacy_links_file (str, optional): A links.json file to import once when the database is first created.
+    """
+
+    def __init__(self, path, legacy_links_file=None):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            if path != ':memory:':
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS links (id INTEGER PRIMARY KEY AUTOINCREMENT, link TEXT NOT NULL UNIQUE, data TEXT NOT NULL)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        if legacy_links_file:
+            self.migrate_from_json(legacy_links_file)
+
+    def migrate_from_json(self, links_file):
+        """
+        Imports the entries of a links.json file, once, in a single transaction.
+
+        Args:
+            links_file (str): The links.json file to import.
+
+        Returns:
+            int: The number of imported entries.
+        """
+        if not os.path.exists(links_file):
+            return 0
+        with self._lock:
+            migrated = self._connection.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+            if migrated:
+                return 0
+            with open(links_file, 'r') as file:
+                entries = json.load(file)
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO links (link, data) VALUES (?, ?)',
+                    ((entry['link'], json.dumps(entry)) for entry in entries),
+                )
+                self._connection.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)", (os.path.abspath(links_file),))
+        logging.info(f"Migrated {len(entries)} entries from {links_file} to {self.path}.")
+        return len(entries)
+
+    def entries(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT data FROM links ORDER BY id').fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def get(self, link):
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM links WHERE link = ?', (link,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, entry):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT INTO links (link, data) VALUES (?, ?)', (entry['link'], json.dumps(entry)))
+
+    def update(self, entry):
+        with self._lock, self._connection:
+            self._connection.execute('UPDATE links SET data = ? WHERE link = ?', (json.dumps(entry), entry['link']))
+
+    def hosts(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT host, data FROM hosts').fetchall()
+        return {host: json.loads(data) for host, data in rows}
+
+    def update_host(self, host, record):
+        with self._lock, self._connection:
+            if record is None:
+                self._connection.execute('DELETE FROM hosts WHERE host = ?', (host,))
+            else:
+                self._connection.execute('INSERT OR REPLACE INTO hosts (host, data) VALUES (?, ?)', (host, json.dumps(record)))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_state(path, legacy_links_file=None):
+    """
+    Opens the state backend for a path, choosing SQLite for .db/.sqlite files and JSON otherwise.
+
+    Args:
+        path (str): The state file.
+        legacy_links_file (str, optional): A links.json file to migrate into a new SQLite database.
+
+    Returns:
+        StateBackend: The opened backend.
+    """
+    if path == ':memory:' or path.endswith(SQLITE_EXTENSIONS):
+        return SqliteState(path, legacy_links_file)
+    return JsonFileState(path)
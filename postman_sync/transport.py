@@ -0,0 +1,399 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from postman_sync import metrics
+
+# Retry settings
+MAX_RETRIES = 4
+BACKOFF_FACTOR = 0.5
+MAX_BACKOFF = 60
+MAX_RETRY_AFTER = 300
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# Methods that are safe to send twice. Other methods, such as the POSTs that create
+# collections, are only retried when the server cannot have acted on them: on 429
+# and on failures to connect
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+# Connection pool settings
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+
+# Seconds to wait for a connection, and for each read from the socket
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+
+# Seconds cleanup requests may take once the deadline of their context has passed
+CLEANUP_GRACE = 10
+
+_session = None
+_session_lock = threading.Lock()
+_rate_limiter = None
+_deadline = contextvars.ContextVar('postman_sync_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request would outlast the deadline of the current context.
+
+    It is deliberately not a RequestException, so it is not handled like a
+    failed request and cancels the whole sync of the link instead.
+    """
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request, allowing short bursts while keeping the average rate.
+
+    Args:
+        requests_per_minute (int): The average number of requests allowed per minute.
+        burst (int, optional): The number of requests that may be sent back to back. Defaults to one second's worth, at least 1.
+    """
+
+    def __init__(self, requests_per_minute, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(self.rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes one token without waiting.
+
+        Returns:
+            float: The seconds to wait before the token may be used.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        """
+        Takes one token, sleeping until one is available.
+        """
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+def configure(pool_maxsize=None, max_retries=None, connect_timeout=None, read_timeout=None):
+    """
+    Adjusts the shared transport settings and resets the pooled session.
+
+    Args:
+        pool_maxsize (int, optional): The maximum number of pooled connections per host.
+        max_retries (int, optional): The number of retries for failed requests.
+        connect_timeout (float, optional): Seconds to wait for a connection.
+        read_timeout (float, optional): Seconds to wait for each read from the socket.
+    """
+    global _session, POOL_MAXSIZE, MAX_RETRIES, CONNECT_TIMEOUT, READ_TIMEOUT
+    with _session_lock:
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = max(pool_maxsize, 1)
+        if max_retries is not None:
+            MAX_RETRIES = max(max_retries, 0)
+        if connect_timeout is not None:
+            CONNECT_TIMEOUT = connect_timeout
+        if read_timeout is not None:
+            READ_TIMEOUT = read_timeout
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def set_rate_limit(requests_per_minute):
+    """
+    Caps the rate of all requests sent through the transport, including retries.
+
+    Args:
+        requests_per_minute (int): The allowed requests per minute, or None to remove the cap.
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+
+
+def reserve_rate_limit():
+    """
+    Takes a token of the global rate limit without waiting, for callers that wait on their own, such as coroutines.
+
+    Returns:
+        float: The seconds to wait before sending the request.
+    """
+    return _rate_limiter.reserve() if _rate_limiter is not None else 0.0
+
+
+@contextmanager
+def deadline(seconds=None, at=None):
+    """
+    Limits how long the requests made in this context may take in total.
+
+    Deadlines nest: an inner deadline can only shorten an outer one. The
+    context is per thread, so each worker sets the deadline of its own link.
+
+    Args:
+        seconds (float, optional): The time budget from now.
+        at (float, optional): An absolute deadline on the time.monotonic() clock.
+    """
+    candidates = [value for value in (_deadline.get(), at, None if seconds is None else time.monotonic() + seconds) if value is not None]
+    token = _deadline.set(min(candidates) if candidates else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def grace_period(seconds=None):
+    """
+    Replaces the current deadline with a short one of its own.
+
+    Cleanup that has to run after a cancellation, such as deleting a temporary
+    collection, would otherwise fail against the same expired deadline.
+
+    Args:
+        seconds (float, optional): The time the cleanup may take. Defaults to CLEANUP_GRACE.
+    """
+    token = _deadline.set(time.monotonic() + (CLEANUP_GRACE if seconds is None else seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """
+    Returns the seconds left until the current deadline, or None if there is none.
+    """
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def check_deadline():
+    """
+    Raises DeadlineExceeded if the current deadline has passed.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("The time budget ran out.")
+
+
+def get_session():
+    """
+    Returns the shared keep-alive session, creating it on first use.
+
+    Returns:
+        requests.Session: The pooled session used for every Postman and spec call.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def retry_after_seconds(response):
+    """
+    Parses the Retry-After header of a response.
+
+    Args:
+        response (requests.Response): The response to inspect.
+
+    Returns:
+        float: The number of seconds to wait, or None if the header is missing or invalid.
+    """
+    value = response.headers.get('Retry-After') if response.headers else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_seconds(attempt):
+    """
+    Calculates the exponential backoff delay, with jitter, for a retry attempt.
+
+    Args:
+        attempt (int): The zero-based retry attempt.
+
+    Returns:
+        float: The number of seconds to wait.
+    """
+    delay = min(BACKOFF_FACTOR * (2 ** attempt), MAX_BACKOFF)
+    return delay + random.uniform(0, delay / 2)
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request through the pooled session, retrying transient failures.
+
+    Connection errors and 5xx responses are retried with exponential backoff,
+    except that non-idempotent methods are only retried when the connection
+    could not be made. 429 responses wait for the server's Retry-After before
+    retrying. Every attempt
+    has the connect and read timeouts, shortened to the time left before the
+    deadline of the current context.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+        metric (str): The counter incremented for every attempt. Defaults to metrics.API_CALLS.
+        **kwargs: Passed through to requests.Session.request.
+
+    Returns:
+        requests.Response: The final response.
+
+    Raises:
+        requests.exceptions.RequestException: If the request still fails after all retries.
+        DeadlineExceeded: If the deadline passes before a response arrives.
+    """
+    import requests
+
+    timeout = kwargs.pop('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    metric = kwargs.pop('metric', metrics.API_CALLS)
+    data = kwargs.get('data')
+    attempt = 0
+    while True:
+        check_deadline()
+        # A file-like body is consumed by each attempt, so every attempt sends it from the start
+        if hasattr(data, 'seek'):
+            data.seek(0)
+        if _rate_limiter is not None:
+            _rate_limiter.acquire()
+        metrics.incr(metric)
+        if attempt:
+            metrics.incr(metrics.RETRIES)
+        try:
+            response = get_session().request(method, url, timeout=bounded_timeout(timeout), **kwargs)
+        except requests.exceptions.RequestException as e:
+            # A timeout that the deadline shortened cancels the link rather than failing the request
+            check_deadline()
+            if not isinstance(e, requests.exceptions.ConnectionError) or attempt >= MAX_RETRIES:
+                raise
+            # A POST whose connection broke after it was sent may already have created a collection
+            if method.upper() not in IDEMPOTENT_METHODS and not connect_failed(e):
+                raise
+            delay = backoff_seconds(attempt)
+            logging.warning(f"{method} {url} failed: {e}. Retrying in {delay:.1f}s.")
+        else:
+            delay = retry_delay(response, attempt, method)
+            if delay is None:
+                _record_transfer(response, kwargs.get('stream', False))
+                return response
+            logging.warning(f"{method} {url} returned {response.status_code}. Retrying in {delay:.1f}s.")
+            response.close()
+        left = remaining()
+        if left is not None and delay >= left:
+            raise DeadlineExceeded(f"{method} {url} cannot be retried before the time budget runs out.")
+        time.sleep(delay)
+        attempt += 1
+
+
+def connect_failed(error):
+    """
+    Returns whether a requests ConnectionError happened before the request was sent.
+    """
+    import requests
+    from urllib3.exceptions import ConnectTimeoutError
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    # Refused connections and failed DNS lookups arrive wrapped in urllib3's MaxRetryError
+    cause = error.args[0] if error.args else None
+    return isinstance(getattr(cause, 'reason', None), ConnectTimeoutError)
+
+
+def retry_delay(response, attempt, method='GET'):
+    """
+    Decides whether a response is retried.
+
+    Args:
+        response: The response of the attempt.
+        attempt (int): The zero-based attempt that received the response.
+        method (str): The HTTP method. 5xx responses are only retried for idempotent methods.
+
+    Returns:
+        float: The seconds to wait before retrying, or None if the response is final.
+    """
+    if attempt >= MAX_RETRIES:
+        return None
+    if response.status_code == 429:
+        delay = retry_after_seconds(response)
+        if delay is None:
+            delay = backoff_seconds(attempt)
+        return min(delay, MAX_RETRY_AFTER)
+    if response.status_code in RETRY_STATUS_CODES and method.upper() in IDEMPOTENT_METHODS:
+        return backoff_seconds(attempt)
+    return None
+
+
+def bounded_timeout(timeout):
+    """
+    Shortens a timeout, or a (connect, read) pair, to the time left before the current deadline.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(left if value is None else min(value, left) for value in timeout)
+    return min(timeout, left)
+
+
+def _record_transfer(response, stream):
+    if metrics.active() is None:
+        return
+    body = getattr(response.request, 'body', None)
+    if body is not None and hasattr(body, '__len__'):
+        metrics.incr(metrics.BYTES_SENT, len(body))
+    if not stream:
+        metrics.incr(metrics.BYTES_RECEIVED, len(response.content))
+
+
+def __getattr__(name):
+    # requests is imported on first use, so handlers can name its base exception without importing it up front
+    if name == 'RequestException':
+        from requests.exceptions import RequestException
+        return RequestException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request('DELETE', url, **kwargs)
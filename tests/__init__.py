@@ -7,3 +7,19 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %
 from .test_endpoint_transfer import TestEndpointTransfer
 from .test_helper_functions import TestHelperFunctions
 from .test_main_script import TestMainScript
+from .test_transport import TestTransport
+from .test_converter import TestConverter
+from .test_fingerprints import TestFingerprints
+from .test_metrics import TestMetrics
+from .test_state import TestState
+from .test_scheduler import TestScheduler
+from .test_startup import TestStartup
+from .test_benchmarks import TestBenchmarks
+from .test_fake_postman import TestFakePostman
+from .test_codec import TestCodec
+from .test_download import TestDownload
+from .test_collection_cache import TestCollectionCache
+from .test_snapshots import TestSnapshots
+from .test_journal import TestJournal
+from .test_breaker import TestBreaker
+from .test_aio import TestAio
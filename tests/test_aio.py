@@ -0,0 +1,190 @@
+import unittest
+import asyncio
+import http.server
+import json
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+import httpx
+
+from postman_sync import aio, collection_cache, transport
+from postman_sync.helper_functions import set_api_url, POSTMAN_API_URL
+from postman_sync.main_script import hash_json
+from postman_sync.state import SqliteState
+
+API_URL = 'http://postman.test'
+SPEC = {'openapi': '3.0.0', 'info': {'title': 'Pets', 'version': '1'},
+        'paths': {'/pets': {'get': {'summary': 'List pets', 'responses': {'200': {'description': 'OK'}}}}}}
+OLD_COLLECTION = {'collection': {'info': {'name': 'Pets'}, 'item': [
+    {'name': 'List pets', 'request': {'method': 'GET', 'url': {'raw': '{{baseUrl}}/pets'}},
+     'event': [{'listen': 'test', 'script': {'exec': ['pm.test("ok")']}}]},
+]}}
+
+
+class TestAio(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        set_api_url(API_URL)
+        self.addCleanup(set_api_url, POSTMAN_API_URL)
+        patcher = patch.multiple(aio, _http_transport=None, MAX_IN_FLIGHT=aio.MAX_IN_FLIGHT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await aio.aclose()
+
+    def serve(self, handler):
+        aio.configure(http_transport=httpx.MockTransport(handler))
+
+    @patch('postman_sync.aio.asyncio.sleep')
+    async def test_request_retries_server_errors(self, mock_sleep):
+        statuses = iter([503, 200])
+        self.serve(lambda request: httpx.Response(next(statuses)))
+
+        response = await aio.request('GET', 'http://example.com')
+        self.assertEqual(response.status_code, 200)
+        mock_sleep.assert_called_once()
+
+    async def test_request_does_not_retry_post_server_errors(self):
+        self.serve(lambda request: httpx.Response(503))
+        response = await aio.request('POST', 'http://example.com')
+        self.assertEqual(response.status_code, 503)
+
+    async def test_request_respects_deadline(self):
+        self.serve(lambda request: httpx.Response(200))
+        with transport.deadline(-1):
+            with self.assertRaises(transport.DeadlineExceeded):
+                await aio.request('GET', 'http://example.com')
+
+    async def test_temporary_collection_is_deleted_after_deadline(self):
+        deleted = []
+
+        async def handler(request):
+            if request.method == 'POST':
+                return httpx.Response(200, json={'collections': [{'uid': 'temp_uid'}]})
+            if request.method == 'GET':
+                await asyncio.sleep(0.5)
+                return httpx.Response(200, json={'collection': {'item': []}})
+            deleted.append(request.url.path)
+            return httpx.Response(200)
+
+        self.serve(handler)
+        with transport.deadline(0.1):
+            with self.assertRaises(transport.DeadlineExceeded):
+                await aio.build_collection_json('http://specs.example.com/pets.json', SPEC, 'test_api_key')
+        self.assertEqual(deleted, ['/collections/temp_uid'])
+
+    async def test_identical_specs_are_converted_once_off_the_event_loop(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        collection_cache.enable(directory.name)
+        self.addCleanup(collection_cache.disable)
+        conversions = []
+        ticks = 0
+
+        def slow_convert(spec):
+            conversions.append(spec)
+            time.sleep(0.2)
+            return {'collection': {'item': []}}
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        with patch('postman_sync.aio.convert_spec', side_effect=slow_convert):
+            results = await asyncio.gather(*(aio.build_collection_json(f'http://specs.example.com/{index}.json', SPEC, 'test_api_key', 'local')
+                                             for index in range(3)))
+        ticker.cancel()
+        self.assertEqual(results, [{'collection': {'item': []}}] * 3)
+        self.assertEqual(len(conversions), 1)
+        # The event loop kept running while the spec was converted
+        self.assertGreater(ticks, 5)
+
+    async def test_in_flight_requests_are_bounded(self):
+        in_flight = 0
+        most = 0
+
+        async def handler(request):
+            nonlocal in_flight, most
+            in_flight += 1
+            most = max(most, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={'collection': {'item': []}})
+
+        self.serve(handler)
+        aio.configure(max_in_flight=5)
+        results = await asyncio.gather(*(aio.get_collection_json(f'uid_{index}', 'test_api_key') for index in range(50)))
+        self.assertEqual(len(results), 50)
+        self.assertEqual(most, 5)
+
+    async def test_helpers_return_none_on_failure(self):
+        self.serve(lambda request: httpx.Response(404, text='missing'))
+        self.assertIsNone(await aio.get_collection_json('uid', 'test_api_key'))
+        self.assertFalse(await aio.cleanup_collection('uid', 'test_api_key'))
+        self.assertIsNone(await aio.fetch_swagger_json('http://specs.example.com/pets.json'))
+
+    async def test_sync_entries(self):
+        published = []
+
+        def handler(request):
+            if request.url.host == 'specs.example.com':
+                if request.url.path == '/unchanged.json':
+                    return httpx.Response(304)
+                return httpx.Response(200, json=SPEC, headers={'ETag': '"v2"'})
+            if request.method == 'GET':
+                return httpx.Response(200, json=OLD_COLLECTION)
+            published.append(json.loads(request.content))
+            return httpx.Response(200, json={'collection': {'uid': 'new_uid'}})
+
+        self.serve(handler)
+        state = SqliteState(':memory:')
+        self.addCleanup(state.close)
+        state.add({'link': 'http://specs.example.com/pets.json', 'hash': 'old', 'Collection UID': 'old_uid'})
+        state.add({'link': 'http://specs.example.com/unchanged.json', 'hash': 'old', 'Collection UID': 'other_uid'})
+
+        await aio.main_code(state, 'test_api_key', converter='local')
+
+        entry = state.get('http://specs.example.com/pets.json')
+        self.assertEqual(entry['Collection UID'], 'new_uid')
+        self.assertEqual(entry['hash'], hash_json(SPEC))
+        self.assertEqual(entry['etag'], '"v2"')
+        self.assertEqual(state.get('http://specs.example.com/unchanged.json')['Collection UID'], 'other_uid')
+        self.assertEqual(len(published), 1)
+        self.assertTrue(published[0]['collection']['info']['name'].startswith('Pets Latest'))
+
+    async def test_not_modified_responses_free_their_connections(self):
+        connections = set()
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                connections.add(self.client_address)
+                self.send_response(304)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        aio.configure(max_in_flight=2)
+        state = SqliteState(':memory:')
+        self.addCleanup(state.close)
+        for index in range(6):
+            state.add({'link': f'http://127.0.0.1:{server.server_port}/{index}.json', 'hash': 'h', 'Collection UID': 'uid', 'etag': '"v1"'})
+
+        # Before the fix, the run hung once both pooled connections held an unclosed 304
+        await asyncio.wait_for(aio.main_code(state, 'test_api_key'), timeout=10)
+        self.assertLessEqual(len(connections), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
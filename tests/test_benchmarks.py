@@ -0,0 +1,41 @@
+import unittest
+
+from benchmarks.generate import Generator
+from benchmarks.merge_benchmark import compare_results, measure
+from postman_sync.converter import convert_spec
+from postman_sync.endpoint_transfer import extract_endpoints, merge_collections
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generator_is_deterministic(self):
+        self.assertEqual(Generator(50, seed=3).collection(), Generator(50, seed=3).collection())
+        self.assertNotEqual(Generator(50, seed=3).spec(), Generator(50, seed=4).spec())
+
+    def test_generated_documents(self):
+        generator = Generator(200, seed=1)
+        old = generator.collection(with_events=True, event_ratio=1.0)
+        new = generator.collection(with_events=False, changed_ratio=0.1)
+        self.assertEqual(len(extract_endpoints(old['collection']['item'])), 200)
+        self.assertEqual(len(extract_endpoints(convert_spec(generator.spec())['collection']['item'])), 200)
+
+        _, stats = merge_collections(old, new)
+        self.assertGreater(stats['updated_count'], 150)
+        self.assertLess(stats['updated_count'], 200)
+
+    def test_measure(self):
+        result = measure(lambda: list(range(1000)), sorted, repeat=2)
+        self.assertGreater(result['peak_bytes'], 0)
+        self.assertLessEqual(result['min_seconds'], result['seconds'])
+
+    def test_compare_results_flags_regressions(self):
+        baseline = {'results': {'1000': {'json_load': {'seconds': 1.0, 'peak_bytes': 100}, 'hash_json': {'seconds': 1.0, 'peak_bytes': 100}}}}
+        current = {'results': {'1000': {'json_load': {'seconds': 1.5, 'peak_bytes': 100}, 'hash_json': {'seconds': 1.1, 'peak_bytes': 100}},
+                               '5000': {'json_load': {'seconds': 9.0, 'peak_bytes': 900}}}}
+        rows = {row['stage']: row for row in compare_results(baseline, current, threshold=0.2)}
+        self.assertEqual(set(rows), {'json_load', 'hash_json'})
+        self.assertTrue(rows['json_load']['regression'])
+        self.assertFalse(rows['hash_json']['regression'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch, Mock
+import requests
+
+from postman_sync import breaker
+from postman_sync.breaker import CircuitBreaker
+from postman_sync.main_script import main_code
+from postman_sync.state import SqliteState
+
+NOW = 1_000_000.0
+
+
+def entries(*links):
+    return [{'link': link, 'hash': 'h', 'Collection UID': 'uid'} for link in links]
+
+
+class TestBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.state = SqliteState(':memory:')
+        self.addCleanup(self.state.close)
+        self.addCleanup(breaker.disable)
+
+    def test_link_backoff_grows_and_resets(self):
+        circuit_breaker = CircuitBreaker(self.state, threshold=10)
+        entry, = entries('http://a.example.com/spec')
+        self.state.add(entry)
+
+        circuit_breaker.record(entry, 404, now=NOW)
+        self.assertEqual(entry['retry_at'], NOW + breaker.LINK_BACKOFF)
+        circuit_breaker.record(entry, 404, now=NOW)
+        self.assertEqual(entry['retry_at'], NOW + 2 * breaker.LINK_BACKOFF)
+        self.assertFalse(circuit_breaker.allow(entry, now=NOW + breaker.LINK_BACKOFF))
+        self.assertTrue(circuit_breaker.allow(entry, now=NOW + 2 * breaker.LINK_BACKOFF))
+
+        circuit_breaker.record(entry, 200, now=NOW)
+        self.assertNotIn('failures', self.state.get(entry['link']))
+        # Client errors do not count against the host
+        self.assertEqual(self.state.hosts(), {})
+
+    def test_circuit_opens_and_probes_once(self):
+        circuit_breaker = CircuitBreaker(self.state, threshold=2, open_window=100)
+        first, second, third = entries('http://staging.example.com/a', 'http://staging.example.com/b', 'http://staging.example.com/c')
+        for entry in (first, second, third):
+            self.state.add(entry)
+
+        circuit_breaker.record(first, 503, now=NOW)
+        self.assertTrue(circuit_breaker.allow(third, now=NOW))
+        circuit_breaker.record(second, None, now=NOW)
+        self.assertFalse(circuit_breaker.allow(third, now=NOW + 99))
+
+        # Half-open: one probe at a time
+        self.assertTrue(circuit_breaker.allow(third, now=NOW + 100))
+        self.assertFalse(circuit_breaker.allow(dict(third, link='http://staging.example.com/d'), now=NOW + 100))
+
+        # A failed probe opens the circuit for twice as long, and the state remembers it
+        circuit_breaker.record(third, None, now=NOW + 100)
+        reopened = CircuitBreaker(self.state, threshold=2, open_window=100)
+        self.assertEqual(self.state.hosts()['staging.example.com']['open_until'], NOW + 300)
+        self.assertFalse(reopened.allow(dict(third, link='http://staging.example.com/d'), now=NOW + 299))
+
+        self.assertTrue(reopened.allow(dict(third, link='http://staging.example.com/d'), now=NOW + 300))
+        reopened.record(dict(third, link='http://staging.example.com/d'), 200, now=NOW + 300)
+        self.assertEqual(self.state.hosts(), {})
+
+    def test_release_frees_an_unrecorded_probe(self):
+        circuit_breaker = CircuitBreaker(self.state, threshold=1, open_window=100)
+        first, second = entries('http://staging.example.com/a', 'http://staging.example.com/b')
+        self.state.add(first)
+        circuit_breaker.record(first, None, now=NOW)
+
+        self.assertTrue(circuit_breaker.allow(second, now=NOW + 100))
+        circuit_breaker.release(second)
+        self.assertTrue(circuit_breaker.allow(first, now=NOW + 100))
+
+    @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
+    @patch('postman_sync.download.transport.get')
+    def test_main_code_skips_dead_host(self, mock_get, mock_load_api_key):
+        for entry in entries('http://staging.example.com/a', 'http://staging.example.com/b', 'http://staging.example.com/c'):
+            self.state.add(entry)
+        mock_get.side_effect = requests.exceptions.ConnectionError('refused')
+        breaker.enable(self.state, threshold=2)
+
+        report = main_code(state=self.state)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(report['backed_off'], ['http://staging.example.com/c'])
+        self.assertEqual([entry.get('failures') for entry in self.state.entries()], [1, 1, None])
+
+        mock_get.reset_mock()
+        report = main_code(state=self.state)
+        mock_get.assert_not_called()
+        self.assertEqual(len(report['backed_off']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch, Mock
+
+from postman_sync import codec
+
+# Values whose canonical form depends on details such as key order, escaping and float formatting
+TRICKY_VALUES = [
+    {'b': 1, 'a': [1.5, 1e-7, 10 ** 20, -0.0, True, None], 'ä': 'ünïcode ✓', 'nested': {'z': {}, 'y': []}},
+    {'emoji': '😀', 'control': '\t\n\u0001', 'quote': '"\\'},
+    [3.141592653589793, 1e300, 2 ** 63, 'x'],
+]
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_canonical_dumps_matches_stdlib(self):
+        for value in TRICKY_VALUES:
+            self.assertEqual(codec.canonical_dumps(value), json.dumps(value, sort_keys=True))
+
+    def test_round_trip(self):
+        for value in TRICKY_VALUES:
+            self.assertEqual(codec.loads(codec.dumps(value)), value)
+            self.assertEqual(codec.loads(codec.dumps(value, pretty=True)), value)
+
+    def test_falls_back_for_values_the_fast_backend_rejects(self):
+        self.assertTrue(str(codec.loads('{"value": NaN}')['value']) == 'nan')
+        self.assertEqual(codec.loads(codec.dumps({'big': 2 ** 70})), {'big': 2 ** 70})
+        with self.assertRaises(ValueError):
+            codec.loads('{"broken": ')
+
+    def test_stdlib_backend(self):
+        with patch.object(codec, 'orjson', None):
+            self.assertEqual(codec.dumps({'a': 1}), b'{"a": 1}')
+            self.assertEqual(codec.loads(b'{"a": 1}'), {'a': 1})
+
+    def test_files_and_responses(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'collection.json')
+            codec.write_file(path, TRICKY_VALUES[0])
+            self.assertEqual(codec.read_file(path), TRICKY_VALUES[0])
+        self.assertEqual(codec.response_json(Mock(content=b'{"a": [1]}')), {'a': [1]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch, Mock
+
+from postman_sync import collection_cache
+from postman_sync.collection_cache import CollectionCache
+from postman_sync.main_script import build_collection_json, hash_json
+
+SPEC_HASH = 'a' * 64
+OTHER_HASH = 'b' * 64
+
+
+class TestCollectionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(collection_cache.disable)
+
+    def test_get_returns_a_fresh_copy(self):
+        cache = CollectionCache(self.directory.name)
+        self.assertIsNone(cache.get(SPEC_HASH, 'postman'))
+        cache.put(SPEC_HASH, 'postman', {'collection': {'item': []}})
+
+        collection = cache.get(SPEC_HASH, 'postman')
+        collection['collection']['item'].append({'name': 'merged'})
+        self.assertEqual(cache.get(SPEC_HASH, 'postman'), {'collection': {'item': []}})
+        self.assertIsNone(cache.get(SPEC_HASH, 'local'))
+
+    def test_evicts_least_recently_used(self):
+        cache = CollectionCache(self.directory.name, max_bytes=100)
+        cache.put(SPEC_HASH, 'postman', {'data': 'x' * 30})
+        cache.put(OTHER_HASH, 'postman', {'data': 'y' * 30})
+        cache.get(SPEC_HASH, 'postman')
+        cache.put('c' * 64, 'postman', {'data': 'z' * 30})
+
+        self.assertIsNotNone(cache.get(SPEC_HASH, 'postman'))
+        self.assertIsNone(cache.get(OTHER_HASH, 'postman'))
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_use_order_survives_restarts(self):
+        cache = CollectionCache(self.directory.name)
+        cache.put(SPEC_HASH, 'postman', {'data': 'x' * 30})
+        cache.put(OTHER_HASH, 'postman', {'data': 'y' * 30})
+        old = time.time() - 60
+        os.utime(cache._path(OTHER_HASH, 'postman'), (old, old))
+
+        reopened = CollectionCache(self.directory.name, max_bytes=60)
+        self.assertIsNotNone(reopened.get(SPEC_HASH, 'postman'))
+        self.assertIsNone(reopened.get(OTHER_HASH, 'postman'))
+
+    def test_unreadable_entries_are_dropped(self):
+        cache = CollectionCache(self.directory.name)
+        cache.put(SPEC_HASH, 'postman', {'collection': {}})
+        with open(cache._path(SPEC_HASH, 'postman'), 'w') as file:
+            file.write('{"truncated": ')
+
+        self.assertIsNone(cache.get(SPEC_HASH, 'postman'))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_get_or_build_converts_each_spec_once(self):
+        cache = CollectionCache(self.directory.name)
+        build = Mock(side_effect=lambda: time.sleep(0.05) or {'collection': {'item': []}})
+
+        threads = [threading.Thread(target=cache.get_or_build, args=(SPEC_HASH, 'postman', build)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(build.call_count, 1)
+
+        # Failed conversions are not cached
+        self.assertIsNone(cache.get_or_build(OTHER_HASH, 'postman', lambda: None))
+        self.assertIsNone(cache.get(OTHER_HASH, 'postman'))
+
+    @patch('postman_sync.main_script.cleanup_collection')
+    @patch('postman_sync.main_script.get_collection_json', return_value={'collection': {'item': []}})
+    @patch('postman_sync.main_script.create_collection_json', return_value='temp_uid')
+    def test_build_collection_json_reuses_identical_specs(self, mock_create, mock_get, mock_cleanup):
+        spec = {'openapi': '3.0.0', 'paths': {}}
+        collection_cache.enable(self.directory.name)
+
+        first = build_collection_json('http://staging.example.com', spec, 'test_api_key')
+        second = build_collection_json('http://prod.example.com', dict(spec), 'test_api_key', spec_hash=hash_json(spec))
+        self.assertEqual(first, second)
+        mock_create.assert_called_once()
+        mock_cleanup.assert_called_once_with('temp_uid', 'test_api_key')
+
+
+if __name__ == '__main__':
+    unittest.main()
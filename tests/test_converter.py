@@ -0,0 +1,131 @@
+import unittest
+import json
+import os
+from postman_sync.converter import convert_spec
+from postman_sync.endpoint_transfer import extract_endpoints, update_endpoints
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'converter')
+
+# Spec fixtures and the converter output saved for each one. The outputs are
+# snapshots of convert_spec itself, not captures of the Postman importer, so
+# they catch unintended changes rather than prove Postman compatibility
+SNAPSHOTS = [
+    ('bookmarks.openapi.json', 'bookmarks.postman.json'),
+    ('petstore.swagger.json', 'petstore.postman.json'),
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r') as file:
+        return json.load(file)
+
+
+def project(items):
+    """
+    Reduces an item tree to the parts the sync relies on, so snapshots only change when those parts do.
+    """
+    projected = []
+    for item in items:
+        if 'item' in item:
+            projected.append({'folder': item['name'], 'item': project(item['item'])})
+        else:
+            request = item['request']
+            url = request['url']
+            projected.append({
+                'name': item['name'],
+                'method': request['method'],
+                'raw': url['raw'],
+                'path': url.get('path', []),
+                'query': [(param['key'], param.get('value')) for param in url.get('query', [])],
+                'variable': [param['key'] for param in url.get('variable', [])],
+                'header': sorted(header['key'] for header in request.get('header', [])),
+                'body': request.get('body'),
+                'response_codes': [response['code'] for response in item.get('response', [])],
+            })
+    return projected
+
+
+class TestConverter(unittest.TestCase):
+
+    def test_snapshots_are_unchanged(self):
+        for spec_name, expected_name in SNAPSHOTS:
+            with self.subTest(spec=spec_name):
+                converted = convert_spec(load_fixture(spec_name))
+                expected = load_fixture(expected_name)
+                self.assertEqual(converted['collection']['info']['name'], expected['collection']['info']['name'])
+                self.assertEqual(converted['collection']['variable'], expected['collection']['variable'])
+                self.assertEqual(project(converted['collection']['item']), project(expected['collection']['item']))
+
+    def test_openapi_request(self):
+        converted = convert_spec(load_fixture('bookmarks.openapi.json'))
+        endpoints = extract_endpoints(converted['collection']['item'])
+        self.assertIn('GET {{baseUrl}}/bookmarks?skip=<integer>&limit=<integer>', endpoints)
+        item = endpoints['PUT {{baseUrl}}/bookmarks/:bookmark_id']
+        self.assertEqual(item['request']['url']['variable'][0]['key'], 'bookmark_id')
+        self.assertEqual(item['request']['body']['mode'], 'raw')
+        self.assertEqual(json.loads(item['request']['body']['raw'])['title'], '<string>')
+
+    def test_swagger2_request(self):
+        converted = convert_spec(load_fixture('petstore.swagger.json'))
+        self.assertEqual(converted['collection']['variable'][0]['value'], 'https://petstore.example.com/v2')
+        endpoints = extract_endpoints(converted['collection']['item'])
+        self.assertIn('GET {{baseUrl}}/pet/findByStatus?status=<string>,<string>', endpoints)
+        form = endpoints['POST {{baseUrl}}/pet/:petId']['request']['body']
+        self.assertEqual(form['mode'], 'urlencoded')
+        self.assertEqual([field['key'] for field in form['urlencoded']], ['name', 'status'])
+
+    def test_single_request_paths_are_not_foldered(self):
+        spec = {'openapi': '3.0.0', 'info': {'title': 'API'}, 'paths': {'/health': {'get': {'summary': 'Health'}}}}
+        items = convert_spec(spec)['collection']['item']
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]['name'], 'Health')
+        self.assertEqual(items[0]['request']['url']['raw'], '{{baseUrl}}/health')
+
+    def test_circular_schema(self):
+        spec = {
+            'openapi': '3.0.0',
+            'info': {'title': 'API'},
+            'paths': {'/nodes': {'post': {'requestBody': {'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Node'}}}}}}},
+            'components': {'schemas': {'Node': {'type': 'object', 'properties': {'child': {'$ref': '#/components/schemas/Node'}}}}},
+        }
+        items = convert_spec(spec)['collection']['item']
+        body = json.loads(items[0]['request']['body']['raw'])
+        self.assertIn('Circular reference', body['child'])
+
+    def test_path_extensions_are_skipped(self):
+        spec = {'openapi': '3.0.0', 'info': {'title': 'API'}, 'paths': {
+            'x-generated-by': 'tool',
+            'x-version': 3,
+            '/health': {'get': {'summary': 'Health'}},
+        }}
+        items = convert_spec(spec)['collection']['item']
+        self.assertEqual([item['name'] for item in items], ['Health'])
+
+    def test_response_extensions_and_range_codes(self):
+        responses = {
+            '200': {'description': 'OK'},
+            '2xx': {'description': 'Other success'},
+            '4XX': {'description': 'Client error'},
+            'default': {'description': 'Error'},
+            'x-rate-limited': True,
+        }
+        spec = {'openapi': '3.0.0', 'info': {'title': 'API'}, 'paths': {'/health': {'get': {'summary': 'Health', 'responses': responses}}}}
+        item, = convert_spec(spec)['collection']['item']
+        self.assertEqual([(response['name'], response['code']) for response in item['response']],
+                         [('OK', 200), ('Other success', 200), ('Client error', 400), ('Error', 500)])
+
+    def test_invalid_spec(self):
+        self.assertIsNone(convert_spec({'info': {'title': 'API'}}))
+
+    def test_update_endpoints_offline(self):
+        old = convert_spec(load_fixture('bookmarks.openapi.json'))
+        new = convert_spec(load_fixture('bookmarks.openapi.json'))
+        old_endpoints = extract_endpoints(old['collection']['item'])
+        old_endpoints['POST {{baseUrl}}/bookmarks']['event'] = [{'listen': 'test', 'script': {'exec': ['pm.test("ok")']}}]
+        stats = {'old_endpoints_count': len(old_endpoints), 'updated_endpoints': [], 'updated_events_count': 0}
+        updated_count = update_endpoints(new['collection']['item'], old_endpoints, stats)
+        self.assertEqual(updated_count, len(old_endpoints))
+        self.assertEqual(stats['updated_events_count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import hashlib
+import http.server
+import json
+import threading
+from unittest.mock import patch, Mock
+
+from postman_sync import download, metrics, transport
+from postman_sync.helper_functions import create_collection_json, set_api_url, POSTMAN_API_URL
+
+
+def streamed_response(chunks, status_code=200):
+    return Mock(status_code=status_code, url='http://example.com/spec.json', iter_content=Mock(return_value=iter(chunks)))
+
+
+class TestDownload(unittest.TestCase):
+
+    def test_read_body_digests_while_streaming(self):
+        spec = {'openapi': '3.0.0', 'paths': {'/pets': {'get': {}}}}
+        body = json.dumps(spec).encode()
+        response = streamed_response([body[:10], body[10:]])
+
+        with download.read_body(response) as spec_body:
+            self.assertEqual(spec_body.size, len(body))
+            self.assertEqual(spec_body.sha256, hashlib.sha256(body).hexdigest())
+            self.assertEqual(spec_body.parse(), spec)
+        response.close.assert_called_once()
+
+    def test_read_body_spools_past_the_memory_ceiling(self):
+        response = streamed_response([b'[1, ', b'2, ', b'3]'])
+
+        with download.read_body(response, max_in_memory=4) as spec_body:
+            self.assertTrue(spec_body.file._rolled)
+            self.assertEqual(spec_body.parse(), [1, 2, 3])
+
+        with download.read_body(streamed_response([b'[1]'])) as spec_body:
+            self.assertFalse(spec_body.file._rolled)
+
+    def test_read_body_enforces_the_size_limit(self):
+        response = streamed_response([b'x' * 10, b'x' * 10])
+
+        with self.assertRaises(download.SpecTooLarge):
+            download.read_body(response, max_size=15)
+        response.close.assert_called_once()
+
+    @patch('postman_sync.download.transport.get')
+    def test_download_spec_skips_the_body_of_errors(self, mock_get):
+        mock_get.return_value = streamed_response([b'Not found', b' and more'], status_code=404)
+
+        response, body = download.download_spec('http://example.com/spec.json', {'If-None-Match': '"abc"'})
+        self.assertIsNone(body)
+        mock_get.assert_called_once_with('http://example.com/spec.json', headers={'If-None-Match': '"abc"'}, stream=True, metric=metrics.SPEC_DOWNLOADS)
+        self.assertEqual(download.error_excerpt(response), 'Not found')
+
+    def test_download_spec_reuses_connections(self):
+        connections = set()
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                connections.add(self.client_address)
+                if self.path == '/spec.json':
+                    self.send_response(304)
+                    self.end_headers()
+                else:
+                    body = b'Not found'
+                    self.send_response(404)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        transport.configure()
+        url = f'http://127.0.0.1:{server.server_port}'
+
+        for _ in range(5):
+            response, body = download.download_spec(f'{url}/spec.json', {'If-None-Match': '"abc"'})
+            self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(connections), 1)
+
+        response, body = download.download_spec(f'{url}/missing.json')
+        self.assertEqual(download.error_excerpt(response), 'Not found')
+
+    def test_import_payload_is_sent_from_the_body(self):
+        spec = {'openapi': '3.0.0', 'info': {'title': 'Pets'}, 'paths': {}}
+        received = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                received.append((self.headers.get('Transfer-Encoding'), self.rfile.read(int(self.headers['Content-Length']))))
+                # The first attempt is rate limited, so the payload is sent twice
+                status, body = (429, b'') if len(received) == 1 else (200, b'{"collections": [{"uid": "temp_uid"}]}')
+                self.send_response(status)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        set_api_url(f'http://127.0.0.1:{server.server_port}')
+        self.addCleanup(set_api_url, POSTMAN_API_URL)
+
+        with download.read_body(streamed_response([json.dumps(spec).encode()]), max_in_memory=4) as spec_body:
+            with patch('postman_sync.helper_functions.codec.dumps') as mock_dumps:
+                self.assertEqual(create_collection_json('http://example.com/spec.json', 'test_api_key', spec, spec_body), 'temp_uid')
+        mock_dumps.assert_not_called()
+        self.assertEqual(len(received), 2)
+        for transfer_encoding, body in received:
+            self.assertIsNone(transfer_encoding)
+            self.assertEqual(json.loads(body), {'type': 'json', 'input': spec})
+
+    def test_import_payload_needs_a_utf8_object(self):
+        with download.read_body(streamed_response([b'\xef\xbb\xbf{"openapi": "3.0.0"}'])) as spec_body:
+            self.assertIsNone(spec_body.import_payload())
+
+    def test_configure(self):
+        previous = download.MAX_IN_MEMORY, download.MAX_SIZE
+        try:
+            download.configure(max_in_memory=1024, max_size=2048)
+            self.assertEqual((download.MAX_IN_MEMORY, download.MAX_SIZE), (1024, 2048))
+            download.configure(max_size=0)
+            self.assertIsNone(download.MAX_SIZE)
+        finally:
+            download.MAX_IN_MEMORY, download.MAX_SIZE = previous
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import json
-from postman_sync.endpoint_transfer import extract_endpoints, update_endpoints
+from postman_sync.endpoint_transfer import extract_endpoints, update_endpoints, merge_collections, index_endpoints, diff_collections, index_folders, path_template, EndpointMatcher
 
 class TestEndpointTransfer(unittest.TestCase):
 
@@ -85,5 +85,117 @@ class TestEndpointTransfer(unittest.TestCase):
         self.assertEqual(updated_count, 0)
         self.assertNotIn('PUT /endpoint3', stats['updated_endpoints'])
 
+    def test_merge_collections(self):
+        merged, stats = merge_collections(self.old_data, self.new_data)
+        self.assertIs(merged, self.new_data)
+        self.assertEqual(stats['old_endpoints_count'], 1)
+        self.assertEqual(stats['updated_count'], 1)
+        self.assertEqual(stats['updated_events_count'], 1)
+        self.assertEqual(merged['collection']['item'][0]['event'], self.old_data['collection']['item'][0]['event'])
+        self.assertEqual(merged['collection']['item'][1]['event'], [])
+
+    def test_index_endpoints_folder_paths(self):
+        items = [
+            {'name': 'pets', 'item': [
+                {'name': 'List', 'request': {'method': 'GET', 'url': {'raw': '/pets'}}},
+                {'name': '{id}', 'item': [
+                    {'name': 'Get', 'request': {'method': 'GET', 'url': {'raw': '/pets/:id'}}},
+                ]},
+            ]},
+            {'name': 'Health', 'request': {'method': 'GET', 'url': {'raw': '/health'}}},
+        ]
+        index = index_endpoints(items)
+        self.assertEqual(list(index), ['GET /pets', 'GET /pets/:id', 'GET /health'])
+        self.assertEqual(index['GET /pets/:id'][1], ('pets', '{id}'))
+        self.assertEqual(index['GET /health'][1], ())
+        self.assertEqual(index['GET /pets'][0]['name'], 'List')
+
+    def test_deeply_nested_folders(self):
+        depth = 5000
+        old_items = [{'name': 'leaf', 'request': {'method': 'GET', 'url': {'raw': '/deep'}}, 'event': [{'listen': 'test'}]}]
+        new_items = [{'name': 'leaf', 'request': {'method': 'GET', 'url': {'raw': '/deep'}}, 'event': []}]
+        for level in range(depth):
+            old_items = [{'name': f'folder{level}', 'item': old_items}]
+            new_items = [{'name': f'folder{level}', 'item': new_items}]
+
+        index = index_endpoints(old_items)
+        self.assertEqual(len(index['GET /deep'][1]), depth)
+        stats = {'old_endpoints_count': 1, 'updated_endpoints': [], 'updated_events_count': 0}
+        self.assertEqual(update_endpoints(new_items, extract_endpoints(old_items), stats), 1)
+        self.assertEqual(stats['updated_events_count'], 1)
+
+    def test_diff_collections(self):
+        old_items = [
+            {'name': 'pets', 'id': 'f1', 'item': [
+                {'name': 'List', 'id': 'r1', 'request': {'method': 'GET', 'url': {'raw': '/pets'}}},
+                {'name': 'Delete', 'id': 'r2', 'request': {'method': 'DELETE', 'url': {'raw': '/pets'}}},
+            ]},
+        ]
+        new_items = [
+            {'name': 'pets', 'item': [
+                {'name': 'List all', 'request': {'method': 'GET', 'url': {'raw': '/pets'}}},
+                {'name': 'Create', 'request': {'method': 'POST', 'url': {'raw': '/pets'}}},
+            ]},
+        ]
+        changes = diff_collections(old_items, new_items)
+        self.assertEqual([item['name'] for item, path in changes['added']], ['Create'])
+        self.assertEqual(changes['added'][0][1], ('pets',))
+        self.assertEqual([item['id'] for item in changes['removed']], ['r2'])
+        self.assertEqual([(old['id'], new['name']) for old, new in changes['modified']], [('r1', 'List all')])
+        self.assertEqual(index_folders(old_items)[('pets',)]['id'], 'f1')
+
+    def test_diff_collections_pairs_changed_urls(self):
+        old_items = [{'name': 'Get pet', 'id': 'r1', 'request': {'method': 'GET', 'url': {'raw': '{{baseUrl}}/pets/:petId'}}}]
+        new_items = [{'name': 'Get pet', 'request': {'method': 'GET', 'url': {'raw': '{{baseUrl}}/pets/:id'}}}]
+        changes = diff_collections(old_items, new_items)
+        self.assertEqual(changes['added'], [])
+        self.assertEqual(changes['removed'], [])
+        self.assertEqual([(old['id'], new['request']['url']['raw']) for old, new in changes['modified']], [('r1', '{{baseUrl}}/pets/:id')])
+
+    def test_diff_collections_unchanged(self):
+        changes = diff_collections(self.old_data['collection']['item'], self.old_data['collection']['item'])
+        self.assertEqual(changes, {'added': [], 'removed': [], 'modified': []})
+
+    def test_path_template(self):
+        self.assertEqual(path_template('{{baseUrl}}/pets/:petId?limit=10'), ('pets', '{}'))
+        self.assertEqual(path_template('https://api.example.com/v1/pets/{{id}}/toys#top'), ('v1', 'pets', '{}', 'toys'))
+        self.assertEqual(path_template('/pets/{petId}.json'), ('pets', '{}.json'))
+        self.assertEqual(path_template('{{baseUrl}}'), ())
+
+    def match_events(self, old_urls, new_urls):
+        old_items = [{'name': f'Old {index}', 'request': {'method': 'GET', 'url': {'raw': url}}, 'event': [{'listen': 'test', 'script': {'exec': [url]}}]}
+                     for index, url in enumerate(old_urls)]
+        new_items = [{'name': f'New {index}', 'request': {'method': 'GET', 'url': {'raw': url}}} for index, url in enumerate(new_urls)]
+        stats = {'updated_endpoints': [], 'updated_events_count': 0}
+        update_endpoints(new_items, EndpointMatcher(extract_endpoints(old_items)), stats)
+        return [item['event'][0]['script']['exec'][0] if 'event' in item else None for item in new_items], stats['match_rules']
+
+    def test_update_endpoints_fallback_rules(self):
+        events, rules = self.match_events(
+            ['{{baseUrl}}/pets/:petId', '{{baseUrl}}/pets?limit=1&offset=0', '{{baseUrl}}/v1/stores/{{id}}', '/health'],
+            ['{{baseUrl}}/pets/:id', '{{apiUrl}}/pets?offset=0&limit=1', '{{baseUrl}}/stores/{{storeId}}', '/health'])
+        self.assertEqual(events, ['{{baseUrl}}/pets/:petId', '{{baseUrl}}/pets?limit=1&offset=0', '{{baseUrl}}/v1/stores/{{id}}', '/health'])
+        self.assertEqual(rules, {'exact': 1, 'template': 2, 'suffix': 1, 'name': 0})
+
+    def test_update_endpoints_fallback_rules_are_not_greedy(self):
+        # The exact match is resolved first, even though the first new request would match the same template
+        events, rules = self.match_events(['/pets/:id'], ['/pets/{petId}', '/pets/:id'])
+        self.assertEqual(events, [None, '/pets/:id'])
+
+        # Ambiguous templates and parameter-only suffixes are left unmatched
+        events, rules = self.match_events(['/pets/{a}?x=1', '/pets/{b}?y=1', '/users/{id}'], ['/pets/{c}', '/{id}'])
+        self.assertEqual(events, [None, None])
+        self.assertEqual(sum(rules.values()), 0)
+
+    def test_update_endpoints_name_fallback(self):
+        old_items = [{'name': 'listPets', 'request': {'method': 'GET', 'url': {'raw': '/pets'}}, 'event': [{'listen': 'test'}]}]
+        new_items = [{'name': 'listPets', 'request': {'method': 'GET', 'url': {'raw': '/animals'}}},
+                     {'name': 'listPets', 'request': {'method': 'POST', 'url': {'raw': '/animals'}}}]
+        stats = {'updated_endpoints': [], 'updated_events_count': 0}
+        self.assertEqual(update_endpoints(new_items, extract_endpoints(old_items), stats), 1)
+        self.assertEqual(new_items[0]['event'], [{'listen': 'test'}])
+        self.assertNotIn('event', new_items[1])
+        self.assertEqual(stats['match_rules']['name'], 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from fake_postman import main as fake_postman
+from postman_sync import helper_functions
+from postman_sync.helper_functions import api_url
+
+SPEC = {'openapi': '3.0.0', 'info': {'title': 'API'}, 'paths': {'/pets': {'get': {'summary': 'List pets'}}}}
+HEADERS = {'X-Api-Key': 'test_api_key'}
+
+
+class TestFakePostman(unittest.TestCase):
+
+    def setUp(self):
+        fake_postman.reset()
+        self.addCleanup(fake_postman.configure, latency=0.0, latency_jitter=0.0, rate_limit=0, failure_rate=0.0)
+        self.client = TestClient(fake_postman.app)
+
+    def test_collection_lifecycle(self):
+        response = self.client.post('/import/openapi', headers=HEADERS, json={'type': 'json', 'input': SPEC})
+        uid = response.json()['collections'][0]['uid']
+
+        collection = self.client.get(f'/collections/{uid}', headers=HEADERS).json()['collection']
+        self.assertEqual(collection['item'][0]['request']['url']['raw'], '{{baseUrl}}/pets')
+        self.assertIn('id', collection['item'][0])
+
+        collection['info']['name'] = 'Renamed'
+        self.client.put(f'/collections/{uid}', headers=HEADERS, json={'collection': collection})
+        self.assertEqual(self.client.get('/collections', headers=HEADERS).json()['collections'][0]['name'], 'Renamed')
+
+        self.assertEqual(self.client.delete(f'/collections/{uid}', headers=HEADERS).status_code, 200)
+        self.assertEqual(self.client.get(f'/collections/{uid}', headers=HEADERS).status_code, 404)
+
+    def test_request_endpoints(self):
+        uid = self.client.post('/collections', headers=HEADERS, json={'collection': {'info': {'name': 'API'}, 'item': []}}).json()['collection']['uid']
+        request_id = self.client.post(f'/collections/{uid}/requests', headers=HEADERS,
+                                      json={'name': 'Get', 'method': 'GET', 'url': '{{baseUrl}}/a', 'headers': 'Accept: application/json'}).json()['data']['id']
+        self.client.put(f'/collections/{uid}/requests/{request_id}', headers=HEADERS, json={'name': 'Get', 'method': 'GET', 'url': '{{baseUrl}}/b'})
+        item = fake_postman.collections[uid]['item'][0]
+        self.assertEqual(item['request']['url']['raw'], '{{baseUrl}}/b')
+        self.client.delete(f'/collections/{uid}/requests/{request_id}', headers=HEADERS)
+        self.assertEqual(fake_postman.collections[uid]['item'], [])
+
+    def test_updated_at_changes_with_every_edit(self):
+        uid = self.client.post('/collections', headers=HEADERS, json={'collection': {'info': {'name': 'API'}, 'item': []}}).json()['collection']['uid']
+        listed = self.client.get('/collections', headers=HEADERS).json()['collections'][0]
+        self.assertEqual(listed['createdAt'], listed['updatedAt'])
+
+        self.client.post(f'/collections/{uid}/requests', headers=HEADERS, json={'name': 'Get', 'method': 'GET', 'url': '{{baseUrl}}/a'})
+        edited = self.client.get('/collections', headers=HEADERS).json()['collections'][0]
+        self.assertEqual(edited['createdAt'], listed['createdAt'])
+        self.assertGreater(edited['updatedAt'], listed['updatedAt'])
+
+    def test_requires_api_key(self):
+        self.assertEqual(self.client.get('/collections').status_code, 401)
+
+    def test_rate_limit(self):
+        fake_postman.configure(rate_limit=2)
+        statuses = [self.client.get('/collections', headers=HEADERS).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.client.get('/collections', headers=HEADERS)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertEqual(fake_postman.stats['rate_limited'], 2)
+
+    def test_failure_injection(self):
+        self.client.put('/_fake/settings', json={'failure_rate': 1.0, 'seed': 1})
+        self.assertEqual(self.client.get('/collections', headers=HEADERS).status_code, 500)
+        self.assertEqual(self.client.get('/_fake/stats').json()['requests']['failed'], 1)
+
+    def test_api_url_is_configurable(self):
+        previous = helper_functions.POSTMAN_API_URL
+        self.addCleanup(helper_functions.set_api_url, previous)
+        helper_functions.set_api_url('http://127.0.0.1:8100/')
+        self.assertEqual(api_url('/collections'), 'http://127.0.0.1:8100/collections')
+
+    @patch.dict('os.environ', {'POSTMAN_API_KEY': 'test_api_key'})
+    def test_main_code_end_to_end(self):
+        from benchmarks.sync_load import run_load_test
+
+        result = run_load_test(links=3, endpoints=4, changed_ratio=0.67, workers=2, failure_rate=0.0)
+        self.assertEqual(result['changed_links'], 2)
+        self.assertEqual(result['fake_postman']['POST /import/openapi'], 2)
+        self.assertEqual(result['fake_postman']['POST /collections'], 2)
+        self.assertEqual(helper_functions.POSTMAN_API_URL, 'https://api.getpostman.com')
+
+if __name__ == '__main__':
+    unittest.main()
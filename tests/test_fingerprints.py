@@ -0,0 +1,85 @@
+import unittest
+import copy
+from postman_sync.fingerprints import operation_fingerprints, diff_operations, has_changes, DOCUMENT_KEY
+
+class TestFingerprints(unittest.TestCase):
+
+    def setUp(self):
+        self.spec = {
+            'openapi': '3.0.0',
+            'info': {'title': 'Pets', 'description': 'Pet API'},
+            'paths': {
+                '/pets': {
+                    'get': {'summary': 'List pets', 'description': 'Lists pets', 'responses': {'200': {'description': 'OK', 'content': {'application/json': {'schema': {'type': 'array', 'items': {'$ref': '#/components/schemas/Pet'}}}}}}},
+                    'post': {'summary': 'Create pet', 'requestBody': {'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Pet'}}}}},
+                },
+                '/pets/{id}': {
+                    'parameters': [{'name': 'id', 'in': 'path', 'required': True, 'schema': {'type': 'integer'}}],
+                    'get': {'summary': 'Get pet'},
+                },
+            },
+            'components': {'schemas': {'Pet': {'type': 'object', 'properties': {'name': {'type': 'string'}, 'description': {'type': 'string'}}}}},
+        }
+
+    def test_operation_keys(self):
+        fingerprints = operation_fingerprints(self.spec)
+        self.assertEqual(set(fingerprints), {DOCUMENT_KEY, 'GET /pets', 'POST /pets', 'GET /pets/{id}'})
+
+    def test_description_changes_are_detected(self):
+        # The converter copies descriptions into requests and names saved responses after them
+        for change in (
+            lambda spec: spec['info'].update(description='Pet store API'),
+            lambda spec: spec['paths']['/pets']['get'].update(description='Lists all pets'),
+            lambda spec: spec['paths']['/pets']['get']['responses']['200'].update(description='Success'),
+            lambda spec: spec['paths']['/pets/{id}']['parameters'][0].update(description='The pet ID'),
+        ):
+            changed = copy.deepcopy(self.spec)
+            change(changed)
+            self.assertTrue(has_changes(diff_operations(operation_fingerprints(self.spec), operation_fingerprints(changed))))
+
+    def test_external_docs_and_extensions_are_ignored(self):
+        changed = copy.deepcopy(self.spec)
+        changed['paths']['/pets']['get']['externalDocs'] = {'url': 'https://docs.example.com/pets'}
+        changed['paths']['/pets']['get']['x-internal'] = True
+        changed['paths']['x-generated-by'] = 'tool'
+        diff = diff_operations(operation_fingerprints(self.spec), operation_fingerprints(changed))
+        self.assertFalse(has_changes(diff))
+
+    def test_property_named_description_is_kept(self):
+        changed = copy.deepcopy(self.spec)
+        del changed['components']['schemas']['Pet']['properties']['description']
+        diff = diff_operations(operation_fingerprints(self.spec), operation_fingerprints(changed))
+        self.assertEqual(diff['modified'], ['GET /pets', 'POST /pets'])
+
+    def test_shared_schema_change(self):
+        changed = copy.deepcopy(self.spec)
+        changed['components']['schemas']['Pet']['properties']['age'] = {'type': 'integer'}
+        diff = diff_operations(operation_fingerprints(self.spec), operation_fingerprints(changed))
+        self.assertEqual(diff, {'added': [], 'removed': [], 'modified': ['GET /pets', 'POST /pets']})
+
+    def test_added_and_removed_operations(self):
+        changed = copy.deepcopy(self.spec)
+        del changed['paths']['/pets/{id}']
+        changed['paths']['/pets']['delete'] = {'summary': 'Delete pets'}
+        diff = diff_operations(operation_fingerprints(self.spec), operation_fingerprints(changed))
+        self.assertEqual(diff, {'added': ['DELETE /pets'], 'removed': ['GET /pets/{id}'], 'modified': []})
+
+    def test_path_parameter_change(self):
+        changed = copy.deepcopy(self.spec)
+        changed['paths']['/pets/{id}']['parameters'][0]['schema'] = {'type': 'string'}
+        diff = diff_operations(operation_fingerprints(self.spec), operation_fingerprints(changed))
+        self.assertEqual(diff['modified'], ['GET /pets/{id}'])
+
+    def test_circular_references(self):
+        spec = {
+            'openapi': '3.0.0',
+            'paths': {'/nodes': {'get': {'responses': {'200': {'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Node'}}}}}}}},
+            'components': {'schemas': {'Node': {'type': 'object', 'properties': {'children': {'type': 'array', 'items': {'$ref': '#/components/schemas/Node'}}}}}},
+        }
+        changed = copy.deepcopy(spec)
+        changed['components']['schemas']['Node']['properties']['name'] = {'type': 'string'}
+        diff = diff_operations(operation_fingerprints(spec), operation_fingerprints(changed))
+        self.assertEqual(diff['modified'], ['GET /nodes'])
+
+if __name__ == '__main__':
+    unittest.main()
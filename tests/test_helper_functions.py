@@ -1,56 +1,57 @@
 import unittest
+import json
 from unittest.mock import patch, Mock
-from postman_sync.helper_functions import cleanup_collection, get_collection_json, fetch_swagger_json, create_collection_json
+from postman_sync.helper_functions import cleanup_collection, get_collection_json, fetch_swagger_json, create_collection_json, update_collection, create_request, update_request, delete_request, request_payload
 
 class TestHelperFunctions(unittest.TestCase):
 
-    @patch('postman_sync.helper_functions.requests.delete')
+    @patch('postman_sync.helper_functions.transport.delete')
     def test_cleanup_collection(self, mock_delete):
         mock_delete.return_value = Mock(status_code=200)
         result = cleanup_collection('collection_id', 'api_key')
         self.assertTrue(result)
 
-    @patch('postman_sync.helper_functions.requests.delete')
+    @patch('postman_sync.helper_functions.transport.delete')
     def test_cleanup_collection_fail(self, mock_delete):
         mock_delete.return_value = Mock(status_code=404)
         result = cleanup_collection('collection_id', 'api_key')
         self.assertFalse(result)
 
-    @patch('postman_sync.helper_functions.requests.get')
+    @patch('postman_sync.helper_functions.transport.get')
     def test_get_collection_json(self, mock_get):
-        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={'collection': {}}))
+        mock_get.return_value = Mock(status_code=200, content=b'{"collection": {}}')
         result = get_collection_json('collection_id', 'api_key')
         self.assertIsNotNone(result)
         self.assertIn('collection', result)
 
-    @patch('postman_sync.helper_functions.requests.get')
+    @patch('postman_sync.helper_functions.transport.get')
     def test_get_collection_json_fail(self, mock_get):
         mock_get.return_value = Mock(status_code=404)
         result = get_collection_json('collection_id', 'api_key')
         self.assertIsNone(result)
 
-    @patch('postman_sync.helper_functions.requests.get')
+    @patch('postman_sync.helper_functions.transport.get')
     def test_fetch_swagger_json(self, mock_get):
-        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={'swagger': '2.0'}))
+        mock_get.return_value = Mock(status_code=200, iter_content=Mock(return_value=iter([b'{"swagger": ', b'"2.0"}'])))
         result = fetch_swagger_json('http://example.com/swagger.json')
         self.assertIsNotNone(result)
         self.assertIn('swagger', result)
 
-    @patch('postman_sync.helper_functions.requests.get')
+    @patch('postman_sync.helper_functions.transport.get')
     def test_fetch_swagger_json_fail(self, mock_get):
         mock_get.return_value = Mock(status_code=404)
         result = fetch_swagger_json('http://example.com/swagger.json')
         self.assertIsNone(result)
 
-    @patch('postman_sync.helper_functions.requests.post')
+    @patch('postman_sync.helper_functions.transport.post')
     @patch('postman_sync.helper_functions.fetch_swagger_json')
     def test_create_collection_json(self, mock_fetch, mock_post):
         mock_fetch.return_value = {'swagger': '2.0'}
-        mock_post.return_value = Mock(status_code=200, json=Mock(return_value={'collections': [{'uid': 'new_collection_id'}]}))
+        mock_post.return_value = Mock(status_code=200, content=b'{"collections": [{"uid": "new_collection_id"}]}')
         result = create_collection_json('http://example.com/swagger.json', 'api_key')
         self.assertEqual(result, 'new_collection_id')
 
-    @patch('postman_sync.helper_functions.requests.post')
+    @patch('postman_sync.helper_functions.transport.post')
     @patch('postman_sync.helper_functions.fetch_swagger_json')
     def test_create_collection_json_fail(self, mock_fetch, mock_post):
         mock_fetch.return_value = {'swagger': '2.0'}
@@ -58,5 +59,56 @@ class TestHelperFunctions(unittest.TestCase):
         result = create_collection_json('http://example.com/swagger.json', 'api_key')
         self.assertIsNone(result)
 
+    @patch('postman_sync.helper_functions.transport.post')
+    @patch('postman_sync.helper_functions.fetch_swagger_json')
+    def test_create_collection_json_with_downloaded_spec(self, mock_fetch, mock_post):
+        mock_post.return_value = Mock(status_code=200, content=b'{"collections": [{"uid": "new_collection_id"}]}')
+        result = create_collection_json('http://example.com/swagger.json', 'api_key', {'swagger': '2.0'})
+        self.assertEqual(result, 'new_collection_id')
+        result = create_collection_json('http://example.com/swagger.json', 'api_key', b'{"swagger": "2.0"}')
+        self.assertEqual(result, 'new_collection_id')
+        mock_fetch.assert_not_called()
+        self.assertEqual(json.loads(mock_post.call_args[1]['data'])['input'], {'swagger': '2.0'})
+
+    @patch('postman_sync.helper_functions.transport.request')
+    def test_update_collection(self, mock_request):
+        mock_request.return_value = Mock(status_code=200)
+        result = update_collection('collection_id', {'collection': {'info': {'name': 'API'}, 'item': []}}, 'api_key')
+        self.assertTrue(result)
+        args, kwargs = mock_request.call_args
+        self.assertEqual(args, ('PUT', 'https://api.getpostman.com/collections/collection_id'))
+        self.assertEqual(json.loads(kwargs['data']), {'collection': {'info': {'name': 'API'}, 'item': []}})
+
+    @patch('postman_sync.helper_functions.transport.request')
+    def test_request_changes(self, mock_request):
+        mock_request.return_value = Mock(status_code=200)
+        item = {'name': 'Get pet', 'request': {'method': 'GET', 'url': {'raw': '{{baseUrl}}/pets/:id'}, 'header': [{'key': 'Accept', 'value': 'application/json'}]}}
+        self.assertTrue(create_request('collection_id', item, 'api_key', 'folder_id'))
+        self.assertEqual(mock_request.call_args[1]['params'], {'folder': 'folder_id'})
+        self.assertEqual(json.loads(mock_request.call_args[1]['data']), request_payload(item))
+        self.assertTrue(update_request('collection_id', 'request_id', item, 'api_key'))
+        self.assertEqual(mock_request.call_args[0], ('PUT', 'https://api.getpostman.com/collections/collection_id/requests/request_id'))
+        self.assertEqual(json.loads(mock_request.call_args[1]['data']), request_payload(item))
+        mock_request.return_value = Mock(status_code=404)
+        self.assertFalse(delete_request('collection_id', 'request_id', 'api_key'))
+
+    def test_request_payload(self):
+        item = {
+            'name': 'Create pet',
+            'request': {
+                'method': 'POST',
+                'url': {'raw': '{{baseUrl}}/pets'},
+                'header': [{'key': 'Content-Type', 'value': 'application/json'}],
+                'body': {'mode': 'raw', 'raw': '{"name": "<string>"}'},
+            },
+            'event': [{'listen': 'test'}],
+        }
+        payload = request_payload(item)
+        self.assertEqual(payload['url'], '{{baseUrl}}/pets')
+        self.assertEqual(payload['headers'], 'Content-Type: application/json')
+        self.assertEqual(payload['dataMode'], 'raw')
+        self.assertEqual(payload['rawModeData'], '{"name": "<string>"}')
+        self.assertNotIn('events', payload)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from postman_sync import journal
+from postman_sync.journal import Journal
+from postman_sync.main_script import sync_collection, convert_collection, finish_journal
+
+NEW_COLLECTION = {'collection': {'info': {'name': 'API'}, 'item': []}}
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(journal.disable)
+
+    def test_resumes_the_same_spec_only(self):
+        sync_journal = Journal(self.directory.name)
+        link_journal = sync_journal.open('http://example.com', 'hash1')
+        link_journal.checkpoint_collection('convert', NEW_COLLECTION)
+        link_journal.add_temporary('temp_uid')
+
+        resumed = Journal(self.directory.name).open('http://example.com', 'hash1')
+        self.assertEqual(resumed.completed_collection('convert'), NEW_COLLECTION)
+
+        # A changed spec starts over, but still remembers the temporary collection
+        restarted = sync_journal.open('http://example.com', 'hash2')
+        self.assertIsNone(restarted.completed('convert'))
+        self.assertIn('temp_uid', restarted.record['temporary'])
+
+    def test_finish_keeps_pending_temporaries(self):
+        sync_journal = Journal(self.directory.name)
+        link_journal = sync_journal.open('http://example.com', 'hash1')
+        link_journal.checkpoint_collection('convert', NEW_COLLECTION)
+        link_journal.checkpoint('publish', 'new_uid')
+        link_journal.add_temporary('temp_uid')
+
+        sync_journal.finish('http://example.com')
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        self.assertEqual(sync_journal.open('http://example.com', 'hash1').record['stages'], {})
+
+        link_journal.remove_temporary('temp_uid')
+        sync_journal.finish('http://example.com')
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    @patch('postman_sync.journal.cleanup_collection', return_value=True)
+    @patch('postman_sync.journal.list_collections')
+    def test_sweep_deletes_old_orphans(self, mock_list, mock_cleanup):
+        sync_journal = Journal(self.directory.name)
+        link_journal = sync_journal.open('http://example.com', 'hash1')
+        with patch('postman_sync.journal.time.time', return_value=time.time() - 3600):
+            link_journal.add_temporary('orphan')
+            link_journal.add_temporary('gone')
+        link_journal.add_temporary('in_flight')
+        mock_list.return_value = [{'uid': 'orphan'}, {'uid': 'in_flight'}]
+
+        self.assertEqual(sync_journal.sweep('test_api_key'), 1)
+        mock_cleanup.assert_called_once_with('orphan', 'test_api_key')
+        self.assertEqual(list(sync_journal.open('http://example.com', 'hash1').record['temporary']), ['in_flight'])
+
+        # Nothing is listed when no temporary collection is recorded
+        mock_list.reset_mock()
+        Journal(tempfile.mkdtemp(dir=self.directory.name)).sweep('test_api_key')
+        mock_list.assert_not_called()
+
+    @patch('postman_sync.main_script.cleanup_collection', return_value=False)
+    @patch('postman_sync.main_script.get_collection_json', return_value=NEW_COLLECTION)
+    @patch('postman_sync.main_script.create_collection_json', return_value='temp_uid')
+    def test_failed_cleanup_is_recorded(self, mock_create, mock_get, mock_cleanup):
+        link_journal = Journal(self.directory.name).open('http://example.com', 'hash1')
+        convert_collection('http://example.com', {}, 'test_api_key', link_journal=link_journal)
+        self.assertIn('temp_uid', link_journal.record['temporary'])
+
+    @patch('postman_sync.main_script.publish_collection', return_value='new_uid')
+    @patch('postman_sync.main_script.fetch_old_collection')
+    @patch('postman_sync.main_script.build_collection_json')
+    def test_sync_collection_resumes(self, mock_build, mock_fetch_old, mock_publish):
+        journal.enable(self.directory.name)
+        mock_build.side_effect = lambda *args: {'collection': {'info': {'name': 'API'}, 'item': []}}
+        mock_fetch_old.return_value = None
+
+        # The old collection could not be fetched, so the next attempt reuses the conversion
+        self.assertIsNone(sync_collection('http://example.com', {}, 'old_uid', 'test_api_key', spec_hash='hash1'))
+        mock_fetch_old.return_value = {'collection': {'info': {'name': 'API'}, 'item': []}}
+        self.assertEqual(sync_collection('http://example.com', {}, 'old_uid', 'test_api_key', spec_hash='hash1'), 'new_uid')
+        mock_build.assert_called_once()
+
+        # Interrupted before the entry was stored, the sync does not publish again
+        self.assertEqual(sync_collection('http://example.com', {}, 'old_uid', 'test_api_key', spec_hash='hash1'), 'new_uid')
+        mock_publish.assert_called_once()
+
+        finish_journal('http://example.com')
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,23 +1,38 @@
 import unittest
+import hashlib
 from unittest.mock import patch, mock_open, Mock
 import json
+import os
+import tempfile
+import threading
+import time
 
 
 
-from postman_sync.main_script import main_code, new_entry, new_with_existing_collection, save_links
+from postman_sync import metrics, transport
+from postman_sync.fingerprints import operation_fingerprints
+from postman_sync.state import SqliteState
+from postman_sync.scheduler import LinkScheduler
+from postman_sync.main_script import run_daemon, main_code, new_entry, new_with_existing_collection, sync_link, hash_json, write_artifacts, sync_collection, convert_collection
+
+def spec_response(body, status_code=200, headers=None):
+    """
+    Returns a mock of a streamed spec download.
+    """
+    return Mock(status_code=status_code, headers=headers or {}, content=body, url='http://example.com',
+                iter_content=Mock(side_effect=lambda chunk_size=None: iter([body])))
+
 
 class TestMainScript(unittest.TestCase):
 
     @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
-    @patch('postman_sync.main_script.requests.get')
-    @patch('postman_sync.main_script.requests.post')
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.transport.post')
     @patch('postman_sync.main_script.create_collection_json')
     @patch('postman_sync.main_script.get_collection_json')
     @patch('postman_sync.main_script.cleanup_collection')
-    @patch('postman_sync.main_script.save_links')
-    @patch('postman_sync.main_script.load_links')
     @patch('os.path.exists', return_value=True)
-    def test_main_code(self, mock_exists, mock_load_links, mock_save_links, mock_cleanup, mock_get_collection_json, mock_create_collection_json, mock_requests_post, mock_requests_get, mock_load_api_key):
+    def test_main_code(self, mock_exists, mock_cleanup, mock_get_collection_json, mock_create_collection_json, mock_requests_post, mock_requests_get, mock_load_api_key):
         links = [{
             'Collection UID': 'old_uid',
             'link': 'http://example.com',
@@ -28,103 +43,348 @@ class TestMainScript(unittest.TestCase):
         new_collection_id = 'new_uid'
 
         # Mocking requests
-        mock_requests_get.return_value = Mock(status_code=200, headers={'Content-Type': 'application/json'})
-        mock_requests_get.return_value.json.return_value = new_json
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode(), headers={'Content-Type': 'application/json'})
         mock_requests_post.return_value = Mock(status_code=200, headers={'Content-Type': 'application/json'})
-        mock_requests_post.return_value.json.return_value = {'collections': [{'uid': new_collection_id}]}
+        mock_requests_post.return_value.content = json.dumps({'collection': {'uid': new_collection_id}}).encode()
         mock_create_collection_json.return_value = new_collection_id
         mock_get_collection_json.side_effect = [new_json, new_json]
-        mock_load_links.return_value = links
+        state = Mock()
+        state.entries.return_value = links
 
         # Mock the open function for reading files
         mock_file_open = mock_open(read_data=json.dumps(new_json))
         with patch('builtins.open', mock_file_open) as mock_file:
-            main_code()
+            main_code(state=state)
 
-        # Check that the file was opened and written to
-        mock_file.assert_called()
-        handle = mock_file()
-        handle.write.assert_called()
+        # The merge happens in memory, without writing intermediate files
+        mock_file.assert_not_called()
+        self.assertEqual(json.loads(mock_requests_post.call_args[1]['data']), {'collection': new_json['collection']})
+        self.assertEqual(links[0]['Collection UID'], new_collection_id)
+        state.update.assert_called_once_with(links[0])
+
+        # The downloaded spec is reused rather than fetched again
+        mock_create_collection_json.assert_called_once()
+        self.assertEqual(mock_create_collection_json.call_args[0][:3], ('http://example.com', 'test_api_key', new_json))
 
     @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
-    @patch('postman_sync.main_script.requests.get')
-    @patch('postman_sync.main_script.requests.post')
-    @patch('postman_sync.main_script.save_links')
-    @patch('postman_sync.main_script.load_links')
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.transport.post')
     @patch('os.path.exists', return_value=True)
-    def test_new_entry(self, mock_exists, mock_load_links, mock_save_links, mock_requests_post, mock_requests_get, mock_load_api_key):
-        links = []
+    def test_new_entry(self, mock_exists, mock_requests_post, mock_requests_get, mock_load_api_key):
         new_json = {'swagger': '2.0', 'paths': {}}
         new_collection_id = 'new_uid'
 
         # Mocking requests
-        mock_requests_get.return_value = Mock(status_code=200, headers={'Content-Type': 'application/json'})
-        mock_requests_get.return_value.json.return_value = new_json
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode(), headers={'Content-Type': 'application/json'})
         mock_requests_post.return_value = Mock(status_code=200, headers={'Content-Type': 'application/json'})
-        mock_requests_post.return_value.json.return_value = {'collections': [{'uid': new_collection_id}]}
-        mock_load_links.return_value = links
+        mock_requests_post.return_value.content = json.dumps({'collections': [{'uid': new_collection_id}]}).encode()
+        state = SqliteState(':memory:')
 
-        # Mock the open function for reading files
-        mock_file_open = mock_open(read_data=json.dumps(new_json))
-        with patch('builtins.open', mock_file_open) as mock_file:
-            new_entry('test_api_key', 'http://example.com')
+        new_entry('test_api_key', 'http://example.com', state)
 
-        # Check that the file was opened and written to
-        # mock_file.assert_called()
-        # handle = mock_file()
-        # handle.write.assert_called()
+        # The spec is downloaded once and reused for the import
+        mock_requests_get.assert_called_once()
+        entry = state.get('http://example.com')
+        self.assertEqual(entry['Collection UID'], new_collection_id)
+        self.assertEqual(entry['hash'], hash_json(new_json))
 
     @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
-    @patch('postman_sync.main_script.requests.get')
-    @patch('postman_sync.main_script.requests.post')
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.transport.post')
     @patch('postman_sync.main_script.get_collection_json')
     @patch('postman_sync.main_script.cleanup_collection')
-    @patch('postman_sync.main_script.save_links')
-    @patch('postman_sync.main_script.load_links')
     @patch('os.path.exists', return_value=True)
-    def test_new_with_existing_collection(self, mock_exists, mock_load_links, mock_save_links, mock_cleanup, mock_get_collection_json, mock_requests_post, mock_requests_get, mock_load_api_key):
-        links = []
+    def test_new_with_existing_collection(self, mock_exists, mock_cleanup, mock_get_collection_json, mock_requests_post, mock_requests_get, mock_load_api_key):
         new_json = {'swagger': '2.0', 'paths': {}, 'collection': {'item': []}}
         new_collection_id = 'new_uid'
         old_collection_id = 'old_uid'
 
         # Mocking requests
-        mock_requests_get.return_value = Mock(status_code=200, headers={'Content-Type': 'application/json'})
-        mock_requests_get.return_value.json.return_value = new_json
-        mock_requests_post.return_value = Mock(status_code=200, headers={'Content-Type': 'application/json'})
-        mock_requests_post.return_value.json.return_value = {'collections': [{'uid': new_collection_id}]}
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode(), headers={'Content-Type': 'application/json'})
+        mock_requests_post.side_effect = [Mock(status_code=200, content=json.dumps(body).encode()) for body in ({'collections': [{'uid': new_collection_id}]}, {'collection': {'uid': 'latest_uid'}})]
         mock_get_collection_json.side_effect = [new_json, new_json, new_json, new_json]
-        mock_load_links.return_value = links
+        state = Mock()
 
         # Mock the open function for reading files
         mock_file_open = mock_open(read_data=json.dumps(new_json))
         with patch('builtins.open', mock_file_open) as mock_file:
-            new_with_existing_collection('test_api_key', 'http://example.com', old_collection_id)
+            new_with_existing_collection('test_api_key', 'http://example.com', old_collection_id, state=state)
+
+        # The merge happens in memory, without writing intermediate files
+        mock_file.assert_not_called()
+        state.add.assert_called_once()
+        self.assertEqual(state.add.call_args[0][0]['Collection UID'], 'latest_uid')
+
+    @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
+    @patch('postman_sync.main_script.sync_link')
+    def test_main_code_concurrent(self, mock_sync_link, mock_load_api_key):
+        links = [{'link': f'http://host{i % 2}.example.com/{i}', 'Collection UID': f'uid_{i}', 'hash': 'h'} for i in range(6)]
+        state = Mock()
+        state.entries.return_value = links
+        mock_sync_link.side_effect = lambda entry, *args: entry['link'].endswith(('0', '3'))
+
+        main_code(workers=4, max_per_host=1, state=state)
+
+        processed = sorted(call[0][0]['link'] for call in mock_sync_link.call_args_list)
+        self.assertEqual(processed, sorted(entry['link'] for entry in links))
+        self.assertEqual(state.update.call_count, 2)
+
+    @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
+    @patch('postman_sync.main_script.sync_link')
+    def test_main_code_cancels_links_over_budget(self, mock_sync_link, mock_load_api_key):
+        links = [{'link': f'http://host{i}.example.com', 'Collection UID': f'uid_{i}', 'hash': 'h'} for i in range(3)]
+        state = Mock()
+        state.entries.return_value = links
+
+        def sync(entry, *args, **kwargs):
+            if entry['link'] == 'http://host1.example.com':
+                raise transport.DeadlineExceeded("The time budget ran out.")
+            return True
+
+        mock_sync_link.side_effect = sync
+        report = main_code(workers=2, state=state, link_budget=5)
+
+        self.assertEqual(report['timed_out'], ['http://host1.example.com'])
+        updated = sorted(call[0][0]['link'] for call in state.update.call_args_list)
+        self.assertEqual(updated, ['http://host0.example.com', 'http://host2.example.com'])
+
+    @patch('postman_sync.main_script.cleanup_collection')
+    @patch('postman_sync.main_script.get_collection_json', side_effect=transport.DeadlineExceeded("The time budget ran out."))
+    @patch('postman_sync.main_script.create_collection_json', return_value='temp_uid')
+    def test_convert_collection_deletes_temporary_collection_after_deadline(self, mock_create, mock_get, mock_cleanup):
+        # The cleanup runs in a grace period, not against the expired deadline
+        mock_cleanup.side_effect = lambda *args: transport.check_deadline() or True
+
+        with transport.deadline(60):
+            with self.assertRaises(transport.DeadlineExceeded):
+                convert_collection('http://example.com', {'openapi': '3.0.0'}, 'test_api_key')
+        mock_cleanup.assert_called_once_with('temp_uid', 'test_api_key')
+
+        mock_cleanup.reset_mock()
+        with transport.deadline(-1):
+            with self.assertRaises(transport.DeadlineExceeded):
+                convert_collection('http://example.com', {'openapi': '3.0.0'}, 'test_api_key')
+        mock_cleanup.assert_called_once_with('temp_uid', 'test_api_key')
+
+    @patch('postman_sync.main_script.load_api_key', return_value='test_api_key')
+    @patch('postman_sync.main_script.sync_link')
+    def test_main_code_skips_links_after_run_deadline(self, mock_sync_link, mock_load_api_key):
+        links = [{'link': f'http://host{i}.example.com', 'Collection UID': f'uid_{i}', 'hash': 'h'} for i in range(3)]
+        state = Mock()
+        state.entries.return_value = links
+        mock_sync_link.side_effect = lambda entry, *args, **kwargs: time.sleep(0.2) or False
+
+        report = main_code(state=state, run_deadline=0.1)
+
+        self.assertEqual(mock_sync_link.call_count, 1)
+        self.assertEqual(report['skipped'], ['http://host1.example.com', 'http://host2.example.com'])
+
+    @patch('postman_sync.main_script.sync_link')
+    def test_run_daemon(self, mock_sync_link):
+        state = SqliteState(':memory:')
+        state.add({'link': 'http://a.example.com', 'hash': 'old', 'Collection UID': 'uid_a'})
+        state.add({'link': 'http://b.example.com', 'hash': 'old', 'Collection UID': 'uid_b'})
+        stop_event = threading.Event()
+
+        def sync(entry, *args, **kwargs):
+            if entry['link'] == 'http://a.example.com':
+                entry['hash'] = 'new'
+                return True
+            return False
+
+        mock_sync_link.side_effect = sync
+        scheduler = LinkScheduler(min_interval=0, max_interval=0)
+        with patch.object(scheduler, 'reschedule', side_effect=lambda *args: stop_event.set()) as mock_reschedule:
+            run_daemon(state, 'test_api_key', scheduler=scheduler, stop_event=stop_event)
 
-        # Check that the file was opened and written to
-        mock_file.assert_called()
-        handle = mock_file()
-        handle.write.assert_called()
+        self.assertEqual(mock_sync_link.call_count, 2)
+        changed = {call[0][0]: call[0][1] for call in mock_reschedule.call_args_list}
+        self.assertEqual(changed, {'http://a.example.com': True, 'http://b.example.com': False})
+        self.assertEqual(state.get('http://a.example.com')['hash'], 'new')
 
-    @patch('builtins.open', new_callable=mock_open)
-    def test_save_links(self, mock_open):
-        links = [{'link': 'http://example.com'}]
+    @patch('postman_sync.main_script.sweep_orphans')
+    @patch('postman_sync.main_script.transport.configure')
+    @patch('postman_sync.main_script.sync_link', return_value=False)
+    def test_run_daemon_sizes_pool_once(self, mock_sync_link, mock_configure, mock_sweep_orphans):
+        state = SqliteState(':memory:')
+        state.add({'link': 'http://a.example.com', 'hash': 'old', 'Collection UID': 'uid_a'})
+        stop_event = threading.Event()
+        scheduler = LinkScheduler(min_interval=0, max_interval=0)
+        reschedule = scheduler.reschedule
 
-        # Call the function
-        save_links(links)
+        def reschedule_batch(*args):
+            reschedule(*args)
+            if mock_sync_link.call_count == 3:
+                stop_event.set()
 
-        # Ensure the open function was called with the correct arguments
-        mock_open.assert_called_once_with('links.json', 'w')
+        with patch.object(scheduler, 'reschedule', side_effect=reschedule_batch):
+            run_daemon(state, 'test_api_key', workers=4, scheduler=scheduler, stop_event=stop_event)
 
-        # Collect all write calls into a single call argument
-        handle = mock_open()
-        write_calls = handle.write.call_args_list
+        self.assertEqual(mock_sync_link.call_count, 3)
+        mock_configure.assert_called_once_with(pool_maxsize=4)
+
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.create_collection_json')
+    def test_sync_link_no_changes(self, mock_create_collection_json, mock_requests_get):
+        new_json = {'openapi': '3.0.0'}
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode(), headers={})
+        entry = {'link': 'http://example.com', 'Collection UID': 'old_uid', 'hash': hash_json(new_json)}
+
+        # The first poll only records the digest of the unchanged body
+        self.assertTrue(sync_link(entry, 'test_api_key'))
+        self.assertIn('body_hash', entry)
+        self.assertFalse(sync_link(entry, 'test_api_key'))
+        mock_create_collection_json.assert_not_called()
+        self.assertEqual(entry['Collection UID'], 'old_uid')
+
+    @patch('postman_sync.main_script.codec.loads')
+    @patch('postman_sync.main_script.transport.get')
+    def test_sync_link_unchanged_body_skips_parsing(self, mock_requests_get, mock_loads):
+        body = b'{"openapi": "3.0.0"}'
+        mock_requests_get.return_value = spec_response(body)
+        entry = {'link': 'http://example.com', 'Collection UID': 'old_uid', 'hash': 'old_hash', 'body_hash': hashlib.sha256(body).hexdigest()}
+
+        self.assertFalse(sync_link(entry, 'test_api_key'))
+        mock_loads.assert_not_called()
+
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.sync_collection')
+    def test_sync_link_formatting_only_change(self, mock_sync_collection, mock_requests_get):
+        new_json = {'openapi': '3.0.0', 'paths': {}}
+        mock_requests_get.return_value = spec_response(json.dumps(new_json, indent=2).encode())
+        entry = {'link': 'http://example.com', 'Collection UID': 'old_uid', 'hash': hash_json(new_json), 'body_hash': hashlib.sha256(json.dumps(new_json).encode()).hexdigest()}
+
+        self.assertTrue(sync_link(entry, 'test_api_key'))
+        mock_sync_collection.assert_not_called()
+        self.assertEqual(entry['body_hash'], hashlib.sha256(mock_requests_get.return_value.content).hexdigest())
+
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.create_collection_json')
+    def test_sync_link_stores_validators(self, mock_create_collection_json, mock_requests_get):
+        new_json = {'openapi': '3.0.0'}
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode(), headers={'ETag': '"abc"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        entry = {'link': 'http://example.com', 'Collection UID': 'old_uid', 'hash': hash_json(new_json)}
+
+        self.assertTrue(sync_link(entry, 'test_api_key'))
+        self.assertEqual(entry['etag'], '"abc"')
+        self.assertEqual(entry['last_modified'], 'Wed, 21 Oct 2015 07:28:00 GMT')
+
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.create_collection_json')
+    def test_sync_link_not_modified(self, mock_create_collection_json, mock_requests_get):
+        mock_requests_get.return_value = Mock(status_code=304, headers={})
+        entry = {'link': 'http://example.com', 'Collection UID': 'old_uid', 'hash': 'old_hash', 'etag': '"abc"', 'last_modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+
+        self.assertFalse(sync_link(entry, 'test_api_key'))
+        mock_requests_get.assert_called_once_with('http://example.com', headers={'If-None-Match': '"abc"', 'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'}, stream=True, metric=metrics.SPEC_DOWNLOADS)
+        mock_requests_get.return_value.json.assert_not_called()
+        mock_create_collection_json.assert_not_called()
+
+    def test_write_artifacts(self):
+        with tempfile.TemporaryDirectory() as artifacts_dir:
+            write_artifacts(artifacts_dir, 'http://example.com', {'new.json': {'collection': {}}})
+            write_artifacts(artifacts_dir, 'http://other.example.com', {'new.json': {'collection': {}}})
+            link_dirs = os.listdir(artifacts_dir)
+            self.assertEqual(len(link_dirs), 2)
+            with open(os.path.join(artifacts_dir, link_dirs[0], 'new.json')) as file:
+                self.assertEqual(json.load(file), {'collection': {}})
+
+        with patch('builtins.open', mock_open()) as mock_file:
+            write_artifacts(None, 'http://example.com', {'new.json': {}})
+        mock_file.assert_not_called()
+
+    @patch('postman_sync.main_script.transport.get')
+    @patch('postman_sync.main_script.sync_collection')
+    def test_sync_link_skips_irrelevant_changes(self, mock_sync_collection, mock_requests_get):
+        old_json = {'openapi': '3.0.0', 'paths': {'/pets': {'get': {'summary': 'List pets'}}}}
+        new_json = {'openapi': '3.0.0', 'paths': {'/pets': {'get': {'summary': 'List pets', 'externalDocs': {'url': 'https://docs.example.com'}}}}}
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode(), headers={})
+        entry = {'link': 'http://example.com', 'Collection UID': 'old_uid', 'hash': hash_json(old_json), 'operations': operation_fingerprints(old_json)}
+
+        self.assertTrue(sync_link(entry, 'test_api_key'))
+        mock_sync_collection.assert_not_called()
+        self.assertEqual(entry['hash'], hash_json(new_json))
+        self.assertEqual(entry['Collection UID'], 'old_uid')
+
+        # A relevant change still runs the full sync, even if it only edits a description
+        new_json['paths']['/pets']['get']['description'] = 'Lists all pets'
+        mock_requests_get.return_value = spec_response(json.dumps(new_json).encode())
+        mock_sync_collection.return_value = 'new_uid'
+        self.assertTrue(sync_link(entry, 'test_api_key'))
+        mock_sync_collection.assert_called_once()
+        self.assertEqual(entry['Collection UID'], 'new_uid')
+        self.assertEqual(entry['operations'], operation_fingerprints(new_json))
+
+    @patch('postman_sync.main_script.create_request', return_value=True)
+    @patch('postman_sync.main_script.update_request', return_value=True)
+    @patch('postman_sync.main_script.delete_request', return_value=True)
+    @patch('postman_sync.main_script.create_collection')
+    @patch('postman_sync.main_script.get_collection_json')
+    @patch('postman_sync.main_script.build_collection_json')
+    def test_sync_collection_items_mode(self, mock_build, mock_get_collection_json, mock_create_collection, mock_delete, mock_update, mock_create_request):
+        old_collection = {'collection': {'info': {'name': 'API'}, 'item': [
+            {'name': 'pets', 'id': 'folder_id', 'item': [
+                {'name': 'List', 'id': 'r1', 'request': {'method': 'GET', 'url': {'raw': '/pets'}}, 'event': [{'listen': 'test'}]},
+                {'name': 'Old', 'id': 'r2', 'request': {'method': 'GET', 'url': {'raw': '/pets/old'}}},
+                {'name': 'Same', 'id': 'r3', 'request': {'method': 'GET', 'url': {'raw': '/pets/same'}}},
+            ]},
+        ]}}
+        new_collection = {'collection': {'info': {'name': 'API'}, 'item': [
+            {'name': 'pets', 'item': [
+                {'name': 'List pets', 'request': {'method': 'GET', 'url': {'raw': '/pets'}}},
+                {'name': 'Same', 'request': {'method': 'GET', 'url': {'raw': '/pets/same'}}},
+                {'name': 'pet', 'item': [
+                    {'name': 'New', 'request': {'method': 'POST', 'url': {'raw': '/pets/new'}}},
+                ]},
+            ]},
+        ]}}
+        mock_build.return_value = new_collection
+        mock_get_collection_json.return_value = old_collection
+
+        result = sync_collection('http://example.com', {}, 'old_uid', 'test_api_key', update_mode='items')
+
+        self.assertEqual(result, 'old_uid')
+        mock_create_collection.assert_not_called()
+        mock_delete.assert_called_once_with('old_uid', 'r2', 'test_api_key')
+        mock_update.assert_called_once()
+        self.assertEqual(mock_update.call_args[0][1], 'r1')
+        mock_create_request.assert_called_once()
+        self.assertEqual(mock_create_request.call_args[0][3], 'folder_id')
+
+    @patch('postman_sync.main_script.create_request', return_value=True)
+    @patch('postman_sync.main_script.update_request', return_value=True)
+    @patch('postman_sync.main_script.delete_request', return_value=True)
+    @patch('postman_sync.main_script.get_collection_json')
+    @patch('postman_sync.main_script.build_collection_json')
+    def test_sync_collection_items_mode_keeps_requests_with_changed_urls(self, mock_build, mock_get_collection_json, mock_delete, mock_update, mock_create_request):
+        mock_get_collection_json.return_value = {'collection': {'info': {'name': 'API'}, 'item': [
+            {'name': 'Get pet', 'id': 'r1', 'request': {'method': 'GET', 'url': {'raw': '/pets/:petId'}}, 'event': [{'listen': 'test'}]},
+        ]}}
+        mock_build.return_value = {'collection': {'info': {'name': 'API'}, 'item': [
+            {'name': 'Get pet', 'request': {'method': 'GET', 'url': {'raw': '/pets/:id'}}},
+        ]}}
+
+        result = sync_collection('http://example.com', {}, 'old_uid', 'test_api_key', update_mode='items')
+
+        self.assertEqual(result, 'old_uid')
+        mock_delete.assert_not_called()
+        mock_create_request.assert_not_called()
+        mock_update.assert_called_once()
+        self.assertEqual(mock_update.call_args[0][1], 'r1')
+
+    @patch('postman_sync.main_script.update_collection', return_value=True)
+    @patch('postman_sync.main_script.create_collection')
+    @patch('postman_sync.main_script.get_collection_json')
+    @patch('postman_sync.main_script.build_collection_json')
+    def test_sync_collection_replace_mode(self, mock_build, mock_get_collection_json, mock_create_collection, mock_update_collection):
+        mock_build.return_value = {'collection': {'info': {'name': 'API v2'}, 'item': []}}
+        mock_get_collection_json.return_value = {'collection': {'info': {'name': 'API'}, 'item': []}}
 
-        # Concatenate all the write call arguments into a single string
-        written_content = ''.join(call[0][0] for call in write_calls)
+        result = sync_collection('http://example.com', {}, 'old_uid', 'test_api_key', update_mode='replace')
 
-        # Check that the write method was called with the correct data
-        self.assertEqual(json.dumps(links, indent=4), written_content)
+        self.assertEqual(result, 'old_uid')
+        mock_create_collection.assert_not_called()
+        self.assertEqual(mock_update_collection.call_args[0][1]['collection']['info']['name'], 'API')
 
 
 if __name__ == '__main__':
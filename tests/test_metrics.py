@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import os
+import tempfile
+import threading
+from postman_sync import metrics
+from postman_sync.download import download_spec
+from postman_sync.transport import request
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.run_metrics = metrics.start_run()
+
+    def tearDown(self):
+        metrics._active = None
+
+    def test_stage_and_counters_per_link(self):
+        with metrics.link_context('http://a.example.com'):
+            with metrics.stage('download'):
+                pass
+            metrics.incr(metrics.API_CALLS, 2)
+        with metrics.link_context('http://b.example.com'):
+            metrics.incr(metrics.API_CALLS)
+        summary = self.run_metrics.summary()
+        self.assertIn('download', summary['links']['http://a.example.com']['stages'])
+        self.assertEqual(summary['links']['http://a.example.com']['counters'][metrics.API_CALLS], 2)
+        self.assertEqual(summary['totals'][metrics.API_CALLS], 3)
+
+    def test_concurrent_links(self):
+        def work(index):
+            with metrics.link_context(f'http://host{index}.example.com'):
+                for _ in range(100):
+                    metrics.incr(metrics.ENDPOINTS_MERGED)
+        threads = [threading.Thread(target=work, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        summary = self.run_metrics.summary()
+        self.assertEqual(len(summary['links']), 8)
+        self.assertEqual(summary['totals'][metrics.ENDPOINTS_MERGED], 800)
+
+    def test_inactive_run_is_noop(self):
+        metrics._active = None
+        with metrics.stage('download'):
+            metrics.incr(metrics.API_CALLS)
+        self.assertEqual(self.run_metrics.summary()['links'], {})
+
+    def test_exports(self):
+        with metrics.link_context('http://example.com/"spec"'):
+            with metrics.stage('merge'):
+                metrics.incr(metrics.RETRIES)
+        self.run_metrics.finish()
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'metrics.json')
+            prom_path = os.path.join(directory, 'postman_sync.prom')
+            self.run_metrics.write_json(json_path)
+            self.run_metrics.write_prometheus(prom_path)
+            with open(json_path) as file:
+                self.assertEqual(json.load(file)['totals'], {metrics.RETRIES: 1})
+            with open(prom_path) as file:
+                content = file.read()
+            self.assertEqual(sorted(os.listdir(directory)), ['metrics.json', 'postman_sync.prom'])
+        self.assertIn('# TYPE postman_sync_stage_duration_seconds gauge', content)
+        self.assertIn('postman_sync_stage_duration_seconds{link="http://example.com/\\"spec\\"",stage="merge"}', content)
+        self.assertIn('postman_sync_retries{link="http://example.com/\\"spec\\""} 1', content)
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_transport_records_calls(self, mock_get_session, mock_sleep):
+        ok = Mock(status_code=200, content=b'{"openapi": "3.0.0"}', request=Mock(body=None))
+        mock_get_session.return_value.request.side_effect = [Mock(status_code=503), ok]
+        with metrics.link_context('http://example.com'):
+            request('GET', 'http://example.com')
+        counters = self.run_metrics.summary()['links']['http://example.com']['counters']
+        self.assertEqual(counters[metrics.API_CALLS], 2)
+        self.assertEqual(counters[metrics.RETRIES], 1)
+        self.assertEqual(counters[metrics.BYTES_RECEIVED], len(ok.content))
+
+    @patch('postman_sync.transport.get_session')
+    def test_spec_downloads_are_not_api_calls(self, mock_get_session):
+        mock_get_session.return_value.request.return_value = Mock(status_code=304, content=b'', request=Mock(body=None))
+        with metrics.link_context('http://example.com'):
+            download_spec('http://example.com/spec.json')
+        counters = self.run_metrics.summary()['links']['http://example.com']['counters']
+        self.assertNotIn(metrics.API_CALLS, counters)
+        self.assertEqual(counters[metrics.SPEC_DOWNLOADS], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from postman_sync.scheduler import LinkScheduler, BACKOFF_FACTOR
+
+
+def entry(link, days_since_update=None):
+    entry = {'link': link, 'hash': 'h'}
+    if days_since_update is not None:
+        entry['Last Date Updated'] = (datetime.now() - timedelta(days=days_since_update)).isoformat()
+    return entry
+
+
+class TestScheduler(unittest.TestCase):
+
+    @patch('postman_sync.scheduler.random.uniform', side_effect=lambda low, high: high)
+    def test_backoff_and_reset(self, mock_uniform):
+        scheduler = LinkScheduler(min_interval=60, max_interval=200)
+        scheduler.track([entry('http://a.example.com')], now=0)
+        self.assertEqual(scheduler.intervals['http://a.example.com'], 60)
+
+        self.assertEqual(scheduler.reschedule('http://a.example.com', False, now=0), 60 * BACKOFF_FACTOR)
+        self.assertEqual(scheduler.reschedule('http://a.example.com', False, now=0), 60 * BACKOFF_FACTOR ** 2)
+        self.assertEqual(scheduler.reschedule('http://a.example.com', False, now=0), 200)
+        self.assertEqual(scheduler.reschedule('http://a.example.com', True, now=0), 60)
+
+    def test_initial_interval_follows_last_change(self):
+        scheduler = LinkScheduler(min_interval=60, max_interval=24 * 60 * 60)
+        now = datetime.now().timestamp()
+        self.assertEqual(scheduler.initial_interval(entry('http://a.example.com', 0), now), 60)
+        self.assertEqual(scheduler.initial_interval(entry('http://a.example.com', 365), now), 24 * 60 * 60)
+        self.assertEqual(scheduler.initial_interval(entry('http://a.example.com'), now), 60)
+
+    @patch('postman_sync.scheduler.random.uniform', side_effect=lambda low, high: high)
+    def test_pop_due_and_untrack(self, mock_uniform):
+        scheduler = LinkScheduler(min_interval=60, max_interval=600)
+        scheduler.track([entry('http://a.example.com'), entry('http://b.example.com')], now=0)
+        self.assertEqual(scheduler.pop_due(now=30), [])
+        self.assertEqual(scheduler.seconds_until_next(now=30), 30)
+        self.assertEqual(scheduler.pop_due(now=60), ['http://a.example.com', 'http://b.example.com'])
+        self.assertIsNone(scheduler.seconds_until_next(now=60))
+
+        scheduler.reschedule('http://a.example.com', False, now=60)
+        scheduler.reschedule('http://b.example.com', False, now=60)
+        scheduler.track([entry('http://a.example.com')], now=60)
+        self.assertEqual(scheduler.pop_due(now=1000), ['http://a.example.com'])
+
+    def test_requests_per_minute_budget(self):
+        scheduler = LinkScheduler(min_interval=10, max_interval=100, requests_per_minute=6)
+        scheduler.track([entry(f'http://example.com/{index}') for index in range(20)], now=0)
+        # 20 links at 6 requests per minute can be polled every 200 seconds at most
+        self.assertEqual(scheduler.budget_interval(), 200)
+        self.assertEqual(scheduler.reschedule('http://example.com/0', True, now=0), 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+
+from postman_sync import snapshots
+from postman_sync.snapshots import SnapshotStore
+from postman_sync.main_script import sync_collection
+
+COLLECTION = {'collection': {'info': {'name': 'API'}, 'item': [{'name': 'Get', 'request': {'method': 'GET', 'url': {'raw': '/a'}}}]}}
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(snapshots.disable)
+        self.listed = [{'uid': 'uid-1', 'updatedAt': '2024-01-01T00:00:00.000Z'}]
+        patcher = patch('postman_sync.snapshots.list_collections', side_effect=lambda api_key: self.listed)
+        self.mock_list = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_confirms_updated_at(self):
+        store = SnapshotStore(self.directory.name)
+        self.assertIsNone(store.load('uid-1', 'test_api_key'))
+        self.assertTrue(store.save('uid-1', COLLECTION, 'test_api_key'))
+
+        self.assertEqual(store.load('uid-1', 'test_api_key'), COLLECTION)
+        self.assertEqual(store.load('uid-1', 'test_api_key'), COLLECTION)
+        # Saving lists the collections once, and the listing is reused for the loads
+        self.assertEqual(self.mock_list.call_count, 1)
+
+        # An edit in the Postman UI changes updatedAt, so the snapshot is not used
+        self.listed = [{'uid': 'uid-1', 'updatedAt': '2024-01-02T00:00:00.000Z'}]
+        store.updated_at('uid-1', 'test_api_key', refresh=True)
+        self.assertIsNone(store.load('uid-1', 'test_api_key'))
+
+    def test_save_requires_the_collection_to_be_listed(self):
+        store = SnapshotStore(self.directory.name)
+        self.assertFalse(store.save('uid-unknown', COLLECTION, 'test_api_key'))
+        self.assertEqual(os.listdir(os.path.join(self.directory.name, 'refs')), [])
+
+    def test_identical_collections_share_a_blob(self):
+        self.listed = [{'uid': 'uid-1', 'updatedAt': 'a'}, {'uid': 'uid-2', 'updatedAt': 'b'}]
+        store = SnapshotStore(self.directory.name)
+        store.save('uid-1', COLLECTION, 'test_api_key')
+        store.save('uid-2', COLLECTION, 'test_api_key')
+        blobs = os.path.join(self.directory.name, 'blobs')
+        self.assertEqual(len(os.listdir(blobs)), 1)
+
+        store.discard('uid-1')
+        self.assertEqual(len(os.listdir(blobs)), 1)
+        store.discard('uid-2')
+        self.assertEqual(os.listdir(blobs), [])
+
+    @patch('postman_sync.main_script.update_collection', return_value=True)
+    @patch('postman_sync.main_script.get_collection_json')
+    @patch('postman_sync.main_script.build_collection_json')
+    def test_sync_collection_skips_fetching_its_own_collection(self, mock_build, mock_get_collection_json, mock_update_collection):
+        snapshots.enable(self.directory.name)
+        mock_build.side_effect = lambda *args: {'collection': {'info': {'name': 'Imported'}, 'item': []}}
+        mock_get_collection_json.return_value = COLLECTION
+
+        self.assertEqual(sync_collection('http://example.com', {}, 'uid-1', 'test_api_key', update_mode='replace'), 'uid-1')
+        self.assertEqual(sync_collection('http://example.com', {}, 'uid-1', 'test_api_key', update_mode='replace'), 'uid-1')
+        mock_get_collection_json.assert_called_once()
+
+        # The items mode needs the request IDs Postman assigned, so it always downloads the collection
+        sync_collection('http://example.com', {}, 'uid-1', 'test_api_key', update_mode='items')
+        self.assertEqual(mock_get_collection_json.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
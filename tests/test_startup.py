@@ -0,0 +1,81 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from postman_sync.main_script import hash_json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(REPO_DIR, 'postman_sync', 'main_script.py')
+
+# Wall-clock budgets for a fresh interpreter, generous enough for slow CI machines
+HELP_BUDGET_SECONDS = 2.0
+NO_CHANGE_SYNC_BUDGET_SECONDS = 4.0
+
+SPEC = {'openapi': '3.0.0', 'info': {'title': 'API', 'version': '1'}, 'paths': {'/health': {'get': {'summary': 'Health'}}}}
+
+
+class SpecHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = json.dumps(SPEC).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_cli(args, cwd):
+    env = dict(os.environ, POSTMAN_API_KEY='test_api_key', PYTHONPATH=REPO_DIR)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, MAIN_SCRIPT] + args, cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+    return result, time.perf_counter() - started
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_has_no_side_effects(self):
+        code = (
+            "import logging, sys\n"
+            "import postman_sync, postman_sync.main_script\n"
+            "print(sorted(name for name in ('requests', 'sqlite3') if name in sys.modules), logging.getLogger().handlers)\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '[] []')
+
+    def test_help_budget(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result, elapsed = run_cli(['--help'], temp_dir)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertLess(elapsed, HELP_BUDGET_SECONDS)
+
+    def test_no_change_sync_budget(self):
+        server = HTTPServer(('127.0.0.1', 0), SpecHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        link = f"http://127.0.0.1:{server.server_port}/openapi.json"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            entries = [{'link': link, 'hash': hash_json(SPEC), 'Collection UID': 'uid', 'Last Date Updated': '2024-01-01T00:00:00'}]
+            with open(os.path.join(temp_dir, 'links.json'), 'w') as file:
+                json.dump(entries, file)
+            result, elapsed = run_cli(['--log-level', 'INFO'], temp_dir)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('No changes found', result.stderr)
+        self.assertLess(elapsed, NO_CHANGE_SYNC_BUDGET_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+
+from postman_sync.state import JsonFileState, SqliteState, open_state
+
+
+class TestState(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def write_links(self, name, links):
+        with open(self.path(name), 'w') as file:
+            json.dump(links, file)
+        return self.path(name)
+
+    def test_json_file_state(self):
+        state = JsonFileState(self.path('links.json'))
+        state.add({'link': 'http://a.example.com', 'hash': 'a'})
+        entry = state.get('http://a.example.com')
+        entry['hash'] = 'b'
+        state.update(entry)
+
+        with open(self.path('links.json'), 'r') as file:
+            self.assertEqual(json.load(file), [{'link': 'http://a.example.com', 'hash': 'b'}])
+
+    def test_sqlite_state(self):
+        with SqliteState(self.path('links.db')) as state:
+            for index in range(3):
+                state.add({'link': f'http://example.com/{index}', 'hash': str(index)})
+            entry = state.get('http://example.com/1')
+            entry['hash'] = 'changed'
+            state.update(entry)
+            self.assertIsNone(state.get('http://example.com/missing'))
+
+        with SqliteState(self.path('links.db')) as state:
+            self.assertEqual([entry['hash'] for entry in state.entries()], ['0', 'changed', '2'])
+
+    def test_migrate_from_json_once(self):
+        links_file = self.write_links('links.json', [{'link': 'http://a.example.com', 'hash': 'a'}])
+        with SqliteState(self.path('links.db'), legacy_links_file=links_file) as state:
+            self.assertEqual(state.entries(), [{'link': 'http://a.example.com', 'hash': 'a'}])
+
+        # Later edits to links.json are not imported again
+        self.write_links('links.json', [{'link': 'http://b.example.com', 'hash': 'b'}])
+        with SqliteState(self.path('links.db'), legacy_links_file=links_file) as state:
+            self.assertEqual([entry['link'] for entry in state.entries()], ['http://a.example.com'])
+
+    def test_concurrent_updates(self):
+        with SqliteState(self.path('links.db')) as state:
+            for index in range(8):
+                state.add({'link': f'http://example.com/{index}', 'hash': ''})
+
+            def update(index):
+                state.update({'link': f'http://example.com/{index}', 'hash': f'h{index}'})
+
+            threads = [threading.Thread(target=update, args=(index,)) for index in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual([entry['hash'] for entry in state.entries()], [f'h{index}' for index in range(8)])
+
+    def test_json_file_state_saves_while_workers_change_entries(self):
+        state = JsonFileState(self.path('links.json'))
+        for index in range(50):
+            state.add({'link': f'http://example.com/{index}', 'hash': ''})
+        first, second = state.entries()[:2]
+        stop = threading.Event()
+
+        def mutate():
+            # A worker keeps adding and removing keys on the entry it is syncing
+            count = 0
+            while not stop.is_set():
+                first[f'key{count % 20}'] = count
+                first.pop(f'key{(count + 10) % 20}', None)
+                count += 1
+
+        worker = threading.Thread(target=mutate)
+        worker.start()
+        try:
+            for index in range(50):
+                second['hash'] = f'h{index}'
+                state.update(second)
+        finally:
+            stop.set()
+            worker.join()
+
+        with open(self.path('links.json'), 'r') as file:
+            saved = json.load(file)
+        self.assertEqual(saved[0], {'link': 'http://example.com/0', 'hash': ''})
+        self.assertEqual(saved[1]['hash'], 'h49')
+        self.assertEqual([name for name in os.listdir(self.temp_dir.name) if name.endswith('.tmp')], [])
+
+    def test_host_records(self):
+        for state in (JsonFileState(self.path('links.json')), SqliteState(self.path('links.db'))):
+            with state:
+                state.update_host('a.example.com', {'failures': 2})
+                state.update_host('b.example.com', {'failures': 1})
+                state.update_host('b.example.com', None)
+            with type(state)(state.path) as reopened:
+                self.assertEqual(reopened.hosts(), {'a.example.com': {'failures': 2}})
+        self.assertTrue(os.path.exists(self.path('links.hosts.json')))
+
+    def test_open_state(self):
+        self.assertIsInstance(open_state(self.path('links.json')), JsonFileState)
+        with open_state(self.path('links.sqlite')) as state:
+            self.assertIsInstance(state, SqliteState)
+
+if __name__ == '__main__':
+    unittest.main()
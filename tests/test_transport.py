@@ -0,0 +1,156 @@
+import unittest
+from unittest.mock import patch, Mock
+import requests
+from postman_sync import transport
+from postman_sync.transport import request, retry_after_seconds
+
+class TestTransport(unittest.TestCase):
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_success(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.return_value = Mock(status_code=200)
+        response = request('GET', 'http://example.com')
+        self.assertEqual(response.status_code, 200)
+        mock_sleep.assert_not_called()
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_retries_server_errors(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.side_effect = [Mock(status_code=503), Mock(status_code=502), Mock(status_code=200)]
+        response = request('GET', 'http://example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_sleep.call_count, 2)
+        first_delay, second_delay = (call[0][0] for call in mock_sleep.call_args_list)
+        self.assertLess(first_delay, second_delay)
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_honours_retry_after(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.side_effect = [
+            Mock(status_code=429, headers={'Retry-After': '7'}),
+            Mock(status_code=200),
+        ]
+        response = request('POST', 'http://example.com')
+        self.assertEqual(response.status_code, 200)
+        mock_sleep.assert_called_once_with(7.0)
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_gives_up_after_max_retries(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.return_value = Mock(status_code=500)
+        response = request('GET', 'http://example.com')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(mock_get_session.return_value.request.call_count, transport.MAX_RETRIES + 1)
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_does_not_retry_client_errors(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.return_value = Mock(status_code=404)
+        response = request('GET', 'http://example.com')
+        self.assertEqual(response.status_code, 404)
+        mock_sleep.assert_not_called()
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_connection_error_raises(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.side_effect = requests.exceptions.ConnectionError('refused')
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            request('GET', 'http://example.com')
+        self.assertEqual(mock_sleep.call_count, transport.MAX_RETRIES)
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_does_not_retry_post_server_errors(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.return_value = Mock(status_code=503)
+        response = request('POST', 'http://example.com')
+        self.assertEqual(response.status_code, 503)
+        mock_sleep.assert_not_called()
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_retries_post_only_before_sending(self, mock_get_session, mock_sleep):
+        from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+        refused = requests.exceptions.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'refused')))
+        mock_get_session.return_value.request.side_effect = [refused, Mock(status_code=200)]
+        self.assertEqual(request('POST', 'http://example.com').status_code, 200)
+        mock_sleep.assert_called_once()
+
+        mock_get_session.return_value.request.side_effect = requests.exceptions.ConnectionError(ProtocolError('Connection aborted.'))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            request('POST', 'http://example.com')
+        mock_sleep.assert_called_once()
+
+    def test_retry_after_http_date(self):
+        response = Mock(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(retry_after_seconds(response), 0.0)
+        self.assertIsNone(retry_after_seconds(Mock(headers={})))
+
+    def test_get_session_is_shared(self):
+        self.assertIs(transport.get_session(), transport.get_session())
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.time.monotonic', return_value=100.0)
+    def test_rate_limiter(self, mock_monotonic, mock_sleep):
+        limiter = transport.RateLimiter(requests_per_minute=60)
+        limiter.acquire()
+        mock_sleep.assert_not_called()
+        limiter.acquire()
+        mock_sleep.assert_called_once_with(1.0)
+
+    @patch('postman_sync.transport.get_session')
+    def test_request_takes_rate_limit_token(self, mock_get_session):
+        mock_get_session.return_value.request.return_value = Mock(status_code=200)
+        transport.set_rate_limit(120)
+        self.addCleanup(transport.set_rate_limit, None)
+        with patch.object(transport._rate_limiter, 'acquire') as mock_acquire:
+            request('GET', 'http://example.com')
+        mock_acquire.assert_called_once()
+
+    def test_deadlines_nest(self):
+        self.assertIsNone(transport.remaining())
+        with transport.deadline(60):
+            with transport.deadline(5):
+                self.assertLessEqual(transport.remaining(), 5)
+            with transport.deadline(600):
+                self.assertLessEqual(transport.remaining(), 60)
+        self.assertIsNone(transport.remaining())
+
+    @patch('postman_sync.transport.get_session')
+    def test_request_timeout_is_bounded_by_deadline(self, mock_get_session):
+        mock_get_session.return_value.request.return_value = Mock(status_code=200)
+        request('GET', 'http://example.com')
+        self.assertEqual(mock_get_session.return_value.request.call_args[1]['timeout'], (transport.CONNECT_TIMEOUT, transport.READ_TIMEOUT))
+
+        with transport.deadline(2):
+            request('GET', 'http://example.com')
+        connect, read = mock_get_session.return_value.request.call_args[1]['timeout']
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+    def test_grace_period_replaces_an_expired_deadline(self):
+        with transport.deadline(-1):
+            with transport.grace_period(5):
+                self.assertGreater(transport.remaining(), 4)
+                transport.check_deadline()
+            self.assertLess(transport.remaining(), 0)
+
+    @patch('postman_sync.transport.get_session')
+    def test_request_raises_after_deadline(self, mock_get_session):
+        with transport.deadline(-1):
+            with self.assertRaises(transport.DeadlineExceeded):
+                request('GET', 'http://example.com')
+        mock_get_session.return_value.request.assert_not_called()
+
+    @patch('postman_sync.transport.time.sleep')
+    @patch('postman_sync.transport.get_session')
+    def test_request_does_not_retry_past_deadline(self, mock_get_session, mock_sleep):
+        mock_get_session.return_value.request.return_value = Mock(status_code=429, headers={'Retry-After': '30'})
+        with transport.deadline(5):
+            with self.assertRaises(transport.DeadlineExceeded):
+                request('GET', 'http://example.com')
+        mock_sleep.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()